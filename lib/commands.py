@@ -5,11 +5,14 @@
 
 import os
 import sys
+from collections import defaultdict
 from copy import deepcopy
 from random import random
-from typing import List, Optional, cast
+from typing import DefaultDict, Dict, List, Optional, cast
+from weakref import WeakKeyDictionary
 
 import inkex
+from lxml import etree
 from shapely import geometry as shgeo
 from shapely import get_coordinates
 
@@ -103,6 +106,10 @@ class BaseCommand(object):
 
         id = url[1:]
 
+        node = get_command_index(self.svg).get_node_by_id(id)
+        if node is not None:
+            return node
+
         try:
             return self.svg.xpath(".//*[@id='%s']" % id)[0]
         except (IndexError, AttributeError):
@@ -182,6 +189,7 @@ class Command(BaseCommand):
             target_attr = CONNECTION_END
         connector.set(symbol_attr, f"#{symbol.get_id()}")
         connector.set(target_attr, f"#{new_target.get_id()}")
+        invalidate_command_index(new_target)
 
         return cloned_group
 
@@ -225,19 +233,103 @@ def point_command_symbols_up(node: inkex.BaseElement) -> None:
             point_upwards(use)
 
 
+# document root -> CommandIndex, see get_command_index()
+_command_indexes: WeakKeyDictionary = WeakKeyDictionary()
+
+
+class CommandIndex(object):
+    """The command connectors and symbols of a document, found in one pass.
+
+    Searching the whole document for the connectors of every element makes
+    going through a document quadratic.  Instead, we look at every node once
+    and remember the connectors by the url they point to, the standalone
+    command symbols, and the nodes by id.
+
+    Nodes that were removed from the document or changed to point elsewhere
+    since are skipped.  Code that adds commands or points connectors at
+    other elements must call invalidate_command_index().
+    """
+
+    def __init__(self, svg: inkex.BaseElement) -> None:
+        self.nodes_by_id: Dict[str, inkex.BaseElement] = {}
+        self.connectors: DefaultDict[str, List[inkex.BaseElement]] = defaultdict(list)
+        self.standalone_nodes: List[inkex.BaseElement] = []
+        self._standalone_commands: Optional[List[StandaloneCommand]] = None
+
+        for node in svg.iterdescendants(tag=etree.Element):
+            id = node.get('id')
+            if id is not None:
+                self.nodes_by_id.setdefault(id, node)
+
+            start = node.get(CONNECTION_START)
+            end = node.get(CONNECTION_END)
+            if start is not None:
+                self.connectors[start].append(node)
+            if end is not None and end != start:
+                self.connectors[end].append(node)
+
+            if node.tag == SVG_USE_TAG and node.get(XLINK_HREF, "").startswith('#inkstitch_'):
+                self.standalone_nodes.append(node)
+
+    def get_node_by_id(self, id: str) -> Optional[inkex.BaseElement]:
+        node = self.nodes_by_id.get(id)
+        if node is None or node.get('id') != id or not self._in_document(node):
+            return None
+        return node
+
+    def find_connectors(self, id: str) -> List[inkex.BaseElement]:
+        url = f"#{id}"
+        return [connector for connector in self.connectors.get(url, ())
+                if url in (connector.get(CONNECTION_START), connector.get(CONNECTION_END)) and self._in_document(connector)]
+
+    def standalone_commands(self) -> List[StandaloneCommand]:
+        if self._standalone_commands is None:
+            self._standalone_commands = []
+            for node in self.standalone_nodes:
+                try:
+                    self._standalone_commands.append(StandaloneCommand(node))
+                except CommandParseError:
+                    pass
+
+        return [command for command in self._standalone_commands if self._in_document(command.node)]
+
+    def _in_document(self, node: inkex.BaseElement) -> bool:
+        # getroottree() still finds the document of removed nodes
+        top = node
+        for top in node.iterancestors():
+            pass
+        return _command_indexes.get(top) is self
+
+
+def get_command_index(node: inkex.BaseElement) -> CommandIndex:
+    """Return the CommandIndex of the document node belongs to."""
+
+    svg = node.getroottree().getroot()
+    try:
+        return _command_indexes[svg]
+    except KeyError:
+        index = _command_indexes[svg] = CommandIndex(svg)
+        return index
+
+
+def invalidate_command_index(node: inkex.BaseElement) -> None:
+    """Forget the CommandIndex of node's document after commands changed."""
+
+    _command_indexes.pop(node.getroottree().getroot(), None)
+
+
 def find_commands(node: inkex.BaseElement) -> List[Command]:
     """Find the symbols this node is connected to and return them as Commands"""
 
     # find all paths that have this object as a connection
-    id = node.get('id')
-    xpath = f".//*[@inkscape:connection-start='#{id}' or @inkscape:connection-end='#{id}']"
-    connectors = node.getroottree().getroot().xpath(xpath, namespaces=inkex.NSS)
+    connectors = get_command_index(node).find_connectors(node.get('id'))
 
     # try to turn them into commands
     commands = []
     for connector in connectors:
         try:
-            commands.append(Command(connector))
+            # Connectors are paths; anything else fails to parse as a command.
+            commands.append(Command(cast(inkex.PathElement, connector)))
         except CommandParseError:
             # Parsing the connector failed, meaning it's not actually an Ink/Stitch command.
             pass
@@ -290,14 +382,7 @@ def global_command(svg, command):
 def _standalone_commands(svg):
     """Find all unconnected command symbols in the SVG."""
 
-    xpath = ".//svg:use[starts-with(@xlink:href, '#inkstitch_')]"
-    symbols = svg.xpath(xpath, namespaces=inkex.NSS)
-
-    for symbol in symbols:
-        try:
-            yield StandaloneCommand(symbol)
-        except CommandParseError:
-            pass
+    yield from get_command_index(svg).standalone_commands()
 
 
 def is_command(node: inkex.BaseElement) -> bool:
@@ -342,6 +427,7 @@ def ensure_symbol(svg, command) -> None:
         symbol.transform = 'scale(0.25)'
         symbol.style['opacity'] = 0.7
         defs.append(symbol)
+        invalidate_command_index(svg)
 
 
 def ensure_command_symbols(group):
@@ -465,6 +551,8 @@ def add_commands(element, commands, pos=None):
         symbol = add_symbol(svg, group, command, position)
         add_connector(svg, symbol, command, element)
 
+    invalidate_command_index(svg)
+
 
 def add_layer_commands(layer, commands):
     svg = layer.root
@@ -494,3 +582,5 @@ def add_layer_commands(layer, commands):
             "y": "-10",
             "transform": correction_transform
         }))
+
+    invalidate_command_index(svg)
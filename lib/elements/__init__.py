@@ -11,4 +11,5 @@ from .image import ImageObject
 from .satin_column import SatinColumn
 from .stroke import Stroke
 from .text import TextObject
+from .utils.embroider import embroider_elements
 from .utils.nodes import iterate_nodes, node_to_elements, nodes_to_elements
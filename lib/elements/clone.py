@@ -11,17 +11,18 @@ from inkex import BaseElement, Title, Transform, Vector2d
 from lxml.etree import _Comment
 from shapely import Geometry, MultiLineString, Point as ShapelyPoint
 
-from ..commands import (find_commands, is_command_symbol,
-                        point_command_symbols_up)
+from ..commands import (find_commands, invalidate_command_index,
+                        is_command_symbol, point_command_symbols_up)
 from ..i18n import _
+from ..marker import invalidate_marker_index
 from ..stitch_plan.stitch_group import StitchGroup
 from ..svg.path import get_node_transform
 from ..svg.svg import copy_no_children
 from ..svg.tags import (CONNECTION_END, CONNECTION_START, EMBROIDERABLE_TAGS,
                         INKSTITCH_ATTRIBS, SVG_GROUP_TAG, SVG_SYMBOL_TAG,
                         SVG_USE_TAG)
-from ..utils import cache
-from .element import EmbroideryElement, param
+from ..utils.cache import instance_cache
+from .element import EmbroideryElement, NodeContext, param
 from .validation import ValidationWarning
 
 
@@ -40,8 +41,8 @@ class Clone(EmbroideryElement):
     name = "Clone"
     element_name = _("Clone")
 
-    def __init__(self, node: BaseElement) -> None:
-        super(Clone, self).__init__(node)
+    def __init__(self, node: BaseElement, context: Optional[NodeContext] = None) -> None:
+        super(Clone, self).__init__(node, context)
 
     @property
     @param('clone', _("Clone"), type='toggle', inverse=False, default=True)
@@ -54,7 +55,7 @@ class Clone(EmbroideryElement):
            tooltip=_("This setting will apply a custom fill angle for the clone."),
            unit='deg',
            type='float')
-    @cache
+    @instance_cache
     def clone_fill_angle(self) -> float:
         return self.get_float_param('angle')
 
@@ -65,7 +66,7 @@ class Clone(EmbroideryElement):
                "Flip automatically calculated angle if it appears to be wrong."),
            type='boolean',
            default=False)
-    @cache
+    @instance_cache
     def flip_angle(self) -> bool:
         return self.get_boolean_param('flip_angle', False)
 
@@ -125,7 +126,7 @@ class Clone(EmbroideryElement):
             return last.uses_next_element()
         return False
 
-    @cache
+    @instance_cache
     def first_and_last_element(self) -> Tuple[Optional[EmbroideryElement], Optional[EmbroideryElement]]:
         with self.clone_elements() as elements:
             if len(elements):
@@ -313,5 +314,7 @@ def clone_with_fixup(parent: BaseElement, node: BaseElement) -> BaseElement:
     for n in ret.iter():
         fixup_id_attr(n, CONNECTION_START)
         fixup_id_attr(n, CONNECTION_END)
+    invalidate_command_index(ret)
+    invalidate_marker_index(ret)
 
     return ret
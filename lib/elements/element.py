@@ -7,12 +7,12 @@ from __future__ import annotations
 import json
 import sys
 from contextlib import contextmanager
-from copy import deepcopy
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional, Union, overload
+from weakref import WeakSet
 
 import inkex
 import numpy as np
-from inkex import BaseElement, Color, bezier
+from inkex import BaseElement, Color
 from shapely import Point as ShapelyPoint
 from shapely.ops import nearest_points
 
@@ -20,18 +20,22 @@ from ..commands import Command, find_commands
 from ..debug.debug import debug
 from ..exceptions import InkstitchException, format_uncaught_exception
 from ..i18n import _
-from ..marker import get_marker_elements_cache_key_data
+from ..marker import get_marker_elements_cache_key_data, has_marker
 from ..patterns import apply_patterns, get_patterns_cache_key_data
 from ..stitch_plan import StitchGroup
+from ..stitch_plan.serialization import (stitch_groups_from_bytes,
+                                         stitch_groups_to_bytes)
 from ..stitch_plan.lock_stitch import (LOCK_DEFAULTS, AbsoluteLock, CustomLock,
                                        LockStitch, SVGLock)
 from ..svg import (PIXELS_PER_MM, apply_transforms, convert_length,
-                   get_node_transform)
-from ..svg.clip import get_clip_path
+                   flatten_superpath, get_node_transform)
+from ..svg.clip import get_clip_fingerprint, get_clip_path
 from ..svg.tags import INKSCAPE_LABEL, INKSTITCH_ATTRIBS
-from ..utils import DotDict, Point, cache
-from ..utils.cache import (CacheKeyGenerator, get_stitch_plan_cache,
-                           is_cache_disabled)
+from ..utils import DotDict, Point, prng
+from ..utils.cache import (CacheKeyGenerator, fingerprint,
+                           get_stitch_plan_cache, instance_cache,
+                           invalidate_instance_cache, is_cache_disabled)
+from ..utils.param import ParamOption
 
 
 class Param(object):
@@ -67,14 +71,98 @@ def param(*args, **kwargs):
     return decorator
 
 
-class EmbroideryElement(object):
+def get_node_color(node, color_location, default=None):
+    try:
+        color = node.get_computed_style(color_location)
+        if isinstance(color, inkex.LinearGradient) and len(color.stops) == 1:
+            # Inkscape swatches set as a linear gradient with only one stop color
+            # Ink/Stitch should render the color correctly
+            color = get_node_color(color.stops[0], "stop-color", default)
+    except (inkex.ColorError, ValueError):
+        # A color error could show up, when an element has an unrecognized color name
+        # A value error could show up, when for example when an element links to a non-existent gradient
+        # TODO: This will also apply to currentcolor and alike which will not render
+        color = default
+    return color
+
+
+class NodeContext(object):
+    """What all elements made from the same node have in common.
+
+    Working out the style, colors, commands and transform of a node is
+    expensive.  iterate_nodes() already needs most of them to decide which
+    nodes to embroider, and node_to_elements() may make several elements
+    for one node.  They all share the node's context, so each of these is
+    only worked out once.
+
+    Invalidating one of the elements invalidates all of them, because
+    they all describe the same node.
+    """
+
     def __init__(self, node: BaseElement):
         self.node = node
+        self.elements: WeakSet = WeakSet()
+
+    def invalidate(self, param=None):
+        invalidate_instance_cache(self, param)
+        for element in list(self.elements):
+            invalidate_instance_cache(element, param)
+
+    @instance_cache(depends_on=['style'])
+    def specified_style(self):
+        return self.node.specified_style()
+
+    def get_style(self, style_name, default=None):
+        style = self.specified_style().get(style_name, default)
+        if style in ['none', 'None']:
+            style = None
+        return style
+
+    @instance_cache(depends_on=['style'])
+    def get_color(self, color_location, default=None):
+        return get_node_color(self.node, color_location, default)
+
+    @property
+    @instance_cache(depends_on=['style'])
+    def has_marker(self):
+        return has_marker(self.node)
+
+    @property
+    @instance_cache(depends_on=['commands'])
+    def commands(self) -> List[Command]:
+        return find_commands(self.node)
+
+    def has_command(self, command: str) -> bool:
+        return any(c.command == command for c in self.commands)
+
+    @property
+    @instance_cache
+    def transform(self):
+        return get_node_transform(self.node)
+
+
+class EmbroideryElement(object):
+    # options for the random_stream param of randomized elements
+    _random_streams = [ParamOption('legacy', _('Legacy')),
+                       ParamOption('block', _('Fast'))]
+
+    def __init__(self, node: BaseElement, context: Optional[NodeContext] = None):
+        self.node = node
+        if context is None:
+            context = NodeContext(node)
+        self.context = context
+        context.elements.add(self)
 
     @property
     def id(self):
         return self.node.get('id')
 
+    def get_random_stream(self):
+        # Existing documents don't have this param, so they keep the legacy stream.
+        if self.get_param('random_stream', 'legacy') == 'block':
+            return prng.BLOCK_STREAM
+        return prng.LEGACY_STREAM
+
     @classmethod
     def get_params(cls):
         params = []
@@ -87,12 +175,12 @@ class EmbroideryElement(object):
                     params.append(fget.param)
         return params
 
-    @cache
+    @instance_cache(param_getter=True)
     def get_param(self, param, default):
         value = self.node.get(INKSTITCH_ATTRIBS[param], "").strip()
         return value or default
 
-    @cache
+    @instance_cache(param_getter=True)
     def get_boolean_param(self, param, default=None):
         value = self.get_param(param, default)
 
@@ -101,7 +189,7 @@ class EmbroideryElement(object):
         else:
             return value and (value.lower() in ('yes', 'y', 'true', 't', '1'))
 
-    @cache
+    @instance_cache(param_getter=True)
     def get_float_param(self, param, default=None):
         try:
             value = float(self.get_param(param, default))
@@ -116,7 +204,7 @@ class EmbroideryElement(object):
 
         return value
 
-    @cache
+    @instance_cache(param_getter=True)
     def get_int_param(self, param, default=None):
         try:
             value = int(self.get_param(param, default))
@@ -155,7 +243,7 @@ class EmbroideryElement(object):
         return self.get_split_float_param(param, default) * PIXELS_PER_MM
 
     # returns an array of multiple space separated int values
-    @cache
+    @instance_cache(param_getter=True)
     def get_multiple_int_param(self, param, default="0"):
         params = self.get_param(param, default).split(" ")
         try:
@@ -165,7 +253,7 @@ class EmbroideryElement(object):
         return params
 
     # returns an array of multiple space separated float values
-    @cache
+    @instance_cache(param_getter=True)
     def get_multiple_float_param(self, param, default="0"):
         params = self.get_param(param, default).split(" ")
         try:
@@ -190,18 +278,27 @@ class EmbroideryElement(object):
 
     def set_param(self, name, value):
         # Sets a param on the node backing this element. Used by params dialog.
-        # After calling, this element is invalid due to caching and must be re-created to use the new value.
         param = INKSTITCH_ATTRIBS[name]
         self.node.set(param, str(value))
+        self.invalidate(name)
 
     def remove_param(self, name):
         param = INKSTITCH_ATTRIBS[name]
         del self.node.attrib[param]
+        self.invalidate(name)
+
+    def invalidate(self, param=None):
+        """Forget cached values that depend on param, or all of them if param is None.
+
+        param can be the name of a param, or one of 'path', 'style', 'clip'
+        and 'commands' if those changed on the node.  This applies to all
+        elements of the node (see NodeContext).
+        """
+        self.context.invalidate(param)
 
-    @cache
     def _get_specified_style(self):
-        # We want to cache this, because it's quite expensive to generate.
-        return self.node.specified_style()
+        # The context caches this, because it's quite expensive to generate.
+        return self.context.specified_style()
 
     def get_style(self, style_name, default=None):
         element_style = self._get_specified_style()
@@ -211,31 +308,20 @@ class EmbroideryElement(object):
         return style
 
     def _get_color(self, node, color_location, default=None):
-        try:
-            color = node.get_computed_style(color_location)
-            if isinstance(color, inkex.LinearGradient) and len(color.stops) == 1:
-                # Inkscape swatches set as a linear gradient with only one stop color
-                # Ink/Stitch should render the color correctly
-                color = self._get_color(color.stops[0], "stop-color", default)
-        except (inkex.ColorError, ValueError):
-            # A color error could show up, when an element has an unrecognized color name
-            # A value error could show up, when for example when an element links to a non-existent gradient
-            # TODO: This will also apply to currentcolor and alike which will not render
-            color = default
-        return color
+        return get_node_color(node, color_location, default)
 
     @property
-    @cache
+    @instance_cache
     def fill_color(self):
-        return self._get_color(self.node, "fill", "black")
+        return self.context.get_color("fill", "black")
 
     @property
-    @cache
+    @instance_cache
     def stroke_color(self):
-        return self._get_color(self.node, "stroke")
+        return self.context.get_color("stroke")
 
     @property
-    @cache
+    @instance_cache
     def stroke_scale(self):
         # How wide is the stroke, after the transforms are applied?
         #
@@ -247,7 +333,7 @@ class EmbroideryElement(object):
         # Of course, transforms may also involve rotation, skewing, and translation.
         # All except translation can affect how wide the stroke appears on the screen.
 
-        node_transform = inkex.transforms.Transform(get_node_transform(self.node))
+        node_transform = inkex.transforms.Transform(self.context.transform)
 
         # First, figure out the translation component of the transform.  Using a zero
         # vector completely cancels out the rotation, scale, and skew components.
@@ -272,7 +358,7 @@ class EmbroideryElement(object):
         return node_scale
 
     @property
-    @cache
+    @instance_cache
     def stroke_width(self):
         width = self.get_style("stroke-width", "1.0")
         width = convert_length(width)
@@ -285,7 +371,7 @@ class EmbroideryElement(object):
            type='float',
            default=None,
            sort_index=200)
-    @cache
+    @instance_cache
     def min_stitch_length(self):
         return self.get_float_param("min_stitch_length_mm")
 
@@ -296,7 +382,7 @@ class EmbroideryElement(object):
            type='float',
            default=None,
            sort_index=201)
-    @cache
+    @instance_cache
     def min_jump_stitch_length(self):
         return self.get_float_param("min_jump_stitch_length_mm")
 
@@ -311,7 +397,7 @@ class EmbroideryElement(object):
            options=[_("Both"), _("Before"), _("After"), _("Neither")],
            default=0,
            sort_index=202)
-    @cache
+    @instance_cache
     def ties(self):
         return self.get_int_param("ties", 0)
 
@@ -324,7 +410,7 @@ class EmbroideryElement(object):
            type='boolean',
            default=False,
            sort_index=203)
-    @cache
+    @instance_cache
     def force_lock_stitches(self):
         return self.get_boolean_param('force_lock_stitches', False)
 
@@ -417,7 +503,7 @@ class EmbroideryElement(object):
            default=100,
            select_items=[('lock_end', lock.id) for lock in LOCK_DEFAULTS['end'] if isinstance(lock, (SVGLock, CustomLock))],
            sort_index=211)
-    @cache
+    @instance_cache
     def lock_end_scale_percent(self):
         return self.get_float_param('lock_end_scale_percent', 100)
 
@@ -481,12 +567,12 @@ class EmbroideryElement(object):
     def is_closed_path(self):
         return isinstance(self.node.get_path()[-1], inkex.paths.ZoneClose)
 
-    @cache
+    @instance_cache(depends_on=['path'])
     def parse_path(self):
         return apply_transforms(self.path, self.node)
 
     @property
-    @cache
+    @instance_cache(depends_on=['parse_path'])
     def paths(self):
         return self.flatten(self.parse_path())
 
@@ -501,20 +587,26 @@ class EmbroideryElement(object):
         raise NotImplementedError("INTERNAL ERROR: %s must implement first_stitch()", self.__class__)
 
     @property
-    @cache
+    @instance_cache(depends_on=['commands'])
     def commands(self) -> List[Command]:
-        return find_commands(self.node)
+        return self.context.commands
 
-    @cache
+    @instance_cache(depends_on=['commands'])
     def get_commands(self, command: str) -> List[Command]:
         return [c for c in self.commands if c.command == command]
 
-    @cache
+    @instance_cache(depends_on=['get_commands'])
     def has_command(self, command: str) -> bool:
         return len(self.get_commands(command)) > 0
 
-    @cache
-    def get_command(self, command: str, multiple: bool = False) -> Optional[Command]:
+    @overload
+    def get_command(self, command: str, multiple: Literal[False] = False) -> Optional[Command]: ...
+
+    @overload
+    def get_command(self, command: str, multiple: Literal[True]) -> Optional[List[Command]]: ...
+
+    @instance_cache(depends_on=['get_commands'])
+    def get_command(self, command: str, multiple: bool = False) -> Union[Command, List[Command], None]:
         commands = self.get_commands(command)
 
         if commands:
@@ -531,13 +623,10 @@ class EmbroideryElement(object):
     def flatten(self, path):
         """approximate a path containing beziers with a series of points"""
 
-        path = deepcopy(path)
-        bezier.cspsubdiv(path, 0.1)
-
-        return [self.strip_control_points(subpath) for subpath in path]
+        return [subpath.tolist() for subpath in flatten_superpath(path)]
 
     @property
-    @cache
+    @instance_cache
     def lock_stitches(self):
         lock_start = None
         lock_end = None
@@ -566,12 +655,9 @@ class EmbroideryElement(object):
         if is_cache_disabled():
             return None
 
-        if not self.uses_previous_stitch():
-            # we don't care about the previous stitch
-            previous_stitch = None
-
-        cache_key = self.get_cache_key(previous_stitch, next_element)
-        stitch_groups = get_stitch_plan_cache().get(cache_key)
+        cache_key = self.get_embroider_cache_key(previous_stitch, next_element)
+        # Entries written by older versions of Ink/Stitch decode to None.
+        stitch_groups = stitch_groups_from_bytes(get_stitch_plan_cache().get(cache_key))
 
         if stitch_groups:
             debug.log(f"used cache for {self.node.get('id')} {self.node.get(INKSCAPE_LABEL)}")
@@ -594,26 +680,48 @@ class EmbroideryElement(object):
         """
         return False
 
+    def prepare(self) -> Any:
+        """Do the work for to_stitch_groups() that doesn't depend on other elements.
+
+        embroider_elements() calls this in a worker process for elements that
+        have to wait for the elements before them, and hands the result to
+        use_preparation() in the main process.  The result must be picklable.
+
+        This function may be overridden in a subclass.
+        """
+        return None
+
+    def use_preparation(self, preparation: Any) -> None:
+        """Accept the result of prepare() before to_stitch_groups() is called.
+
+        This function may be overridden in a subclass.
+        """
+        pass
+
     @debug.time
     def _save_cached_stitch_groups(self, stitch_groups, previous_stitch, next_element):
         if is_cache_disabled():
             return
 
         stitch_plan_cache = get_stitch_plan_cache()
-        cache_key = self.get_cache_key(previous_stitch, next_element)
+        cache_key = self.get_embroider_cache_key(previous_stitch, next_element)
+        encoded_stitch_groups = None
         if cache_key not in stitch_plan_cache:
             # fix up colors for cache
             for stitch_group in stitch_groups:
                 if not isinstance(stitch_group.color, Color):
                     stitch_group.color = "black"
-            stitch_plan_cache[cache_key] = stitch_groups
+            encoded_stitch_groups = stitch_groups_to_bytes(stitch_groups)
+            stitch_plan_cache[cache_key] = encoded_stitch_groups
 
         if previous_stitch is not None:
             # Also store it with None as the previous stitch, so that it can be used next time
             # if we don't care about the previous stitch
             cache_key = self.get_cache_key(None, None)
             if cache_key not in stitch_plan_cache:
-                stitch_plan_cache[cache_key] = stitch_groups
+                if encoded_stitch_groups is None:
+                    encoded_stitch_groups = stitch_groups_to_bytes(stitch_groups)
+                stitch_plan_cache[cache_key] = encoded_stitch_groups
 
     def get_params_and_values(self):
         params = {}
@@ -622,15 +730,15 @@ class EmbroideryElement(object):
 
         return params
 
-    @cache
+    @instance_cache
     def _get_patterns_cache_key_data(self):
         return get_patterns_cache_key_data(self.node)
 
-    @cache
+    @instance_cache
     def _get_guides_cache_key_data(self):
         return get_marker_elements_cache_key_data(self.node, "guide-line")
 
-    @cache
+    @instance_cache
     def _get_ripple_cache_key_data(self):
         return get_marker_elements_cache_key_data(self.node, "anchor-line")
 
@@ -652,23 +760,78 @@ class EmbroideryElement(object):
     def get_cache_key_data(self, previous_stitch, next_element):
         return []
 
+    @instance_cache
+    def get_fingerprint_components(self):
+        """Fingerprints of everything about this element that affects its stitches.
+
+        The neighbours of the element are not included, see
+        get_cache_key_components().  They are computed only once per element.
+        """
+
+        return {
+            'element_type': fingerprint(self.__class__.__name__),
+            'params': fingerprint(self.get_params_and_values()),
+            'path': fingerprint(self.parse_path()),
+            'clip': get_clip_fingerprint(self.node),
+            'style': fingerprint(self._get_specified_style()),
+            'gradient': fingerprint(self._get_gradient_cache_key_data()),
+            'commands': fingerprint([(c.command, c.target_point) for c in self.commands]),
+            'patterns': fingerprint(self._get_patterns_cache_key_data()),
+            'guides': fingerprint(self._get_guides_cache_key_data()),
+            'anchor_lines': fingerprint(self._get_ripple_cache_key_data()),
+            'tartan': fingerprint(self._get_tartan_key_data()),
+        }
+
+    @instance_cache
+    def get_fingerprint(self):
+        return fingerprint(list(self.get_fingerprint_components().values()))
+
+    def get_cache_key_components(self, previous_stitch, next_element) -> Dict[str, str]:
+        """Fingerprints of everything that goes into the cache key.
+
+        This is what get_cache_key() hashes, broken down so that we can tell
+        which part changed.
+        """
+
+        components = dict(self.get_fingerprint_components())
+        components['previous_stitch'] = fingerprint(previous_stitch)
+        components['next_element'] = next_element.get_cache_key(None, None) if next_element is not None else fingerprint(None)
+        components['element_data'] = fingerprint(self.get_cache_key_data(previous_stitch, next_element))
+
+        return components
+
     def get_cache_key(self, previous_stitch, next_element):
+        if previous_stitch is None and next_element is None:
+            # This is also used as part of the previous element's key, so
+            # make sure we only compute it once.
+            return self._get_cache_key_without_neighbours()
+
+        return self._get_cache_key(previous_stitch, next_element)
+
+    def get_embroider_cache_key(self, previous_stitch, next_element):
+        """The cache key that embroider() stores and looks up stitch groups with.
+
+        Neighbours that can't affect this element's stitches are left out.
+        """
+
+        if not self.uses_previous_stitch():
+            previous_stitch = None
+        if not self.uses_next_element():
+            next_element = None
+
+        return self.get_cache_key(previous_stitch, next_element)
+
+    @instance_cache
+    def _get_cache_key_without_neighbours(self):
+        return self._get_cache_key(None, None)
+
+    def _get_cache_key(self, previous_stitch, next_element):
         cache_key_generator = CacheKeyGenerator()
-        cache_key_generator.update(self.__class__.__name__)
-        cache_key_generator.update(self.get_params_and_values())
-        cache_key_generator.update(self.parse_path())
-        cache_key_generator.update(self.clip_shape)
-        cache_key_generator.update(list(self._get_specified_style().items()))
-        cache_key_generator.update(self._get_gradient_cache_key_data())
+        cache_key_generator.update(self.get_fingerprint())
         cache_key_generator.update(previous_stitch)
         if next_element is not None:
             cache_key_generator.update(next_element.get_cache_key(None, None))
-        cache_key_generator.update([(c.command, c.target_point) for c in self.commands])
-        cache_key_generator.update(self._get_patterns_cache_key_data())
-        cache_key_generator.update(self._get_guides_cache_key_data())
-        cache_key_generator.update(self._get_ripple_cache_key_data())
         cache_key_generator.update(self.get_cache_key_data(previous_stitch, next_element))
-        cache_key_generator.update(self._get_tartan_key_data())
 
         cache_key = cache_key_generator.get_cache_key()
         debug.log(f"cache key for {self.node.get('id')} {self.node.get(INKSCAPE_LABEL)} {previous_stitch} {next_element}: {cache_key}")
@@ -679,10 +842,7 @@ class EmbroideryElement(object):
         debug.log(f"starting {self.node.get('id')} {self.node.get(INKSCAPE_LABEL)}")
 
         with self.handle_unexpected_exceptions():
-            if last_stitch_group:
-                previous_stitch = last_stitch_group.stitches[-1]
-            else:
-                previous_stitch = None
+            previous_stitch = self._get_previous_stitch(last_stitch_group)
 
             stitch_groups = self._load_cached_stitch_groups(previous_stitch, next_element)
 
@@ -707,6 +867,24 @@ class EmbroideryElement(object):
         debug.log(f"ending {self.node.get('id')} {self.node.get(INKSCAPE_LABEL)}")
         return stitch_groups
 
+    def has_cached_stitch_groups(self, last_stitch_group: Optional[StitchGroup], next_element=None) -> bool:
+        """Returns True if embroider() will find the stitch groups in the cache."""
+
+        if is_cache_disabled():
+            return False
+
+        cache_key = self.get_embroider_cache_key(self._get_previous_stitch(last_stitch_group), next_element)
+        return cache_key in get_stitch_plan_cache()
+
+    @staticmethod
+    def _get_previous_stitch(last_stitch_group):
+        if last_stitch_group:
+            # Use a plain Stitch.  The last stitch group may have come from
+            # the cache, and the cache key must not depend on that.
+            return last_stitch_group.stitches[-1].copy()
+        else:
+            return None
+
     def next_stitch(self, next_element):
         next_stitch = None
         if next_element is not None and self.uses_next_element():
@@ -724,7 +902,7 @@ class EmbroideryElement(object):
         return next_stitch
 
     @property
-    @cache
+    @instance_cache(depends_on=['clip'])
     def clip_shape(self):
         return get_clip_path(self.node)
 
@@ -21,13 +21,17 @@ from ..stitch_plan import StitchGroup
 from ..stitches import (auto_fill, circular_fill, contour_fill, guided_fill,
                         legacy_fill, linear_gradient_fill, meander_fill,
                         tartan_fill)
+from ..stitches.auto_fill import prepare_auto_fill
+from ..stitches.sharded_auto_fill import sharded_auto_fill
 from ..stitches.linear_gradient_fill import gradient_angle
 from ..svg import PIXELS_PER_MM
 from ..svg.tags import INKSCAPE_LABEL
 from ..tartan.utils import get_tartan_settings, get_tartan_stripes
-from ..utils import cache
+from ..utils import prng
+from ..utils.cache import fingerprint, instance_cache
 from ..utils.geometry import ensure_multi_polygon
 from ..utils.param import ParamOption
+from ..utils.settings import global_settings
 from .element import EmbroideryElement, param
 from .validation import ValidationError, ValidationWarning
 
@@ -145,6 +149,12 @@ class FillStitch(EmbroideryElement):
     name = "FillStitch"
     element_name = _("FillStitch")
 
+    def __init__(self, *args, **kwargs):
+        super(FillStitch, self).__init__(*args, **kwargs)
+
+        # see prepare()
+        self._auto_fill_preparations = {}
+
     @property
     @param('auto_fill', _('Automatically routed fill stitching'), type='toggle', default=True, sort_index=1)
     def auto_fill(self):
@@ -282,6 +292,21 @@ class FillStitch(EmbroideryElement):
     def gap_fill_rows(self):
         return self.get_int_param('gap_fill_rows', 0)
 
+    @property
+    @param('strip_area_mm2',
+           _('Fill in strips of'),
+           tooltip=_('Split very large shapes into strips of about this area and fill them at the same time, underlay included. '
+                     'Uses the number of parallel embroidery processes set in the preferences. '
+                     'The top fill is not split with an end row spacing. 0 to disable.'),
+           unit='mm²',
+           type='float',
+           default=0,
+           sort_index=21,
+           select_items=[('fill_method', 'auto_fill')])
+    @instance_cache
+    def strip_area(self):
+        return max(self.get_float_param('strip_area_mm2', 0), 0) * PIXELS_PER_MM ** 2
+
     @property
     @param('angle',
            _('Angle of lines of stitches'),
@@ -291,7 +316,7 @@ class FillStitch(EmbroideryElement):
            sort_index=21,
            select_items=[('fill_method', 'auto_fill'), ('fill_method', 'legacy_fill')],
            default=0)
-    @cache
+    @instance_cache
     def angle(self):
         return math.radians(self.get_float_param('angle', 0))
 
@@ -304,7 +329,7 @@ class FillStitch(EmbroideryElement):
            sort_index=21,
            select_items=[('fill_method', 'tartan_fill')],
            default=-45)
-    @cache
+    @instance_cache
     def tartan_angle(self):
         return self.get_float_param('tartan_angle', -45)
 
@@ -550,7 +575,7 @@ class FillStitch(EmbroideryElement):
            select_items=[('fill_method', 'meander_fill')],
            default=0,
            sort_index=60)
-    @cache
+    @instance_cache
     def zigzag_spacing(self):
         return self.get_float_param("zigzag_spacing_mm", 0)
 
@@ -563,7 +588,7 @@ class FillStitch(EmbroideryElement):
            select_items=[('fill_method', 'meander_fill')],
            default=3,
            sort_index=61)
-    @cache
+    @instance_cache
     def zigzag_width(self):
         return self.get_float_param("zigzag_width_mm", 3)
 
@@ -604,7 +629,7 @@ class FillStitch(EmbroideryElement):
         type='float',
         default=0,
         sort_index=26)
-    @cache
+    @instance_cache
     def pull_compensation_px(self):
         return np.maximum(self.get_split_mm_param_as_px("pull_compensation_mm", (0, 0)), 0)
 
@@ -619,7 +644,7 @@ class FillStitch(EmbroideryElement):
         type='float',
         default=0,
         sort_index=27)
-    @cache
+    @instance_cache
     def pull_compensation_percent(self):
         return np.maximum(self.get_split_float_param("pull_compensation_percent", (0, 0)), 0)
 
@@ -635,7 +660,7 @@ class FillStitch(EmbroideryElement):
            unit='deg',
            group=_('Fill Underlay'),
            type='float')
-    @cache
+    @instance_cache
     def fill_underlay_angle(self):
         underlay_angles = self.get_param('fill_underlay_angle', None)
         default_value = [self.angle + math.pi / 2.0]
@@ -662,7 +687,7 @@ class FillStitch(EmbroideryElement):
            unit='mm',
            group=_('Fill Underlay'),
            type='float')
-    @cache
+    @instance_cache
     def fill_underlay_row_spacing(self):
         return self.get_float_param("fill_underlay_row_spacing_mm") or self.row_spacing * 3
 
@@ -672,7 +697,7 @@ class FillStitch(EmbroideryElement):
            tooltip=_('default: equal to fill max stitch length'),
            unit='mm',
            group=_('Fill Underlay'), type='float')
-    @cache
+    @instance_cache
     def fill_underlay_max_stitch_length(self):
         return self.get_float_param("fill_underlay_max_stitch_length_mm") or self.max_stitch_length
 
@@ -725,17 +750,34 @@ class FillStitch(EmbroideryElement):
            type='random_seed',
            default='',
            sort_index=100)
-    @cache
+    @instance_cache
     def random_seed(self) -> str:
         seed = self.get_param('random_seed', '')
         if not seed:
             seed = self.node.get_id() or ''
             # TODO(#1696): When inplementing grouped clones, join this with the IDs of any shadow roots,
             # letting each instance without a specified seed get a different default.
-        return seed
+        return prng.versioned_seed(seed, self.random_stream)
 
     @property
-    @cache
+    @param('random_stream',
+           _('Random number generator'),
+           tooltip=_('Fast is much quicker for heavily randomized elements, but it gives different random values than Legacy.'),
+           select_items=[('fill_method', 'auto_fill'),
+                         ('fill_method', 'contour_fill'),
+                         ('fill_method', 'guided_fill'),
+                         ('fill_method', 'circular_fill'),
+                         ('fill_method', 'meander_fill'),
+                         ('fill_method', 'linear_gradient_fill')],
+           type='combo',
+           options=EmbroideryElement._random_streams,
+           default=0,
+           sort_index=101)
+    def random_stream(self):
+        return self.get_random_stream()
+
+    @property
+    @instance_cache(depends_on=['parse_path'])
     def paths(self):
         paths = self.flatten(self.parse_path())
         # ensure path length
@@ -745,7 +787,7 @@ class FillStitch(EmbroideryElement):
         return paths
 
     @property
-    @cache
+    @instance_cache(depends_on=['paths'])
     def original_shape(self):
         # shapely's idea of "holes" are to subtract everything in the second set
         # from the first. So let's at least make sure the "first" thing is the
@@ -756,7 +798,7 @@ class FillStitch(EmbroideryElement):
         return shape
 
     @property
-    @cache
+    @instance_cache(depends_on=['original_shape', 'clip_shape'])
     def shape(self):
         shape = self._get_clipped_path()
 
@@ -798,12 +840,12 @@ class FillStitch(EmbroideryElement):
         return None
 
     @property
-    @cache
+    @instance_cache(depends_on=['shape'])
     def outline(self):
         return self.shape.boundary[0]
 
     @property
-    @cache
+    @instance_cache(depends_on=['outline'])
     def outline_length(self):
         return self.outline.length
 
@@ -865,6 +907,44 @@ class FillStitch(EmbroideryElement):
         else:
             return True
 
+    def get_cache_key_data(self, previous_stitch, next_element):
+        # CSRTravelGraph may pick a different one of several equally short travel paths.
+        if global_settings['csr_travel_routing']:
+            return ['csr_travel_routing']
+        return []
+
+    def prepare(self):
+        # Building the auto-fill graphs takes most of the time, and it doesn't
+        # depend on where the fill starts and ends.
+        return {fingerprint(args): prepare_auto_fill(*args) for args in self._auto_fill_arguments()}
+
+    def use_preparation(self, preparation):
+        self._auto_fill_preparations = preparation
+
+    def _auto_fill_arguments(self):
+        """The arguments to prepare_auto_fill() for each call to auto_fill() in to_stitch_groups()."""
+
+        for shape in self.shape.geoms:
+            if self.fill_underlay and not self.fill_method == 'legacy_fill':
+                for underlay_shape in self.underlay_shape(shape).geoms:
+                    if self._underlay_in_strips(underlay_shape):
+                        continue
+                    for angle in self.fill_underlay_angle:
+                        yield (underlay_shape, angle, self.fill_underlay_row_spacing, self.fill_underlay_row_spacing,
+                               self.underlay_underpath)
+
+            if self.auto_fill and self.fill_method == 'auto_fill':
+                for fill_shape in self.fill_shape(shape).geoms:
+                    if self._fill_in_strips(fill_shape):
+                        # sharded_auto_fill() does the whole work in worker processes
+                        continue
+                    yield (fill_shape, self.angle, self.row_spacing, self.end_row_spacing, self.underpath,
+                           self.pull_compensation_px, self.pull_compensation_percent / 100)
+
+    def _get_auto_fill_preparation(self, *args):
+        # auto_fill() uses up the preparation, so we can only hand it out once.
+        return self._auto_fill_preparations.pop(fingerprint(args), None)
+
     def to_stitch_groups(self, previous_stitch_group, next_element=None):  # noqa: C901
         # backwards compatibility: legacy_fill used to be inkstitch:auto_fill == False
         stitch_groups = []
@@ -968,30 +1048,63 @@ class FillStitch(EmbroideryElement):
                 color = Color('black')
 
         stitch_groups = []
-        for i in range(len(self.fill_underlay_angle)):
+        for angle in self.fill_underlay_angle:
             underlay = StitchGroup(
                 color=color,
                 tags=("auto_fill", "auto_fill_underlay"),
                 lock_stitches=self.lock_stitches,
-                stitches=auto_fill(
-                    shape,
-                    self.fill_underlay_angle[i],
-                    self.fill_underlay_row_spacing,
-                    self.fill_underlay_row_spacing,
-                    self.fill_underlay_max_stitch_length,
-                    self.running_stitch_length,
-                    self.running_stitch_tolerance,
-                    self.staggers,
-                    self.fill_underlay_skip_last,
-                    starting_point,
-                    underpath=self.underlay_underpath
-                )
+                stitches=self._underlay_stitches(shape, angle, starting_point)
             )
             stitch_groups.append(underlay)
             starting_point = underlay.stitches[-1]
         return [stitch_groups, starting_point]
 
+    def _underlay_stitches(self, shape, angle, starting_point):
+        if self._underlay_in_strips(shape):
+            return sharded_auto_fill(
+                shape,
+                angle,
+                self.fill_underlay_row_spacing,
+                self.strip_area,
+                global_settings['embroidery_processes'],
+                self.running_stitch_length,
+                self.running_stitch_tolerance,
+                starting_point,
+                end_row_spacing=self.fill_underlay_row_spacing,
+                max_stitch_length=self.fill_underlay_max_stitch_length,
+                staggers=self.staggers,
+                skip_last=self.fill_underlay_skip_last,
+                underpath=self.underlay_underpath
+            )
+
+        return auto_fill(
+            shape,
+            angle,
+            self.fill_underlay_row_spacing,
+            self.fill_underlay_row_spacing,
+            self.fill_underlay_max_stitch_length,
+            self.running_stitch_length,
+            self.running_stitch_tolerance,
+            self.staggers,
+            self.fill_underlay_skip_last,
+            starting_point,
+            underpath=self.underlay_underpath,
+            preparation=self._get_auto_fill_preparation(shape, angle, self.fill_underlay_row_spacing,
+                                                        self.fill_underlay_row_spacing, self.underlay_underpath)
+        )
+
+    def _fill_in_strips(self, shape):
+        return self.strip_area and not self.end_row_spacing and shape.area > self.strip_area
+
+    def _underlay_in_strips(self, shape):
+        # The underlay rows are evenly spaced even if the top fill has an end
+        # row spacing.  Strips are only offered for auto-fill.
+        return self.fill_method == 'auto_fill' and self.strip_area and shape.area > self.strip_area
+
     def do_auto_fill(self, shape, starting_point, ending_point):
+        if self._fill_in_strips(shape):
+            return self.do_sharded_auto_fill(shape, starting_point, ending_point)
+
         stitch_group = StitchGroup(
             color=self.color,
             tags=("auto_fill", "auto_fill_top"),
@@ -1016,6 +1129,39 @@ class FillStitch(EmbroideryElement):
                 self.random_seed,
                 self.pull_compensation_px,
                 self.pull_compensation_percent / 100,
+                self._get_auto_fill_preparation(shape, self.angle, self.row_spacing, self.end_row_spacing, self.underpath,
+                                                self.pull_compensation_px, self.pull_compensation_percent / 100)
+            )
+        )
+        return [stitch_group]
+
+    def do_sharded_auto_fill(self, shape, starting_point, ending_point):
+        stitch_group = StitchGroup(
+            color=self.color,
+            tags=("auto_fill", "auto_fill_top"),
+            force_lock_stitches=self.force_lock_stitches,
+            lock_stitches=self.lock_stitches,
+            stitches=sharded_auto_fill(
+                shape,
+                self.angle,
+                self.row_spacing,
+                self.strip_area,
+                global_settings['embroidery_processes'],
+                self.running_stitch_length,
+                self.running_stitch_tolerance,
+                starting_point,
+                ending_point,
+                self.random_seed,
+                end_row_spacing=self.end_row_spacing,
+                max_stitch_length=self.max_stitch_length,
+                staggers=self.staggers,
+                skip_last=self.skip_last,
+                underpath=self.underpath,
+                gap_fill_rows=self.gap_fill_rows,
+                enable_random_stitch_length=self.enable_random_stitch_length,
+                random_sigma=self.random_stitch_length_jitter,
+                pull_compensation_px=self.pull_compensation_px,
+                pull_compensation_percent=self.pull_compensation_percent / 100
             )
         )
         return [stitch_group]
@@ -1107,7 +1253,7 @@ class FillStitch(EmbroideryElement):
         )
         return [stitch_group]
 
-    @cache
+    @instance_cache
     def _get_guide_lines(self, multiple=False):
         guide_lines = get_marker_elements(self.node, "guide-line", False, True)
         # No or empty guide line
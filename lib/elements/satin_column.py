@@ -22,7 +22,9 @@ from ..stitch_plan import Stitch, StitchGroup
 from ..stitches import running_stitch
 from ..svg import line_strings_to_coordinate_lists
 from ..svg.styles import get_join_style_args
-from ..utils import Point, cache, cut, cut_multiple, offset_points, prng
+from ..utils import Point, cut, cut_multiple, offset_points, prng
+from ..utils.cache import instance_cache
+from ..utils.geometry import ArcLengthPath, offset_point_arrays
 from ..utils.param import ParamOption
 from ..utils.threading import check_stop_flag
 from .element import PIXELS_PER_MM, EmbroideryElement, param
@@ -132,7 +134,7 @@ class SatinColumn(EmbroideryElement):
            tooltip=_('shorten stitch across rails at most this percent. '
                      'Two values separated by a space may be used for an asymmetric effect.'),
            default=0, type='float', unit=_("% (each side)"), sort_index=91)
-    @cache
+    @instance_cache
     def random_width_decrease(self):
         return self.get_split_float_param("random_width_decrease_percent", (0, 0)) / 100
 
@@ -142,7 +144,7 @@ class SatinColumn(EmbroideryElement):
            tooltip=_('lengthen stitch across rails at most this percent. '
                      'Two values separated by a space may be used for an asymmetric effect.'),
            default=0, type='float', unit=_("% (each side)"), sort_index=90)
-    @cache
+    @instance_cache
     def random_width_increase(self):
         return self.get_split_float_param("random_width_increase_percent", (0, 0)) / 100
 
@@ -271,7 +273,7 @@ class SatinColumn(EmbroideryElement):
         type='float',
         default=0,
         sort_index=6)
-    @cache
+    @instance_cache
     def pull_compensation_percent(self):
         # pull compensation as a percentage of the width
         return self.get_split_float_param("pull_compensation_percent", (0, 0))
@@ -287,7 +289,7 @@ class SatinColumn(EmbroideryElement):
         type='float',
         default=0,
         sort_index=7)
-    @cache
+    @instance_cache
     def pull_compensation_px(self):
         # In satin stitch, the stitches have a tendency to pull together and
         # narrow the entire column.  We can compensate for this by stitching
@@ -450,7 +452,7 @@ class SatinColumn(EmbroideryElement):
            type='float',
            default=0.4,
            sort_index=2)
-    @cache
+    @instance_cache
     def contour_underlay_inset_px(self):
         # how far inside the edge of the column to stitch the underlay
         return self.get_split_mm_param_as_px("contour_underlay_inset_mm", (0.4, 0.4))
@@ -463,7 +465,7 @@ class SatinColumn(EmbroideryElement):
            group=_('Contour Underlay'),
            unit=_('% (each side)'), type='float', default=0,
            sort_index=3)
-    @cache
+    @instance_cache
     def contour_underlay_inset_percent(self):
         # how far inside the edge of the column to stitch the underlay
         return self.get_split_float_param("contour_underlay_inset_percent", (0, 0))
@@ -564,7 +566,7 @@ class SatinColumn(EmbroideryElement):
            group=_('Zig-zag Underlay'),
            type='float',
            default="")
-    @cache
+    @instance_cache
     def zigzag_underlay_inset_percent(self):
         default = self.contour_underlay_inset_percent * 0.5
         return self.get_split_float_param("zigzag_underlay_inset_percent", default)
@@ -587,17 +589,28 @@ class SatinColumn(EmbroideryElement):
            type='random_seed',
            default='',
            sort_index=100)
-    @cache
+    @instance_cache
     def random_seed(self) -> str:
         seed = self.get_param('random_seed', '')
         if not seed:
             seed = self.node.get_id() or ''
             # TODO(#1696): When inplementing grouped clones, join this with the IDs of any shadow roots,
             # letting each instance without a specified seed get a different default.
-        return seed
+        return prng.versioned_seed(seed, self.random_stream)
 
     @property
-    @cache
+    @param('random_stream',
+           _('Random number generator'),
+           tooltip=_('Fast is much quicker for heavily randomized elements, but it gives different random values than Legacy.'),
+           type='combo',
+           options=EmbroideryElement._random_streams,
+           default=0,
+           sort_index=101)
+    def random_stream(self):
+        return self.get_random_stream()
+
+    @property
+    @instance_cache
     def shape(self):
         # This isn't used for satins at all, but other parts of the code
         # may need to know the general shape of a satin column.
@@ -605,7 +618,7 @@ class SatinColumn(EmbroideryElement):
         return shgeo.MultiLineString(self.line_string_rails)
 
     @property
-    @cache
+    @instance_cache
     def compensated_shape(self):
         pairs = self.plot_points_on_rails(
             self.zigzag_spacing,
@@ -622,7 +635,7 @@ class SatinColumn(EmbroideryElement):
         return shgeo.MultiLineString((rail1, rail2))
 
     @property
-    @cache
+    @instance_cache
     def filtered_subpaths(self):
         paths = [path for path in self.paths if len(path) > 1]
         if len(paths) == 1:
@@ -636,7 +649,7 @@ class SatinColumn(EmbroideryElement):
         return paths
 
     @property
-    @cache
+    @instance_cache
     def rails(self):
         """The rails in order, as point lists"""
         rails = [subpath for i, subpath in enumerate(self.filtered_subpaths) if i in self.rail_indices]
@@ -646,7 +659,7 @@ class SatinColumn(EmbroideryElement):
             return rails
 
     @property
-    @cache
+    @instance_cache
     def line_string_rails(self):
         """The rails, as LineStrings."""
         paths = [set_precision(shgeo.LineString(rail), 0.00001) for rail in self.rails]
@@ -664,13 +677,13 @@ class SatinColumn(EmbroideryElement):
         return tuple(paths)
 
     @property
-    @cache
+    @instance_cache
     def line_string_rungs(self):
         """The rungs as LineStrings"""
         return tuple(shgeo.LineString(rung) for rung in self.rungs)
 
     @property
-    @cache
+    @instance_cache
     def rungs(self):
         """The rungs, as point lists.
 
@@ -685,7 +698,7 @@ class SatinColumn(EmbroideryElement):
         else:
             return [subpath for i, subpath in enumerate(self.filtered_subpaths) if i not in self.rail_indices]
 
-    @cache
+    @instance_cache
     def _synthesize_rungs(self):
         rung_endpoints = []
         # check for unequal length of rails
@@ -718,7 +731,7 @@ class SatinColumn(EmbroideryElement):
         return rungs
 
     @property
-    @cache
+    @instance_cache
     def rail_indices(self):
         paths = [shgeo.LineString(path) for path in self.filtered_subpaths if len(path) > 1]
         num_paths = len(paths)
@@ -772,13 +785,13 @@ class SatinColumn(EmbroideryElement):
             return indices_by_length[:2]
 
     @property
-    @cache
+    @instance_cache
     def min_stitch_len(self):
         metadata = InkStitchMetadata(self.node.root)
         return metadata['min_stitch_len_mm'] * PIXELS_PER_MM
 
     @property
-    @cache
+    @instance_cache
     def flattened_sections(self):
         """Flatten the rails, cut with the rungs, and return the sections in pairs."""
 
@@ -1102,7 +1115,7 @@ class SatinColumn(EmbroideryElement):
         return filtered_rungs
 
     @property
-    @cache
+    @instance_cache
     def center_line(self):
         # similar technique to do_center_walk()
         center_walk = [p[0] for p in self.plot_points_on_rails(self.zigzag_spacing, (0, 0), (-0.5, -0.5))]
@@ -1111,7 +1124,7 @@ class SatinColumn(EmbroideryElement):
         return shgeo.LineString(center_walk)
 
     @property
-    @cache
+    @instance_cache
     def offset_center_line(self):
         stitches = self._get_center_line_stitches(self.running_stitch_position)
         linestring = shgeo.LineString(stitches)
@@ -1158,22 +1171,47 @@ class SatinColumn(EmbroideryElement):
                              ) -> typing.List[typing.Tuple[Point, Point]]:
         # Take a section from each rail in turn, and plot out an equal number
         # of points on both rails.  Return the points plotted. The points will
-        # be contracted or expanded by offset using self.offset_points().
+        # be contracted or expanded by offset using offset_point_arrays().
+
+        use_random = use_random and self._has_random_points
+        points0, points1, rolls = self._get_points_on_rails(spacing, use_random)
+
+        if use_random:
+            offset_proportional = (np.array(offset_proportional) - self.random_width_decrease +
+                                   rolls * (self.random_width_increase + self.random_width_decrease))
+        points0, points1 = offset_point_arrays(points0, points1, offset_px, offset_proportional)
+
+        return [(Point(*pos0), Point(*pos1)) for pos0, pos1 in zip(points0.tolist(), points1.tolist())]
+
+    @property
+    def _has_random_points(self):
+        # Without any random amounts, the random rolls don't change anything.
+        return bool(np.any(self.random_width_decrease) or np.any(self.random_width_increase) or self.random_zigzag_spacing)
+
+    @property
+    @instance_cache
+    def _rail_paths(self):
+        return [(ArcLengthPath(section0), ArcLengthPath(section1)) for section0, section1 in self.flattened_sections]
 
-        processor = SatinProcessor(self, offset_px, offset_proportional, use_random)
+    @instance_cache
+    def _get_points_on_rails(self, spacing, use_random):
+        # The points don't depend on the offsets, so the underlays and the top
+        # layer share them where they use the same spacing.  Returns the points
+        # on each rail as an array, along with an array of the random rolls for
+        # the width of each pair if use_random is set.
+
+        processor = SatinProcessor(self, use_random)
 
         pairs = []
 
-        for i, (section0, section1) in enumerate(self.flattened_sections):
+        for i, ((section0, section1), (path0, path1)) in enumerate(zip(self.flattened_sections, self._rail_paths)):
             check_stop_flag()
 
             if i == 0:
                 old_pos0 = section0[0]
                 old_pos1 = section1[0]
-                pairs.append(processor.process_points(old_pos0, old_pos1))
-
-            path0 = shgeo.LineString(section0)
-            path1 = shgeo.LineString(section1)
+                pairs.append((old_pos0, old_pos1))
+                processor.roll_width()
 
             # Base the number of stitches in each section on the _longer_ of
             # the two sections. Otherwise, things could get too sparse when one
@@ -1197,10 +1235,11 @@ class SatinColumn(EmbroideryElement):
 
             cursor = 0
             iterations = 0
+            batch = None
+            steady = False
             while cursor + to_travel <= 1:
                 iterations += 1
-                pos0 = Point.from_shapely_point(path0.interpolate(cursor + to_travel, normalized=True))
-                pos1 = Point.from_shapely_point(path1.interpolate(cursor + to_travel, normalized=True))
+                pos0, pos1, batch = self._next_points_on_rails(path0, path1, cursor, to_travel, batch, steady and not use_random)
 
                 # If the rails are parallel, then our stitch spacing will be
                 # perfect.  If the rails are coming together or spreading apart,
@@ -1245,8 +1284,11 @@ class SatinColumn(EmbroideryElement):
                             # first try. If we've gone too far, we want to have
                             # a chance to correct.
                             to_travel = min(to_travel, 1 - cursor)
+                        steady = False
+                        batch = None
                         continue
 
+                steady = iterations == 1
                 cursor += to_travel
                 spacing_multiple = processor.get_stitch_spacing_multiple()
                 to_travel = section_stitch_spacing * spacing_multiple
@@ -1254,16 +1296,34 @@ class SatinColumn(EmbroideryElement):
 
                 old_pos0 = pos0
                 old_pos1 = pos1
-                pairs.append(processor.process_points(pos0, pos1))
+                pairs.append((pos0, pos1))
+                processor.roll_width()
                 iterations = 0
 
         # Add one last stitch at the end unless our previous stitch is already
         # really close to the end.
         if pairs and section0 and section1:
             if self._stitch_distance(section0[-1], section1[-1], old_pos0, old_pos1) > 0.1 * PIXELS_PER_MM:
-                pairs.append(processor.process_points(section0[-1], section1[-1]))
-
-        return pairs
+                pairs.append((section0[-1], section1[-1]))
+                processor.roll_width()
+
+        points = np.array([(pos.x, pos.y) for pair in pairs for pos in pair], dtype=float).reshape(-1, 2, 2)
+        return points[:, 0], points[:, 1], processor.get_width_rolls()
+
+    def _next_points_on_rails(self, path0, path1, cursor, to_travel, batch, use_batch):
+        # Without random spacing, every stitch on a stretch of rails that needs
+        # no corrections is section_stitch_spacing after the last one, so we
+        # look those up in batches.  Returns the points at cursor + to_travel
+        # and the batch to take the next points from.
+        if batch is not None and batch.has_next(cursor + to_travel):
+            return (*batch.next(), batch)
+        elif use_batch and (1 - cursor) / to_travel >= _RailBatch.MIN_SIZE:
+            batch = _RailBatch(path0, path1, cursor, to_travel)
+            return (*batch.next(), batch)
+        else:
+            pos0 = path0.interpolate(cursor + to_travel, normalized=True)
+            pos1 = path1.interpolate(cursor + to_travel, normalized=True)
+            return pos0, pos1, batch
 
     def _connect_stitch_group_with_point(self, first_stitch_group, start_point, end_point=None):
         start_stitch_group = StitchGroup(
@@ -1922,35 +1982,54 @@ class SatinColumn(EmbroideryElement):
         return [stitch_group]
 
 
+class _RailBatch:
+    """Points on both rails at evenly spaced distances, looked up at once."""
+
+    MIN_SIZE = 8
+    SIZE = 64
+
+    def __init__(self, path0, path1, cursor, spacing):
+        count = min(self.SIZE, int((1 - cursor) / spacing) + 1)
+        # Add up the spacing one at a time, like plot_points_on_rails() moves
+        # its cursor, so that the distances are exactly the same.
+        self.distances = np.cumsum(np.concatenate(([cursor], np.full(count, spacing))))[1:].tolist()
+        self.points0 = path0.interpolate_many(self.distances, normalized=True).tolist()
+        self.points1 = path1.interpolate_many(self.distances, normalized=True).tolist()
+        self.index = 0
+
+    def has_next(self, distance):
+        return self.index < len(self.distances) and self.distances[self.index] == distance
+
+    def next(self):
+        pos0 = Point(*self.points0[self.index])
+        pos1 = Point(*self.points1[self.index])
+        self.index += 1
+        return pos0, pos1
+
+
 class SatinProcessor:
-    def __init__(self, satin, offset_px, offset_proportional, use_random):
-        self.satin = satin
+    def __init__(self, satin, use_random):
         self.use_random = use_random
-        self.offset_px = offset_px
-        self.offset_proportional = offset_proportional
         self.random_zigzag_spacing = satin.random_zigzag_spacing
 
         if use_random:
-            self.seed = prng.join_args(satin.random_seed, "satin-points")
-            self.offset_proportional_min = np.array(offset_proportional) - satin.random_width_decrease
-            self.offset_range = (satin.random_width_increase + satin.random_width_decrease)
-            self.cycle = 0
+            self.rolls = prng.iter_rolls(satin.random_seed, "satin-points")
+            self.width_rolls = []
 
-    def process_points(self, pos0, pos1):
+    def roll_width(self):
+        # Each pair of points gets a roll for its width, taken in turn with
+        # the rolls for the spacing.
         if self.use_random:
-            roll = prng.uniform_floats(self.seed, self.cycle)
-            self.cycle += 1
-            offset_prop = self.offset_proportional_min + roll[0:2] * self.offset_range
-        else:
-            offset_prop = self.offset_proportional
+            self.width_rolls.append(next(self.rolls)[0:2])
 
-        a, b = offset_points(pos0, pos1, self.offset_px, offset_prop)
-        return a, b
+    def get_width_rolls(self):
+        if self.use_random:
+            return np.array(self.width_rolls, dtype=float).reshape(-1, 2)
+        return None
 
     def get_stitch_spacing_multiple(self):
         if self.use_random:
-            roll = prng.uniform_floats(self.seed, self.cycle)
-            self.cycle += 1
+            roll = next(self.rolls)
             return max(1.0 + ((roll[0] - 0.5) * 2) * self.random_zigzag_spacing, 0.01)
         else:
             return 1.0
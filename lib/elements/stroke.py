@@ -16,7 +16,8 @@ from ..stitches.running_stitch import (bean_stitch, running_stitch,
                                        zigzag_stitch)
 from ..svg import parse_length_with_units
 from ..threads import ThreadColor
-from ..utils import Point, cache
+from ..utils import Point, prng
+from ..utils.cache import instance_cache
 from ..utils.param import ParamOption
 from .element import EmbroideryElement, param
 from .validation import ValidationWarning
@@ -189,7 +190,7 @@ class Stroke(EmbroideryElement):
            default=0.4,
            select_items=[('stroke_method', 'zigzag_stitch')],
            sort_index=6)
-    @cache
+    @instance_cache
     def zigzag_spacing(self):
         return max(self.get_float_param("zigzag_spacing_mm", 0.4), 0.01)
 
@@ -203,7 +204,7 @@ class Stroke(EmbroideryElement):
            default=0,
            select_items=[('stroke_method', 'zigzag_stitch')],
            sort_index=6)
-    @cache
+    @instance_cache
     def pull_compensation(self):
         return self.get_split_mm_param_as_px("stroke_pull_compensation_mm", (0, 0))
 
@@ -215,7 +216,7 @@ class Stroke(EmbroideryElement):
            default=10,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=7)
-    @cache
+    @instance_cache
     def line_count(self):
         return max(self.get_int_param("line_count", 10), 1)
 
@@ -227,7 +228,7 @@ class Stroke(EmbroideryElement):
            type='float',
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=8)
-    @cache
+    @instance_cache
     def min_line_dist(self):
         min_dist = self.get_float_param("min_line_dist_mm")
         if min_dist is None:
@@ -274,7 +275,7 @@ class Stroke(EmbroideryElement):
            default=0,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=16)
-    @cache
+    @instance_cache
     def skip_start(self):
         return abs(self.get_int_param("skip_start", 0))
 
@@ -286,7 +287,7 @@ class Stroke(EmbroideryElement):
            default=0,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=17)
-    @cache
+    @instance_cache
     def skip_end(self):
         return abs(self.get_int_param("skip_end", 0))
 
@@ -309,7 +310,7 @@ class Stroke(EmbroideryElement):
            default=1,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=19)
-    @cache
+    @instance_cache
     def exponent(self):
         return max(self.get_float_param("exponent", 1), 0.1)
 
@@ -321,7 +322,7 @@ class Stroke(EmbroideryElement):
            default=False,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=20)
-    @cache
+    @instance_cache
     def flip_exponent(self):
         return self.get_boolean_param("flip_exponent", False)
 
@@ -333,7 +334,7 @@ class Stroke(EmbroideryElement):
            default=False,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=21)
-    @cache
+    @instance_cache
     def reverse(self):
         return self.get_boolean_param("reverse", False)
 
@@ -367,7 +368,7 @@ class Stroke(EmbroideryElement):
            unit='mm',
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=23)
-    @cache
+    @instance_cache
     def grid_size(self):
         return abs(self.get_float_param("grid_size_mm", 0))
 
@@ -379,7 +380,7 @@ class Stroke(EmbroideryElement):
            default=False,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=24)
-    @cache
+    @instance_cache
     def grid_first(self):
         return self.get_boolean_param("grid_first", False)
 
@@ -428,7 +429,7 @@ class Stroke(EmbroideryElement):
            default=True,
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=30)
-    @cache
+    @instance_cache
     def rotate_ripples(self):
         return self.get_boolean_param("rotate_ripples", True)
 
@@ -441,7 +442,7 @@ class Stroke(EmbroideryElement):
            options=(_("flat"), _("point")),
            select_items=[('stroke_method', 'ripple_stitch')],
            sort_index=31)
-    @cache
+    @instance_cache
     def join_style(self):
         return self.get_int_param('join_style', 0)
 
@@ -454,17 +455,30 @@ class Stroke(EmbroideryElement):
            type='random_seed',
            default='',
            sort_index=100)
-    @cache
+    @instance_cache
     def random_seed(self) -> str:
         seed = self.get_param('random_seed', '')
         if not seed:
             seed = self.node.get_id() or ''
             # TODO(#1696): When inplementing grouped clones, join this with the IDs of any shadow roots,
             # letting each instance without a specified seed get a different default.
-        return seed
+        return prng.versioned_seed(seed, self.random_stream)
 
     @property
-    @cache
+    @param('random_stream',
+           _('Random number generator'),
+           tooltip=_('Fast is much quicker for heavily randomized elements, but it gives different random values than Legacy.'),
+           select_items=[('stroke_method', 'running_stitch'),
+                         ('stroke_method', 'ripple_stitch')],
+           type='combo',
+           options=EmbroideryElement._random_streams,
+           default=0,
+           sort_index=101)
+    def random_stream(self):
+        return self.get_random_stream()
+
+    @property
+    @instance_cache
     def is_closed(self):
         # returns true if the outline of a single line stroke is a closed shape
         # (with a small tolerance)
@@ -502,11 +516,11 @@ class Stroke(EmbroideryElement):
             return flattened
 
     @property
-    @cache
+    @instance_cache(depends_on=['as_multi_line_string'])
     def shape(self):
         return self.as_multi_line_string().convex_hull
 
-    @cache
+    @instance_cache(depends_on=['parse_path', 'clip_shape', 'stroke_method'])
     def as_multi_line_string(self):
         line_strings = [shgeo.LineString(path) for path in self.paths if len(path) > 1]
         return shgeo.MultiLineString(line_strings)
@@ -652,7 +666,7 @@ class Stroke(EmbroideryElement):
 
         return stitch_groups
 
-    @cache
+    @instance_cache
     def get_guide_line(self):
         guide_lines = get_marker_elements(self.node, "guide-line", False, True, True)
         # No or empty guide line
@@ -666,7 +680,7 @@ class Stroke(EmbroideryElement):
             return guide_lines['satin'][0]
         return guide_lines['stroke'][0]
 
-    @cache
+    @instance_cache
     def get_anchor_line(self):
         anchor_lines = get_marker_elements(self.node, "anchor-line", False, True, False)
         # No or empty guide line
@@ -0,0 +1,144 @@
+# Authors: see git history
+#
+# Copyright (c) 2026 Authors
+# Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
+
+import multiprocessing
+from typing import Any, List, Optional, Tuple
+
+from ...debug.debug import debug
+from ...stitch_plan import StitchGroup
+from ...utils.settings import global_settings
+from ...utils.threading import can_fork
+from ..element import EmbroideryElement
+
+# The elements being embroidered in parallel.  Worker processes are forked,
+# so they inherit this and we only need to send them indices.
+_elements: List[EmbroideryElement] = []
+
+
+def embroider_elements(elements: List[EmbroideryElement]) -> List[StitchGroup]:
+    """Embroider elements in stacking order and return all stitch groups.
+
+    Each element gets the last stitch group before it and the element after
+    it.  Only elements that use the previous stitch actually depend on the
+    elements before them, so the elements are split into runs that start with
+    an element that doesn't.  The runs are independent and are embroidered in
+    parallel if the embroidery_processes setting allows it.
+
+    The elements in the first run, which we embroider ourselves, still have
+    to wait for each other.  Meanwhile, worker processes do the part of their
+    work that doesn't depend on the elements before them (see
+    EmbroideryElement.prepare()).
+
+    The result is the same as embroidering one element after the other.
+    """
+
+    runs = embroidery_runs(elements)
+    processes = global_settings['embroidery_processes']
+    preparable = _preparable_elements(elements, runs[0]) if runs else []
+
+    if processes < 2 or (len(runs) < 2 and not preparable) or not can_fork():
+        return _embroider_run(elements, 0, len(elements), None)
+
+    return _embroider_in_parallel(elements, runs, preparable, processes)
+
+
+def embroidery_runs(elements: List[EmbroideryElement]) -> List[Tuple[int, int]]:
+    """Split elements into runs that don't depend on the elements before them.
+
+    Returns a list of (start, end) index pairs.
+    """
+
+    runs = []
+    start = 0
+    for i, element in enumerate(elements):
+        if i > start and not element.uses_previous_stitch():
+            runs.append((start, i))
+            start = i
+
+    if elements:
+        runs.append((start, len(elements)))
+
+    return runs
+
+
+def _preparable_elements(elements, run):
+    # The first element of the run doesn't need to wait for anything.
+    return [i for i in range(run[0] + 1, run[1])
+            if type(elements[i]).prepare is not EmbroideryElement.prepare]
+
+
+def _embroider_in_parallel(elements, runs, preparable, processes):
+    global _elements
+
+    _elements = elements
+    try:
+        with multiprocessing.get_context('fork').Pool(processes) as pool:
+            # We'll need the preparations first, so queue them up first.
+            preparations = {i: pool.apply_async(_prepare_in_worker, (i,)) for i in preparable}
+
+            # the first run starts at the beginning, so we just do it ourselves meanwhile
+            results = {run: pool.apply_async(_embroider_run_in_worker, run) for run in runs[1:]}
+
+            stitch_groups: List[StitchGroup] = []
+            for run in runs:
+                run_stitch_groups = None
+                if run in results:
+                    run_stitch_groups = results[run].get()
+
+                if run_stitch_groups is None:
+                    # Either an error occurred or the run needs a stitch
+                    # group from before it.  Do it here so that errors are
+                    # reported as usual.
+                    last_stitch_group = stitch_groups[-1] if stitch_groups else None
+                    run_stitch_groups = _embroider_run(elements, run[0], run[1], last_stitch_group, preparations=preparations)
+
+                stitch_groups.extend(run_stitch_groups)
+    finally:
+        _elements = []
+
+    return stitch_groups
+
+
+def _prepare_in_worker(index: int) -> Any:
+    try:
+        return _elements[index].prepare()
+    except BaseException:
+        # The element will do the work itself and report the error if
+        # there is one.
+        debug.log_exception()
+        return None
+
+
+def _embroider_run_in_worker(start: int, end: int) -> Optional[List[StitchGroup]]:
+    try:
+        return _embroider_run(_elements, start, end, None, independent=True)
+    except BaseException:
+        # Exceptions like SystemExit would take down the worker and leave us
+        # waiting forever.
+        debug.log_exception()
+        return None
+
+
+def _embroider_run(elements, start, end, last_stitch_group, independent=False, preparations=None):
+    stitch_groups = []
+    for i in range(start, end):
+        element = elements[i]
+        if independent and i > start and last_stitch_group is None and element.uses_previous_stitch():
+            # The elements before this one in the run didn't produce any
+            # stitches, so the previous stitch comes from an earlier run.
+            return None
+
+        next_element = elements[i + 1] if i + 1 < len(elements) else None
+        if preparations and i in preparations and not element.has_cached_stitch_groups(last_stitch_group, next_element):
+            preparation = preparations[i].get()
+            if preparation is not None:
+                element.use_preparation(preparation)
+
+        element_stitch_groups = element.embroider(last_stitch_group, next_element)
+        stitch_groups.extend(element_stitch_groups)
+        if element_stitch_groups:
+            last_stitch_group = element_stitch_groups[-1]
+
+    return stitch_groups
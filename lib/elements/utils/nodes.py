@@ -3,21 +3,20 @@
 # Copyright (c) 2010 Authors
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from inkex import BaseElement
 from lxml.etree import Comment
 
 from ...commands import is_command, layer_commands
 from ...debug.debug import sew_stack_enabled
-from ...marker import has_marker
 from ...svg import PIXELS_PER_MM
 from ...svg.tags import (CONNECTOR_TYPE, EMBROIDERABLE_TAGS,
                          INKSCAPE_GROUPMODE, NOT_EMBROIDERABLE_TAGS,
                          SVG_CLIPPATH_TAG, SVG_DEFS_TAG, SVG_GROUP_TAG,
                          SVG_IMAGE_TAG, SVG_MASK_TAG, SVG_TEXT_TAG)
 from ..clone import Clone, is_clone
-from ..element import EmbroideryElement
+from ..element import EmbroideryElement, NodeContext
 from ..empty_d_object import EmptyDObject
 from ..fill_stitch import FillStitch
 from ..image import ImageObject
@@ -27,34 +26,37 @@ from ..stroke import Stroke
 from ..text import TextObject
 
 
-def node_to_elements(node, clone_to_element=False) -> List[EmbroideryElement]:  # noqa: C901
+def node_to_elements(node, clone_to_element=False, context=None) -> List[EmbroideryElement]:  # noqa: C901
     if node.style('display') == 'none':
         return []
+    if context is None:
+        context = NodeContext(node)
+
     if is_clone(node) and not clone_to_element:
         # clone_to_element: get an actual embroiderable element once a clone has been defined as a clone
-        return [Clone(node)]
+        return [Clone(node, context)]
 
     elif node.tag in EMBROIDERABLE_TAGS and not node.get_path():
-        return [EmptyDObject(node)]
+        return [EmptyDObject(node, context)]
 
-    elif has_marker(node):
-        return [MarkerObject(node)]
+    elif context.has_marker:
+        return [MarkerObject(node, context)]
 
     elif node.tag in EMBROIDERABLE_TAGS or is_clone(node):
         elements: List[EmbroideryElement] = []
 
         from ...sew_stack import SewStack
-        sew_stack = SewStack(node)
+        sew_stack = SewStack(node, context)
 
         if not sew_stack.sew_stack_only:
-            element = EmbroideryElement(node)
+            element = EmbroideryElement(node, context)
             if element.fill_color is not None and not element.get_style('fill-opacity', 1) == "0":
-                elements.append(FillStitch(node))
+                elements.append(FillStitch(node, context))
             if element.stroke_color is not None:
                 if element.get_boolean_param("satin_column") and (len(element.path) > 1 or element.stroke_width >= 0.3 / PIXELS_PER_MM):
-                    elements.append(SatinColumn(node))
+                    elements.append(SatinColumn(node, context))
                 elif not is_command(element.node):
-                    elements.append(Stroke(node))
+                    elements.append(Stroke(node, context))
             if element.get_boolean_param("stroke_first", False):
                 elements.reverse()
 
@@ -64,28 +66,42 @@ def node_to_elements(node, clone_to_element=False) -> List[EmbroideryElement]:
         return elements
 
     elif node.tag == SVG_IMAGE_TAG:
-        return [ImageObject(node)]
+        return [ImageObject(node, context)]
 
     elif node.tag == SVG_TEXT_TAG:
-        return [TextObject(node)]
+        return [TextObject(node, context)]
 
     else:
         return []
 
 
 def nodes_to_elements(nodes: Iterable[BaseElement]) -> List[EmbroideryElement]:
+    # the contexts iterate_nodes() already made, if the nodes came from there
+    contexts = getattr(nodes, 'contexts', {})
+
     elements = []
     for node in nodes:
-        elements.extend(node_to_elements(node))
+        elements.extend(node_to_elements(node, context=contexts.get(node)))
 
     return elements
 
 
+class NodeList(List[BaseElement]):
+    """The nodes iterate_nodes() found, and the NodeContext of each."""
+
+    def __init__(self, nodes: Iterable[BaseElement], contexts: Dict[BaseElement, NodeContext]) -> None:
+        super().__init__(nodes)
+        self.contexts = contexts
+
+
 def iterate_nodes(node: BaseElement,  # noqa: C901
                   selection: Optional[List[BaseElement]] = None,
                   troubleshoot=False) -> List[BaseElement]:
     # Postorder traversal of selected nodes and their descendants.
     # Returns all nodes if there is no selection.
+    selected_nodes = set(selection or [])
+    contexts: Dict[BaseElement, NodeContext] = {}
+
     def walk(node: BaseElement, selected: bool) -> List[BaseElement]:
         nodes = []
 
@@ -93,16 +109,16 @@ def iterate_nodes(node: BaseElement,  # noqa: C901
         if node.tag is Comment:  # type:ignore[comparison-overlap]
             return []
 
-        element = EmbroideryElement(node)
+        context = NodeContext(node)
 
-        if element.has_command('ignore_object'):
+        if context.has_command('ignore_object'):
             return []
 
         if node.tag == SVG_GROUP_TAG and node.get(INKSCAPE_GROUPMODE) == "layer":
             if len(list(layer_commands(node, "ignore_layer"))):
                 return []
 
-        if (node.tag in EMBROIDERABLE_TAGS or node.tag == SVG_GROUP_TAG) and element.get_style('display', 'inline') is None:
+        if (node.tag in EMBROIDERABLE_TAGS or node.tag == SVG_GROUP_TAG) and context.get_style('display', 'inline') is None:
             return []
 
         # defs, masks and clippaths can contain embroiderable elements
@@ -115,8 +131,8 @@ def iterate_nodes(node: BaseElement,  # noqa: C901
             return []
 
         if not selected:
-            if selection:
-                if node in selection:
+            if selected_nodes:
+                if node in selected_nodes:
                     selected = True
             else:
                 # if the user didn't select anything that means we process everything
@@ -128,12 +144,14 @@ def iterate_nodes(node: BaseElement,  # noqa: C901
         if selected:
             if node.tag == SVG_GROUP_TAG:
                 pass
-            elif (node.tag in EMBROIDERABLE_TAGS or is_clone(node)) and not has_marker(node):
+            elif (node.tag in EMBROIDERABLE_TAGS or is_clone(node)) and not context.has_marker:
                 nodes.append(node)
+                contexts[node] = context
             # add images, text and elements with a marker for the troubleshoot extension
-            elif troubleshoot and (node.tag in NOT_EMBROIDERABLE_TAGS or has_marker(node)):
+            elif troubleshoot and (node.tag in NOT_EMBROIDERABLE_TAGS or context.has_marker):
                 nodes.append(node)
+                contexts[node] = context
 
         return nodes
 
-    return walk(node, False)
+    return NodeList(walk(node, False), contexts)
@@ -12,6 +12,7 @@ from .auto_run import AutoRun
 from .auto_satin import AutoSatin
 from .batch_lettering import BatchLettering
 from .break_apart import BreakApart
+from .cache_inspector import CacheInspector
 from .cleanup import Cleanup
 from .commands_scale_symbols import CommandsScaleSymbols
 from .cut_satin import CutSatin
@@ -92,6 +93,7 @@ extensions = [
     AutoSatin,
     BatchLettering,
     BreakApart,
+    CacheInspector,
     Cleanup,
     CommandsScaleSymbols,
     CutSatin,
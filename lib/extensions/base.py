@@ -7,7 +7,7 @@ import os
 
 import inkex
 
-from ..elements import iterate_nodes, nodes_to_elements
+from ..elements import embroider_elements, iterate_nodes, nodes_to_elements
 from ..i18n import _
 from ..metadata import InkStitchMetadata
 from ..svg import generate_unique_id
@@ -79,19 +79,7 @@ class InkstitchExtension(inkex.EffectExtension):
         return False
 
     def elements_to_stitch_groups(self, elements):
-        next_elements = [None]
-        if len(elements) > 1:
-            next_elements = elements[1:] + next_elements
-        stitch_groups = []
-        for element, next_element in zip(elements, next_elements):
-            if stitch_groups:
-                last_stitch_group = stitch_groups[-1]
-            else:
-                last_stitch_group = None
-
-            stitch_groups.extend(element.embroider(last_stitch_group, next_element))
-
-        return stitch_groups
+        return embroider_elements(elements)
 
     def get_inkstitch_metadata(self):
         return InkStitchMetadata(self.svg)
@@ -0,0 +1,27 @@
+# Authors: see git history
+#
+# Copyright (c) 2026 Authors
+# Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
+
+from inkex import errormsg
+
+from ..utils.cache_inspector import format_report, inspect_elements
+from .base import InkstitchExtension
+
+
+class CacheInspector(InkstitchExtension):
+    """Show how the stitch plan cache performs for each element.
+
+    Embroiders the selection (or the whole document) and reports for every
+    element whether it came from the cache, how large the cache entry is, how
+    long computing the cache key and embroidering took and which parts of the
+    cache key changed since the last time the cache inspector ran.
+
+    bin/inspect-stitch-plan-cache does the same from the command line.
+    """
+
+    def effect(self):
+        if not self.get_elements():
+            return
+
+        errormsg(format_report(inspect_elements(self.elements)))
@@ -56,7 +56,7 @@ class Output(InkstitchExtension):
         min_stitch_len = self.metadata['min_stitch_len_mm']
         stitch_groups = self.elements_to_stitch_groups(self.elements)
         stitch_plan = stitch_groups_to_stitch_plan(stitch_groups, collapse_len=collapse_len, disable_ties=self.settings.get('laser_mode', False),
-                                                   min_stitch_len=min_stitch_len)
+                                                   min_stitch_len=min_stitch_len, columnar=True)
         ThreadCatalog().match_and_apply_palette(stitch_plan, self.metadata['thread-palette'])
 
         temp_file = tempfile.NamedTemporaryFile(suffix=".%s" % self.file_extension, delete=False)
@@ -8,7 +8,6 @@
 import os
 import sys
 from collections import defaultdict
-from copy import copy
 from itertools import groupby, zip_longest
 from secrets import randbelow
 
@@ -20,6 +19,7 @@ from ..debug.debug import debug
 from ..elements import (Clone, EmbroideryElement, FillStitch, SatinColumn,
                         Stroke)
 from ..elements.clone import is_clone
+from ..elements.element import NodeContext
 from ..exceptions import InkstitchException, format_uncaught_exception
 from ..gui import PresetsPanel, PreviewRenderer, WarningPanel
 from ..gui.simulator import SplitSimulatorWindow
@@ -550,6 +550,55 @@ class ParamsTab(ScrolledPanel):
 # end of class SatinPane
 
 
+class PreviewCache(object):
+    """The stitch groups of the previous previews.
+
+    The params dialog renders a preview after every change, but most of the
+    time only the params of some nodes changed, so we only re-embroider
+    those.  A node with both a fill and a stroke has two elements, so the
+    previews are kept by node and element type.
+    """
+
+    def __init__(self):
+        # (node, element type) -> (preview key, stitch groups)
+        self.previews = {}
+
+    def embroider(self, element, last_stitch_group, next_node):
+        # The tabs set the params with set_param(), which invalidates what
+        # the elements of the node cached about them.
+        preview_key = self._get_preview_key(element, last_stitch_group, next_node)
+        previous_preview = self.previews.get((element.node, type(element)))
+        if previous_preview is not None and previous_preview[0] == preview_key:
+            # Neither this element's params nor its neighbours changed, so
+            # we'd get the same stitches again.
+            return previous_preview[1]
+
+        stitch_groups = element.embroider(last_stitch_group, next_node)
+        self.previews[(element.node, type(element))] = (preview_key, stitch_groups)
+        return stitch_groups
+
+    def _get_preview_key(self, element, last_stitch_group, next_node):
+        """Everything that the stitches of element can depend on in this dialog.
+
+        The dialog only changes the params of the selected nodes, and they
+        are stored as attributes on the node.  Neighbours only matter if the
+        element starts at the previous stitch or ends near the next element.
+        """
+
+        previous_stitch = None
+        if last_stitch_group and element.uses_previous_stitch():
+            previous_stitch = last_stitch_group.stitches[-1].as_tuple()
+
+        next_node_attributes = None
+        if next_node is not None and element.uses_next_element():
+            next_node_attributes = self._get_node_attributes(next_node)
+
+        return (self._get_node_attributes(element), previous_stitch, next_node_attributes)
+
+    def _get_node_attributes(self, element):
+        return tuple(sorted(element.node.attrib.items()))
+
+
 class SettingsPanel(wx.Panel):
     def __init__(self, parent, tabs_factory=None, metadata=None, background_color='white', simulator=None):
         self.tabs_factory = tabs_factory
@@ -562,6 +611,8 @@ class SettingsPanel(wx.Panel):
 
         self.preview_renderer = PreviewRenderer(self.render_stitch_plan, self.on_stitch_plan_rendered)
 
+        self.preview_cache = PreviewCache()
+
         self.notebook = wx.Notebook(self, wx.ID_ANY)
         self.tabs = self.tabs_factory(self.notebook)
 
@@ -610,11 +661,7 @@ class SettingsPanel(wx.Panel):
             wx.CallAfter(self._hide_warning)
             last_stitch_group = None
             for node, next_node in zip_longest(nodes, self._get_next_nodes(nodes)):
-                # Making a copy of the embroidery element is an easy
-                # way to drop the cache in the @cache decorators used
-                # for many params in embroider.py.
-
-                stitch_groups.extend(copy(node).embroider(last_stitch_group, next_node))
+                stitch_groups.extend(self.preview_cache.embroider(node, last_stitch_group, next_node))
                 if stitch_groups:
                     last_stitch_group = stitch_groups[-1]
 
@@ -746,8 +793,8 @@ class Params(InkstitchExtension):
         self.cancelled = False
         InkstitchExtension.__init__(self, *args, **kwargs)
 
-    def embroidery_classes(self, node):
-        element = EmbroideryElement(node)
+    def embroidery_classes(self, node, context=None):
+        element = EmbroideryElement(node, context)
         classes = []
 
         if not is_command(node) and not is_command_symbol(node):
@@ -770,9 +817,18 @@ class Params(InkstitchExtension):
         nodes = self.get_nodes()
         nodes_by_class = defaultdict(list)
 
+        # the contexts iterate_nodes() already made
+        contexts = getattr(nodes, 'contexts', {})
+
         for z, node in enumerate(nodes):
-            for cls in self.embroidery_classes(node):
-                element = cls(node)
+            # The elements of all tabs share the node's context, so that
+            # setting a param in one tab invalidates the others too.
+            context = contexts.get(node)
+            if context is None:
+                context = NodeContext(node)
+
+            for cls in self.embroidery_classes(node, context):
+                element = cls(node, context)
                 element.order = z
                 nodes_by_class[cls].append(element)
 
@@ -7,6 +7,7 @@ from typing import List, Tuple, cast
 
 from inkex import BaseElement, Boolean, Group, errormsg
 
+from ..commands import invalidate_command_index
 from ..elements import Clone, EmbroideryElement
 from ..i18n import _
 from ..svg.tags import CONNECTION_END, CONNECTION_START, SVG_SYMBOL_TAG
@@ -49,6 +50,7 @@ class UnlinkClone(InkstitchExtension):
                 backlink_attrib = CONNECTION_START if command.connector.get(CONNECTION_START) == ("#"+orig_id) else CONNECTION_END
                 command.connector.set(backlink_attrib, "#"+new_id)
             resolved_clone.set_id(new_id)
+            invalidate_command_index(resolved_clone)
 
     def _resolve_symbol(self, resolved):
         parent = cast(BaseElement, resolved[0].getparent())  # Safe assumption that this has a parent.
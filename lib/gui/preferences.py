@@ -105,7 +105,7 @@ class PreferencesFrame(wx.Frame):
         # add space above and below to center sizer_4 vertically
         global_margin.Add((0, 20), 1, wx.EXPAND, 0)
 
-        global_grid_sizer = wx.FlexGridSizer(3, 4, 15, 10)
+        global_grid_sizer = wx.FlexGridSizer(6, 4, 15, 10)
         global_margin.Add(global_grid_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 20)
 
         label_5 = wx.StaticText(self.global_page, wx.ID_ANY, _("Default minimum jump stitch length"), style=wx.ALIGN_LEFT)
@@ -158,6 +158,50 @@ class PreferencesFrame(wx.Frame):
         self.clear_cache_button = wx.Button(self.global_page, wx.ID_ANY, _("Clear Stitch Plan Cache"))
         global_grid_sizer.Add(self.clear_cache_button, 0, wx.ALIGN_CENTER_VERTICAL, 0)
 
+        label_11 = wx.StaticText(self.global_page, wx.ID_ANY, _("Stitch plan memory cache size"), style=wx.ALIGN_LEFT)
+        label_11.SetToolTip(_("Keeps recently used stitch plans in memory to speed up previews."))
+        global_grid_sizer.Add(label_11, 1, wx.ALIGN_CENTER_VERTICAL, 0)
+
+        self.stitch_plan_memory_cache_size = wx.SpinCtrl(
+            self.global_page, wx.ID_ANY,
+            value=str(global_settings['memory_cache_size']),
+            style=wx.ALIGN_RIGHT | wx.SP_ARROW_KEYS
+        )
+        self.stitch_plan_memory_cache_size.SetIncrement(10)
+        global_grid_sizer.Add(self.stitch_plan_memory_cache_size, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        label_12 = wx.StaticText(self.global_page, wx.ID_ANY, _("MB"))
+        global_grid_sizer.Add(label_12, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+
+        global_grid_sizer.Add((0, 0), 0, 0, 0)
+
+        label_13 = wx.StaticText(self.global_page, wx.ID_ANY, _("Parallel embroidery processes (1 to disable)"), style=wx.ALIGN_LEFT)
+        label_13.SetToolTip(_("Elements that don't depend on each other are embroidered at the same time. Only available on Linux."))
+        global_grid_sizer.Add(label_13, 1, wx.ALIGN_CENTER_VERTICAL, 0)
+
+        self.embroidery_processes = wx.SpinCtrl(
+            self.global_page, wx.ID_ANY,
+            value=str(global_settings['embroidery_processes']),
+            min=1, max=64,
+            style=wx.ALIGN_RIGHT | wx.SP_ARROW_KEYS
+        )
+        global_grid_sizer.Add(self.embroidery_processes, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        global_grid_sizer.Add((0, 0), 0, 0, 0)
+        global_grid_sizer.Add((0, 0), 0, 0, 0)
+
+        label_14 = wx.StaticText(self.global_page, wx.ID_ANY, _("Array-based travel stitch routing (experimental)"), style=wx.ALIGN_LEFT)
+        label_14.SetToolTip(_("Find travel stitch paths in fills on a copy of the travel graph in arrays instead of with networkx. "
+                              "The paths are just as short, but may differ where several are equally short."))
+        global_grid_sizer.Add(label_14, 1, wx.ALIGN_CENTER_VERTICAL, 0)
+
+        self.csr_travel_routing = wx.CheckBox(self.global_page, wx.ID_ANY)
+        self.csr_travel_routing.SetValue(global_settings['csr_travel_routing'])
+        global_grid_sizer.Add(self.csr_travel_routing, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        global_grid_sizer.Add((0, 0), 0, 0, 0)
+        global_grid_sizer.Add((0, 0), 0, 0, 0)
+
         global_margin.Add((0, 0), 1, wx.EXPAND, 0)
 
         button_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -210,10 +254,14 @@ class PreferencesFrame(wx.Frame):
         global_settings['default_min_stitch_len_mm'] = self.default_minimum_stitch_length.GetValue()
         global_settings['default_collapse_len_mm'] = self.default_minimum_jump_stitch_length.GetValue()
         global_settings['cache_size'] = self.stitch_plan_cache_size.GetValue()
+        global_settings['memory_cache_size'] = self.stitch_plan_memory_cache_size.GetValue()
+        global_settings['embroidery_processes'] = self.embroidery_processes.GetValue()
+        global_settings['csr_travel_routing'] = self.csr_travel_routing.GetValue()
 
         # cache size may have changed
         stitch_plan_cache = get_stitch_plan_cache()
         stitch_plan_cache.size_limit = int(global_settings['cache_size'] * 1024 * 1024)
+        stitch_plan_cache.memory_size_limit = int(global_settings['memory_cache_size'] * 1024 * 1024)
         stitch_plan_cache.cull()
         if not global_settings['cache_size']:
             stitch_plan_cache.clear(retry=True)
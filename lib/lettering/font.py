@@ -12,12 +12,13 @@ from random import randint
 
 import inkex
 
-from ..commands import add_commands, ensure_command_symbols
+from ..commands import (add_commands, ensure_command_symbols,
+                        invalidate_command_index)
 from ..elements import SatinColumn, Stroke, nodes_to_elements
 from ..exceptions import InkstitchException
 from ..extensions.lettering_custom_font_dir import get_custom_font_dir
 from ..i18n import _, get_languages
-from ..marker import ensure_marker_symbols, has_marker, is_grouped_with_marker
+from ..marker import ensure_marker_symbols, has_marker, invalidate_marker_index, is_grouped_with_marker
 from ..stitches.auto_satin import auto_satin
 from ..svg import PIXELS_PER_MM
 from ..svg.clip import get_clips
@@ -300,10 +301,14 @@ class Font(object):
         self._add_trims(destination_group, text, trim_option, use_trim_symbols, back_and_forth, color_sort)
         # make sure necessary marker and command symbols are in the defs section
         ensure_command_symbols(destination_group)
+        # the glyphs brought their own commands along
+        invalidate_command_index(destination_group)
         ensure_marker_symbols(destination_group)
 
         if color_sort != 0 and self.sortable:
             self.do_color_sort(destination_group, color_sort)
+            # markers may have moved to other groups
+            invalidate_marker_index(destination_group)
 
         return destination_group
 
@@ -102,12 +102,14 @@ class FontVariant(object):
 
     def _apply_transforms(self, svg):
         self.clip_transforms = defaultdict(list)
+        composed_transforms = {}
+
         # apply transforms to paths and use tags
         for element in svg.iterdescendants((SVG_PATH_TAG, SVG_USE_TAG, SVG_GROUP_TAG)):
-            transform = element.composed_transform()
+            transform = self._get_composed_transform(element, composed_transforms)
 
             if element.clip is not None:
-                self.clip_transforms[element.clip] = element.composed_transform()
+                self.clip_transforms[element.clip] = transform
             if element.tag == SVG_GROUP_TAG:
                 continue
             if element.tag == SVG_PATH_TAG:
@@ -135,6 +137,21 @@ class FontVariant(object):
 
         return svg
 
+    def _get_composed_transform(self, element, composed_transforms):
+        # element.composed_transform() would walk up to the root for every
+        # element, so we compose them top-down and remember them in
+        # composed_transforms to reuse them for the children
+        try:
+            return composed_transforms[element]
+        except KeyError:
+            parent = element.getparent()
+            if parent is None:
+                transform = element.transform
+            else:
+                transform = self._get_composed_transform(parent, composed_transforms) @ element.transform
+            composed_transforms[element] = transform
+            return transform
+
     def glyphs_start_with(self, character):
         glyph_selection = [glyph_name for glyph_name, glyph_layer in self.glyphs.items() if glyph_name.startswith(character)]
         return sorted(glyph_selection, key=lambda glyph: (len(glyph.split('.')[0]), len(glyph)), reverse=True)
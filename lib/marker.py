@@ -3,14 +3,17 @@
 # Copyright (c) 2022 Authors
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
+from collections import defaultdict
 from copy import deepcopy
 from os import path
+from weakref import WeakKeyDictionary
 
 from inkex import NSS, Style, load_svg
 from shapely import geometry as shgeo
 
-from .svg.tags import EMBROIDERABLE_TAGS
+from .svg.tags import EMBROIDERABLE_TAGS, SVG_GROUP_TAG
 from .utils import cache, get_bundled_dir
+from .utils.cache import fingerprint, instance_cache
 
 MARKER = ['anchor-line', 'pattern', 'guide-line']
 
@@ -36,6 +39,7 @@ def ensure_marker_symbols(group):
             ensure_marker(group.getroottree().getroot(), marker)
             for element in marked_elements:
                 element.style['marker-start'] = "url(#inkstitch-%s-marker)" % marker
+            invalidate_marker_index(group)
 
 
 @cache
@@ -52,61 +56,137 @@ def set_marker(node, position, marker):
     style = node.style
     style += Style(f'marker-{ position }:url(#inkstitch-{ marker }-marker)')
     node.set('style', style)
+    invalidate_marker_index(node)
 
 
-def get_marker_elements(node, marker, get_fills=True, get_strokes=True, get_satins=False):
-    from .elements import EmbroideryElement
-    from .elements.fill_stitch import FillStitch
-    from .elements.satin_column import SatinColumn
-    from .elements.stroke import Stroke
+# document root -> MarkerIndex, see get_marker_index()
+_marker_indexes: WeakKeyDictionary = WeakKeyDictionary()
+
+
+class MarkerElement(object):
+    """A marker element, parsed only once for all elements of its group."""
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    @instance_cache
+    def fill(self):
+        from .elements import EmbroideryElement
+        from .elements.fill_stitch import FillStitch
+
+        if EmbroideryElement(self.node).fill_color is not None:
+            return FillStitch(self.node).shape
+
+    @property
+    @instance_cache
+    def stroke(self):
+        from .elements import EmbroideryElement
+        from .elements.stroke import Stroke
+
+        if EmbroideryElement(self.node).stroke_color is not None:
+            line_strings = [shgeo.LineString(path) for path in Stroke(self.node).unclipped_paths]
+            return shgeo.MultiLineString(line_strings)
+
+    @property
+    @instance_cache
+    def satin(self):
+        from .elements import EmbroideryElement
+        from .elements.satin_column import SatinColumn
+
+        if EmbroideryElement(self.node).stroke_color is not None:
+            satin = SatinColumn(self.node)
+            if len(satin.rails) == 2:
+                return satin
+
+    @property
+    @instance_cache
+    def fingerprint(self):
+        satin = self.satin
+        return fingerprint([self.fill, self.stroke, satin.filtered_subpaths if satin is not None else None])
+
+
+class MarkerIndex(object):
+    """The marker elements of a document by group, found in one pass.
+
+    Markers apply to all elements of their group.  Searching the siblings of
+    every element for markers, and parsing the markers again for each of
+    them, makes going through a document slow.  Instead, we look at every
+    node once and remember the markers of each group, and each marker is
+    parsed only once (see MarkerElement).
+
+    Markers that were moved to another group or lost their marker since are
+    skipped.  Code that adds markers must call invalidate_marker_index().
+    """
+
+    def __init__(self, svg):
+        self.markers = defaultdict(list)
 
+        for node in svg.iterdescendants(*EMBROIDERABLE_TAGS):
+            # do not close marker-start:url(
+            # if the marker group has been copied and pasted in Inkscape it may have been duplicated with an updated id (e.g. -4)
+            style = node.attrib.get('style', '')
+            if 'marker-start:url(#inkstitch-' not in style:
+                continue
+            parent = node.getparent()
+            if parent.tag != SVG_GROUP_TAG:
+                continue
+            for marker in MARKER:
+                if "marker-start:url(#inkstitch-%s-marker" % marker in style:
+                    self.markers[(parent, marker)].append(MarkerElement(node))
+
+    def get_markers(self, node, marker):
+        """Return the MarkerElements of this type in node's group."""
+
+        parent = node.getparent()
+        return [marker_element for marker_element in self.markers.get((parent, marker), ())
+                if marker_element.node.getparent() is parent and
+                "marker-start:url(#inkstitch-%s-marker" % marker in marker_element.node.attrib.get('style', '')]
+
+
+def get_marker_index(node):
+    """Return the MarkerIndex of the document node belongs to."""
+
+    svg = node.getroottree().getroot()
+    try:
+        return _marker_indexes[svg]
+    except KeyError:
+        index = _marker_indexes[svg] = MarkerIndex(svg)
+        return index
+
+
+def invalidate_marker_index(node):
+    """Forget the MarkerIndex of node's document after markers changed."""
+
+    _marker_indexes.pop(node.getroottree().getroot(), None)
+
+
+def get_marker_elements(node, marker, get_fills=True, get_strokes=True, get_satins=False):
     fills = []
     strokes = []
     satins = []
-    # do not close marker-start:url(
-    # if the marker group has been copied and pasted in Inkscape it may have been duplicated with an updated id (e.g. -4)
-    xpath = "./parent::svg:g/*[contains(@style, 'marker-start:url(#inkstitch-%s-marker')]" % marker
-    markers = node.xpath(xpath, namespaces=NSS)
-    for marker in markers:
-        if marker.tag not in EMBROIDERABLE_TAGS:
-            continue
-
-        element = EmbroideryElement(marker)
-        fill = element.fill_color
-        stroke = element.stroke_color
-
-        if get_fills and fill is not None:
-            fill = FillStitch(marker).shape
-            fills.append(fill)
-
-        if get_strokes and stroke is not None:
-            stroke = Stroke(marker).unclipped_paths
-            line_strings = [shgeo.LineString(path) for path in stroke]
-            strokes.append(shgeo.MultiLineString(line_strings))
-
-        if get_satins and stroke is not None:
-            satin = SatinColumn(marker)
-            if len(satin.rails) == 2:
-                satins.append(satin)
+    for marker_element in get_marker_index(node).get_markers(node, marker):
+        if get_fills and marker_element.fill is not None:
+            fills.append(marker_element.fill)
 
-    return {'fill': fills, 'stroke': strokes, 'satin': satins}
+        if get_strokes and marker_element.stroke is not None:
+            strokes.append(marker_element.stroke)
 
+        if get_satins and marker_element.satin is not None:
+            satins.append(marker_element.satin)
 
-def get_marker_elements_cache_key_data(node, marker):
-    marker_elements = get_marker_elements(node, marker, True, True, True)
+    return {'fill': fills, 'stroke': strokes, 'satin': satins}
 
-    marker_elements['fill'] = [shape.wkt for shape in marker_elements['fill']]
-    marker_elements['stroke'] = [shape.wkt for shape in marker_elements['stroke']]
-    marker_elements['satin'] = [satin.filtered_subpaths for satin in marker_elements['satin']]
 
-    return marker_elements
+def get_marker_elements_cache_key_data(node, marker):
+    return [marker_element.fingerprint for marker_element in get_marker_index(node).get_markers(node, marker)]
 
 
 def has_marker(node, marker=list()):
     if not marker:
         marker = MARKER
+    style = node.get('style') or ''
     for m in marker:
-        style = node.get('style') or ''
         if "marker-start:url(#inkstitch-%s-marker" % m in style:
             return True
     return False
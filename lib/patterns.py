@@ -5,18 +5,13 @@
 
 from shapely import geometry as shgeo
 
-from .marker import get_marker_elements
+from .marker import get_marker_elements, get_marker_elements_cache_key_data
 from .stitch_plan import Stitch
 from .utils import Point
 
 
 def get_patterns_cache_key_data(node):
-    patterns = get_marker_elements(node, "pattern")
-    data = []
-    data.extend([fill.wkt for fill in patterns['fill']])
-    data.extend([stroke.wkt for stroke in patterns['stroke']])
-
-    return data
+    return get_marker_elements_cache_key_data(node, "pattern")
 
 
 def apply_patterns(stitch_groups, node):
@@ -3,9 +3,10 @@
 # Copyright (c) 2010 Authors
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
-from .color_block import ColorBlock
+from .color_block import ColorBlock, ColumnarColorBlock
 from .generate_stitch_plan import generate_stitch_plan
 from .read_file import stitch_plan_from_file
 from .stitch import Stitch
+from .stitch_array import StitchArray, StitchView
 from .stitch_group import StitchGroup
 from .stitch_plan import StitchPlan, stitch_groups_to_stitch_plan
@@ -5,10 +5,13 @@
 
 from typing import List
 
+import numpy as np
+
 from ..svg import PIXELS_PER_MM
 from ..threads import ThreadColor
 from ..utils.geometry import Point
 from .stitch import Stitch
+from .stitch_array import JUMP, STOP, TRIM, StitchArray
 
 
 class ColorBlock(object):
@@ -122,24 +125,8 @@ class ColorBlock(object):
             min_stitch_len = 0.1
         min_stitch_len *= PIXELS_PER_MM
 
-        stitches = [self.stitches[0]]
-        for stitch in self.stitches[1:]:
-            if stitches[-1].jump or stitch.stop or stitch.trim or stitch.color_change:
-                # Don't consider jumps, stops, color changes, or trims as candidates for filtering
-                pass
-            elif 'lock_stitch' in stitch.tags:
-                # do not filter specific stitches
-                pass
-            else:
-                length = (stitch - stitches[-1]).length()
-                min_length = stitch.min_stitch_length or min_stitch_len
-                if length <= min_length:
-                    # duplicate stitch, skip this one
-                    continue
-
-            stitches.append(stitch)
-
-        self.stitches = stitches
+        keep = StitchArray.from_stitches(self.stitches).duplicate_stitch_mask(min_stitch_len)
+        self.stitches = [stitch for stitch, keep_stitch in zip(self.stitches, keep) if keep_stitch]
 
     def add_stitch(self, *args, **kwargs):
         if not args:
@@ -183,10 +170,86 @@ class ColorBlock(object):
         final_stitches = self.stitches[first_final_stitch:]
         block_stitches = self.stitches[:first_final_stitch]
 
-        out = ColorBlock(self.color)
+        out = self.__class__(self.color)
         for i, offset in enumerate(offsets):
             out.add_stitches([s.offset(offset) for s in block_stitches])
             if i != len(offsets) - 1:
                 out.add_stitch(trim=True)
         out.add_stitches(final_stitches)
         return out
+
+
+class ColumnarColorBlock(ColorBlock):
+    """A ColorBlock that stores its stitches in a StitchArray.
+
+    This behaves exactly like a ColorBlock, but uses far less memory for large
+    designs, and statistics are computed with NumPy instead of walking the
+    stitch list in Python.  Iterating or indexing yields StitchView objects
+    that can be used anywhere a Stitch is expected.
+    """
+
+    def __init__(self, color=None, stitches=None):
+        self.color = color
+        self.stitches = stitches or []
+
+    @property
+    def stitches(self):
+        return self._stitches
+
+    @stitches.setter
+    def stitches(self, stitches):
+        self._stitches = StitchArray.from_stitches(stitches)
+
+    def __json__(self):
+        return dict(color=self.color, stitches=list(self.stitches))
+
+    @property
+    def estimated_thread(self):
+        return float(np.hypot(np.diff(self.stitches.x), np.diff(self.stitches.y)).sum())
+
+    @property
+    def num_stops(self):
+        """Number of stops in this color block."""
+        return int(np.count_nonzero(self.stitches.has_command(STOP)))
+
+    @property
+    def num_trims(self):
+        """Number of trims in this color block."""
+        return int(np.count_nonzero(self.stitches.has_command(TRIM)))
+
+    @property
+    def num_jumps(self):
+        """Number of jumps in this color block."""
+        return int(np.count_nonzero(self.stitches.has_command(JUMP)))
+
+    @property
+    def bounding_box(self):
+        if not self.stitches:
+            # same as the min() of an empty sequence in ColorBlock.bounding_box
+            raise ValueError("bounding box of an empty color block")
+
+        x = self.stitches.x
+        y = self.stitches.y
+        return float(x.min()), float(y.min()), float(x.max()), float(y.max())
+
+    def filter_duplicate_stitches(self, min_stitch_len=0.1):
+        if not self.stitches:
+            return
+
+        if min_stitch_len is None:
+            min_stitch_len = 0.1
+        min_stitch_len *= PIXELS_PER_MM
+
+        keep = self.stitches.duplicate_stitch_mask(min_stitch_len)
+        if not keep.all():
+            self._stitches = self.stitches.take(keep)
+
+    def add_stitches(self, stitches, *args, **kwargs):
+        if args or kwargs or not all(isinstance(stitch, (Stitch, Point)) for stitch in stitches):
+            super().add_stitches(stitches, *args, **kwargs)
+            return
+
+        # Copy all of the stitches at once instead of one by one
+        if not isinstance(stitches, StitchArray):
+            stitches = StitchArray.from_stitches(stitch if isinstance(stitch, Stitch) else Stitch(stitch) for stitch in stitches)
+        self.stitches.extend(stitches)
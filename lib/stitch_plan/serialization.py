@@ -0,0 +1,329 @@
+# Authors: see git history
+#
+# Copyright (c) 2010 Authors
+# Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
+
+"""Compact binary encoding for lists of StitchGroups.
+
+The stitch plan cache stores the StitchGroups of every element.  Pickling them
+would store a dict and a tag list for every single Stitch, which makes cache
+entries huge and slow to load.  Instead we store each StitchGroup's stitches as
+packed NumPy arrays and load them back without copying.
+
+Layout (all numbers little-endian):
+
+    header:     magic b"ISSG", uint16 format version, uint32 number of groups
+    strings:    uint32 count, then per string: uint32 length, UTF-8 bytes
+    values:     uint32 count, then per value: uint8 kind, uint32 length, payload
+    groups:     per group:
+                  group header (see _GROUP_HEADER)
+                  start lock and end lock (see _LOCK)
+                  tag sets: uint32 count, then per set: uint16 count, uint32 string ids
+                  colors: uint32 count, uint32 value ids
+                  minimum stitch lengths: uint32 count, uint32 value ids
+                  the stitch arrays, each padded to 8 bytes:
+                    float64 x, float64 y, uint8 commands,
+                    ids into the group's tag sets, colors and minimum stitch lengths
+
+Colors and minimum stitch lengths can be of several types, so they are stored
+in the values table.  Each stitch only stores ids into small per-group tables,
+using the smallest integer type that fits the table (see _id_dtype()).
+
+Whenever the layout changes or StitchGroup or Stitch gain new attributes,
+FORMAT_VERSION must be increased.  Cache entries with a different version are
+simply ignored.
+"""
+
+import pickle
+import struct
+from typing import Any, List, Optional
+
+import numpy as np
+from inkex import Color
+
+from .lock_stitch import LockStitch
+from .stitch_array import StitchArray
+from .stitch_group import StitchGroup
+
+FORMAT_VERSION = 1
+
+_MAGIC = b"ISSG"
+_HEADER = struct.Struct("<4sHI")
+_UINT32 = struct.Struct("<I")
+_UINT16 = struct.Struct("<H")
+_VALUE_HEADER = struct.Struct("<BI")
+
+# stitch count, color value id, flags, min_jump_stitch_length value id
+_GROUP_HEADER = struct.Struct("<IIBI")
+_TRIM_AFTER = 1
+_STOP_AFTER = 2
+_FORCE_LOCK_STITCHES = 4
+
+# present, lock id string id, custom path value id, scale percent, scale absolute
+_LOCK = struct.Struct("<BIIdd")
+
+_NONE = 0
+_BOOL = 1
+_FLOAT = 2
+_STRING = 3
+_COLOR = 4
+_PICKLE = 5
+
+
+def _id_dtype(table_size):
+    if table_size <= 1 << 8:
+        return np.uint8
+    elif table_size <= 1 << 16:
+        return np.uint16
+    else:
+        return np.uint32
+
+
+def stitch_groups_to_bytes(stitch_groups: List[StitchGroup]) -> bytes:
+    """Encode a list of StitchGroups.  See the module docstring for the layout."""
+    return _Encoder().encode(stitch_groups)
+
+
+def stitch_groups_from_bytes(data: Any) -> Optional[List[StitchGroup]]:
+    """Decode a list of StitchGroups encoded by stitch_groups_to_bytes().
+
+    The stitch coordinates and attributes reference data directly, without
+    copying.
+
+    Returns None if data wasn't encoded with the current FORMAT_VERSION (for
+    example because it's an old pickled cache entry).
+    """
+
+    if not isinstance(data, (bytes, bytearray, memoryview)) or len(data) < _HEADER.size:
+        return None
+
+    magic, version, num_groups = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != FORMAT_VERSION:
+        return None
+
+    return _Decoder(data, _HEADER.size).decode(num_groups)
+
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self.string_ids: dict = {}
+        self.values: List[bytes] = []
+        self.value_ids: dict = {}
+
+    def encode(self, stitch_groups: List[StitchGroup]) -> bytes:
+        groups = [self.encode_group(stitch_group) for stitch_group in stitch_groups]
+
+        out = bytearray(_HEADER.pack(_MAGIC, FORMAT_VERSION, len(stitch_groups)))
+
+        out += _UINT32.pack(len(self.strings))
+        for string in self.strings:
+            encoded = string.encode('utf-8')
+            out += _UINT32.pack(len(encoded))
+            out += encoded
+
+        out += _UINT32.pack(len(self.values))
+        for value in self.values:
+            out += value
+
+        for group_header, stitch_arrays in groups:
+            out += group_header
+            out += bytes(-len(out) % 8)
+            for array in stitch_arrays:
+                out += array.tobytes()
+                # keep the next array aligned
+                out += bytes(-len(out) % 8)
+
+        return bytes(out)
+
+    def encode_group(self, stitch_group: StitchGroup):
+        stitches = StitchArray.from_stitches(stitch_group.stitches)
+
+        flags = 0
+        if stitch_group.trim_after:
+            flags |= _TRIM_AFTER
+        if stitch_group.stop_after:
+            flags |= _STOP_AFTER
+        if stitch_group.force_lock_stitches:
+            flags |= _FORCE_LOCK_STITCHES
+
+        header = bytearray(_GROUP_HEADER.pack(len(stitches),
+                                              self.value_id(stitch_group.color),
+                                              flags,
+                                              self.value_id(stitch_group.min_jump_stitch_length)))
+
+        lock_stitches = stitch_group.lock_stitches or (None, None)
+        for lock_stitch in lock_stitches:
+            header += self.encode_lock_stitch(lock_stitch)
+
+        header += _UINT32.pack(len(stitches.tag_sets))
+        for tag_set in stitches.tag_sets:
+            header += _UINT16.pack(len(tag_set))
+            for tag in sorted(tag_set):
+                header += _UINT32.pack(self.string_id(tag))
+
+        header += _UINT32.pack(len(stitches.colors))
+        for color in stitches.colors:
+            header += _UINT32.pack(self.value_id(color))
+
+        # Usually all stitches in a group share the same minimum stitch
+        # length, so store it like tags and colors.  NaN means None.
+        min_stitch_lengths, min_stitch_length_ids = np.unique(stitches.min_stitch_length, return_inverse=True)
+        header += _UINT32.pack(len(min_stitch_lengths))
+        for min_stitch_length in min_stitch_lengths.tolist():
+            header += _UINT32.pack(self.value_id(None if np.isnan(min_stitch_length) else min_stitch_length))
+
+        stitch_arrays = [
+            stitches.x,
+            stitches.y,
+            stitches.commands,
+            stitches.tag_ids.astype(_id_dtype(len(stitches.tag_sets))),
+            stitches.color_ids.astype(_id_dtype(len(stitches.colors))),
+            min_stitch_length_ids.astype(_id_dtype(len(min_stitch_lengths))),
+        ]
+
+        return header, stitch_arrays
+
+    def encode_lock_stitch(self, lock_stitch: Optional[LockStitch]) -> bytes:
+        if lock_stitch is None:
+            return _LOCK.pack(0, 0, 0, 0, 0)
+
+        definition = lock_stitch.lock_stitch_definition
+        return _LOCK.pack(1,
+                          self.string_id(definition.id),
+                          self.value_id(definition._path if definition.id == "custom" else None),
+                          lock_stitch.scale.percent,
+                          lock_stitch.scale.absolute)
+
+    def string_id(self, string: str) -> int:
+        if string not in self.string_ids:
+            self.strings.append(string)
+            self.string_ids[string] = len(self.strings) - 1
+        return self.string_ids[string]
+
+    def value_id(self, value: Any) -> int:
+        encoded = _encode_value(value)
+        if encoded not in self.value_ids:
+            self.values.append(encoded)
+            self.value_ids[encoded] = len(self.values) - 1
+        return self.value_ids[encoded]
+
+
+def _encode_value(value: Any) -> bytes:
+    if value is None:
+        kind, payload = _NONE, b""
+    elif isinstance(value, bool):
+        kind, payload = _BOOL, bytes([value])
+    elif isinstance(value, float):
+        kind, payload = _FLOAT, struct.pack("<d", value)
+    elif isinstance(value, str):
+        kind, payload = _STRING, value.encode('utf-8')
+    elif isinstance(value, Color) and Color(str(value)) == value:
+        kind, payload = _COLOR, str(value).encode('utf-8')
+    else:
+        # Anything unusual is rare enough that we can afford to pickle it.
+        kind, payload = _PICKLE, pickle.dumps(value)
+
+    return _VALUE_HEADER.pack(kind, len(payload)) + payload
+
+
+class _Decoder:
+    def __init__(self, data: Any, offset: int) -> None:
+        self.data = data
+        self.offset = offset
+
+    def decode(self, num_groups: int) -> List[StitchGroup]:
+        self.strings = [bytes(self.read_bytes(self.read_uint32())).decode('utf-8') for i in range(self.read_uint32())]
+        self.values = [self.read_value() for i in range(self.read_uint32())]
+
+        return [self.read_group() for i in range(num_groups)]
+
+    def read(self, structure: struct.Struct) -> tuple:
+        values = structure.unpack_from(self.data, self.offset)
+        self.offset += structure.size
+        return values
+
+    def read_uint32(self) -> int:
+        return self.read(_UINT32)[0]
+
+    def read_bytes(self, length: int) -> memoryview:
+        start = self.offset
+        self.offset += length
+        return memoryview(self.data)[start:self.offset]
+
+    def read_array(self, dtype, count: int) -> np.ndarray:
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset += array.nbytes
+        self.offset += -self.offset % 8
+        return array
+
+    def read_value(self) -> Any:
+        kind, length = self.read(_VALUE_HEADER)
+        payload = bytes(self.read_bytes(length))
+
+        if kind == _NONE:
+            return None
+        elif kind == _BOOL:
+            return bool(payload[0])
+        elif kind == _FLOAT:
+            return struct.unpack("<d", payload)[0]
+        elif kind == _STRING:
+            return payload.decode('utf-8')
+        elif kind == _COLOR:
+            return Color(payload.decode('utf-8'))
+        else:
+            return pickle.loads(payload)
+
+    def read_lock_stitch(self, position: str) -> Optional[LockStitch]:
+        present, lock_id, path, scale_percent, scale_absolute = self.read(_LOCK)
+        if not present:
+            return None
+
+        lock_stitch = LockStitch(position, self.strings[lock_id], 100, 0)
+        lock_stitch.scale.percent = scale_percent
+        lock_stitch.scale.absolute = scale_absolute
+        path = self.values[path]
+        if path is not None:
+            lock_stitch.set_path(path)
+
+        return lock_stitch
+
+    def read_group(self) -> StitchGroup:
+        num_stitches, color, flags, min_jump_stitch_length = self.read(_GROUP_HEADER)
+        lock_stitches = (self.read_lock_stitch('start'), self.read_lock_stitch('end'))
+
+        tag_sets = []
+        for i in range(self.read_uint32()):
+            num_tags = self.read(_UINT16)[0]
+            tag_sets.append(frozenset(self.strings[self.read_uint32()] for j in range(num_tags)))
+
+        colors = [self.values[self.read_uint32()] for i in range(self.read_uint32())]
+        min_stitch_length_values = [self.values[self.read_uint32()] for i in range(self.read_uint32())]
+        min_stitch_lengths = np.array([np.nan if value is None else value for value in min_stitch_length_values], dtype=np.float64)
+
+        self.offset += -self.offset % 8
+        x = self.read_array(np.float64, num_stitches)
+        y = self.read_array(np.float64, num_stitches)
+        commands = self.read_array(np.uint8, num_stitches)
+        tag_ids = self.read_array(_id_dtype(len(tag_sets)), num_stitches)
+        color_ids = self.read_array(_id_dtype(len(colors)), num_stitches)
+        min_stitch_length_ids = self.read_array(_id_dtype(len(min_stitch_lengths)), num_stitches)
+
+        if num_stitches:
+            min_stitch_length = min_stitch_lengths[min_stitch_length_ids]
+        else:
+            min_stitch_length = np.empty(0, dtype=np.float64)
+
+        stitches = StitchArray.from_arrays(x, y, commands, min_stitch_length, tag_ids, color_ids, tag_sets, colors)
+
+        stitch_group = StitchGroup(
+            color=self.values[color],
+            trim_after=bool(flags & _TRIM_AFTER),
+            stop_after=bool(flags & _STOP_AFTER),
+            force_lock_stitches=bool(flags & _FORCE_LOCK_STITCHES),
+            min_jump_stitch_length=self.values[min_jump_stitch_length],
+            lock_stitches=lock_stitches
+        )
+        stitch_group.stitches = list(stitches)
+
+        return stitch_group
@@ -4,7 +4,7 @@
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
 from __future__ import annotations  # Needed for using the Stitch type as a constructor arg
-from typing import Dict, Type, Union, Optional, Set, Any, Iterable, overload
+from typing import Dict, Union, Optional, Set, Any, Iterable, overload
 from shapely import geometry as shgeo
 
 from ..utils.geometry import Point
@@ -87,10 +87,8 @@ class Stitch(Point):
         min_stitch_length: Optional[float] = None,
         tags: Optional[Iterable[str]] = None
     ):
-        # DANGER: if you add new attributes, you MUST also set their default
-        # values in __new__() below.  Otherwise, cached stitch plans can be
-        # loaded and create objects without those properties defined, because
-        # unpickling does not call __init__()!
+        # NOTE: if you add new attributes, you must also add them to the cache
+        # encoding in serialization.py and increase its FORMAT_VERSION.
 
         base_stitch = None
         if isinstance(x, Stitch):
@@ -120,14 +118,6 @@ class Stitch(Point):
         if base_stitch is not None:
             self.add_tags(base_stitch.tags)
 
-    def __new__(cls: Type[Stitch], *args, **kwargs) -> Stitch:
-        instance = super().__new__(cls)
-
-        # Set default values for any new attributes here (see note in __init__() above)
-        # instance.foo = None
-
-        return instance
-
     def __repr__(self):
         return "Stitch(%s, %s, %s, %s, %s, %s, %s, %s)" % (
             self.x,
@@ -0,0 +1,556 @@
+# Authors: see git history
+#
+# Copyright (c) 2010 Authors
+# Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
+
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Union, overload
+
+import numpy as np
+
+from .stitch import Stitch
+
+# Bits used in StitchArray.commands.  A stitch may have more than one of these set.
+JUMP = 1
+TRIM = 2
+STOP = 4
+COLOR_CHANGE = 8
+
+TERMINATOR = TRIM | STOP | COLOR_CHANGE
+
+
+class _Interner:
+    """Map values to small integer ids and back.
+
+    Stitch tag sets and colors repeat over and over again across hundreds of
+    thousands of stitches, so we store each distinct value only once and keep
+    an integer id per stitch.
+    """
+
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+        self._ids: Dict[Any, int] = {}
+
+    def get_id(self, value: Any) -> int:
+        try:
+            key = self._key(value)
+            return self._ids[key]
+        except KeyError:
+            self.values.append(value)
+            self._ids[key] = len(self.values) - 1
+            return self._ids[key]
+
+    def set_values(self, values: List[Any]) -> None:
+        """Replace the table, keeping the ids given by the positions in values."""
+        self.values = list(values)
+        self._ids = {}
+        for i, value in enumerate(self.values):
+            self._ids.setdefault(self._key(value), i)
+
+    def _key(self, value: Any) -> Any:
+        if value is None or isinstance(value, (str, tuple, frozenset)):
+            return value
+
+        # Colors may be inkex.Color objects, which are lists and therefore not
+        # hashable, or ThreadColors, which compare equal when only their RGB
+        # matches.  Keep those apart by identity.  We hold on to the value in
+        # self.values, so the id can't be reused.
+        return (type(value), id(value))
+
+    def __getitem__(self, item: int) -> Any:
+        return self.values[item]
+
+
+class StitchArray:
+    """A sequence of stitches stored as a structure of NumPy arrays.
+
+    Large stitch plans can contain hundreds of thousands of stitches.  Storing
+    each of them as its own Stitch object costs a lot of memory and makes
+    statistics like the number of trims slow, because they have to walk the
+    whole list in Python.  A StitchArray instead keeps one array per attribute:
+
+      * x, y: float64 coordinates
+      * commands: uint8 bitfield of JUMP, TRIM, STOP and COLOR_CHANGE
+      * min_stitch_length: float64, NaN where the stitch has no override
+      * tag_ids, color_ids: uint32 ids into interned tables of tag sets and colors
+
+    Indexing or iterating returns StitchView objects, which behave like Stitch
+    objects but read and write through to the arrays.  That way, code that
+    expects lists of stitches can use a StitchArray unchanged.
+    """
+
+    _x: np.ndarray
+    _y: np.ndarray
+    _commands: np.ndarray
+    _min_stitch_length: np.ndarray
+    _tag_ids: np.ndarray
+    _color_ids: np.ndarray
+
+    _INITIAL_CAPACITY = 16
+    _DTYPES = {
+        '_x': np.float64,
+        '_y': np.float64,
+        '_commands': np.uint8,
+        '_min_stitch_length': np.float64,
+        '_tag_ids': np.uint32,
+        '_color_ids': np.uint32,
+    }
+
+    def __init__(self, capacity: int = 0) -> None:
+        capacity = max(capacity, self._INITIAL_CAPACITY)
+        self._size = 0
+        for name, dtype in self._DTYPES.items():
+            setattr(self, name, np.empty(capacity, dtype=dtype))
+        self._writable = True
+        self._tags = _Interner()
+        self._colors = _Interner()
+
+    @classmethod
+    def from_stitches(cls, stitches: Iterable[Stitch]) -> StitchArray:
+        if isinstance(stitches, StitchArray):
+            return stitches.copy()
+
+        # Fill each column in one go.  This is a lot faster than appending
+        # stitches one by one.
+        stitches = list(stitches)
+        size = len(stitches)
+        stitch_array = cls(size)
+        stitch_array._x[:size] = [stitch.x for stitch in stitches]
+        stitch_array._y[:size] = [stitch.y for stitch in stitches]
+        stitch_array._commands[:size] = [command_bits(stitch) for stitch in stitches]
+        stitch_array._min_stitch_length[:size] = [np.nan if stitch.min_stitch_length is None else stitch.min_stitch_length
+                                                  for stitch in stitches]
+        stitch_array._tag_ids[:size] = [stitch_array.tag_id(stitch.tags) for stitch in stitches]
+        stitch_array._color_ids[:size] = [stitch_array.color_id(stitch.color) for stitch in stitches]
+        stitch_array._size = size
+
+        return stitch_array
+
+    @classmethod
+    def from_arrays(cls, x: np.ndarray, y: np.ndarray, commands: np.ndarray, min_stitch_length: np.ndarray,
+                    tag_ids: np.ndarray, color_ids: np.ndarray, tag_sets: List[FrozenSet[str]], colors: List[Any]) -> StitchArray:
+        """Wrap existing arrays without copying them.
+
+        The arrays may be read-only, for example if they were created by
+        numpy.frombuffer(), and the id arrays may use smaller integer types.
+        In that case they're copied the first time a stitch is changed.
+        """
+
+        stitch_array = cls(0)
+        stitch_array._size = len(x)
+        stitch_array._x = x
+        stitch_array._y = y
+        stitch_array._commands = commands
+        stitch_array._min_stitch_length = min_stitch_length
+        stitch_array._tag_ids = tag_ids
+        stitch_array._color_ids = color_ids
+        stitch_array._writable = False
+        stitch_array._tags.set_values(tag_sets)
+        stitch_array._colors.set_values(colors)
+
+        return stitch_array
+
+    # The arrays below are views of the used part of the storage.  Writing to
+    # them changes the stitches.
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x[:self._size]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self._size]
+
+    @property
+    def commands(self) -> np.ndarray:
+        return self._commands[:self._size]
+
+    @property
+    def min_stitch_length(self) -> np.ndarray:
+        return self._min_stitch_length[:self._size]
+
+    @property
+    def tag_ids(self) -> np.ndarray:
+        return self._tag_ids[:self._size]
+
+    @property
+    def color_ids(self) -> np.ndarray:
+        return self._color_ids[:self._size]
+
+    @property
+    def coordinates(self) -> np.ndarray:
+        """An (N, 2) array of the stitch coordinates (a copy)."""
+        return np.column_stack((self.x, self.y))
+
+    def has_command(self, command: int) -> np.ndarray:
+        """Return a boolean mask of the stitches with the given command bit(s) set."""
+        return (self.commands & command) != 0
+
+    def has_tag(self, tag: str) -> np.ndarray:
+        """Return a boolean mask of the stitches that carry the given tag."""
+        tag_set_ids = [i for i, tag_set in enumerate(self.tag_sets) if tag in tag_set]
+        return np.isin(self.tag_ids, tag_set_ids)
+
+    def duplicate_stitch_mask(self, min_stitch_len: float) -> np.ndarray:
+        """Find stitches that are too short to be sewn.
+
+        A stitch is too short if it is no longer than its own minimum stitch
+        length (or min_stitch_len if it doesn't have one), measured from the
+        last stitch that we keep.  Jumps, stops, trims, color changes, stitches
+        following a jump and lock stitches are always kept.
+
+        Returns:
+            a boolean mask that is True for the stitches to keep
+        """
+
+        size = self._size
+        keep = np.ones(size, dtype=bool)
+        if size < 2:
+            return keep
+
+        min_lengths = self.min_stitch_length.copy()
+        # a minimum stitch length of 0 means "use the default", just like None
+        min_lengths[np.isnan(min_lengths) | (min_lengths == 0)] = min_stitch_len
+
+        jump = self.has_command(JUMP)
+        can_filter = ~self.has_command(TERMINATOR) & ~self.has_tag('lock_stitch')
+
+        # As long as we keep every stitch, the last stitch we keep is simply the
+        # previous one.  That lets us find the first stitch of every run of
+        # short stitches with a few array operations.
+        delta_x = np.diff(self.x)
+        delta_y = np.diff(self.y)
+        lengths = np.sqrt(delta_x * delta_x + delta_y * delta_y)
+        too_short = can_filter[1:] & ~jump[:-1] & (lengths <= min_lengths[1:])
+        run_starts = np.flatnonzero(too_short) + 1
+
+        # Within a run, each stitch has to be measured from the last stitch we
+        # kept, which we can only know by walking the run.  Runs end at the
+        # first stitch we keep.  Only short stitches and the one after each
+        # run are visited here.
+        x = self.x
+        y = self.y
+        index = 0
+        for run_start in run_starts:
+            if run_start <= index:
+                # already handled as part of the previous run
+                continue
+
+            last_kept = run_start - 1
+            index = run_start
+            while index < size:
+                if can_filter[index] and not jump[last_kept]:
+                    delta_x = x[index] - x[last_kept]
+                    delta_y = y[index] - y[last_kept]
+                    if (delta_x * delta_x + delta_y * delta_y) ** 0.5 <= min_lengths[index]:
+                        keep[index] = False
+                        index += 1
+                        continue
+                break
+
+        return keep
+
+    @property
+    def tag_sets(self) -> List[FrozenSet[str]]:
+        """The interned tag sets.  tag_ids are indices into this list."""
+        return self._tags.values
+
+    @property
+    def colors(self) -> List[Any]:
+        """The interned colors.  color_ids are indices into this list."""
+        return self._colors.values
+
+    def tags_for_id(self, tag_id: int) -> FrozenSet[str]:
+        return self._tags[tag_id]
+
+    def color_for_id(self, color_id: int) -> Any:
+        return self._colors[color_id]
+
+    def tag_id(self, tags: Iterable[str]) -> int:
+        return self._tags.get_id(frozenset(tags))
+
+    def color_id(self, color: Any) -> int:
+        return self._colors.get_id(color)
+
+    def _ensure_writable(self) -> None:
+        self._reserve(self._size)
+
+    def _reserve(self, size: int) -> None:
+        """Make sure there is room for size stitches and that we can write to the arrays."""
+
+        capacity = max(len(self._x), 1)
+        if size <= capacity and self._writable:
+            return
+
+        while capacity < size:
+            capacity *= 2
+
+        for name, dtype in self._DTYPES.items():
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+        self._writable = True
+
+    def append(self, stitch: Stitch) -> None:
+        self._reserve(self._size + 1)
+        self._set(self._size, stitch)
+        self._size += 1
+
+    def extend(self, stitches: Iterable[Stitch]) -> None:
+        if isinstance(stitches, StitchArray):
+            self._extend_array(stitches)
+            return
+
+        for stitch in stitches:
+            self.append(stitch)
+
+    def _extend_array(self, other: StitchArray) -> None:
+        start = self._size
+        end = start + len(other)
+        self._reserve(end)
+
+        self._x[start:end] = other.x
+        self._y[start:end] = other.y
+        self._commands[start:end] = other.commands
+        self._min_stitch_length[start:end] = other.min_stitch_length
+
+        # The other array has its own interned tables, so we have to translate its ids into ours.
+        tag_id_map = np.array([self.tag_id(tags) for tags in other.tag_sets] or [0], dtype=np.uint32)
+        color_id_map = np.array([self.color_id(color) for color in other.colors] or [0], dtype=np.uint32)
+        self._tag_ids[start:end] = tag_id_map[other.tag_ids]
+        self._color_ids[start:end] = color_id_map[other.color_ids]
+
+        self._size = end
+
+    def _set(self, index: int, stitch: Stitch) -> None:
+        self._ensure_writable()
+        self._x[index] = stitch.x
+        self._y[index] = stitch.y
+        self._commands[index] = command_bits(stitch)
+        if stitch.min_stitch_length is None:
+            self._min_stitch_length[index] = np.nan
+        else:
+            self._min_stitch_length[index] = stitch.min_stitch_length
+        self._tag_ids[index] = self.tag_id(stitch.tags)
+        self._color_ids[index] = self.color_id(stitch.color)
+
+    def copy(self) -> StitchArray:
+        return self.take(np.arange(self._size))
+
+    def take(self, indices: Union[np.ndarray, slice]) -> StitchArray:
+        """Return a new StitchArray with only the selected stitches.
+
+        Arguments:
+            indices -- an integer index array, a boolean mask or a slice
+        """
+
+        x = self.x[indices]
+        out = StitchArray(len(x))
+        out._size = len(x)
+        out._x[:out._size] = x
+        out._y[:out._size] = self.y[indices]
+        out._commands[:out._size] = self.commands[indices]
+        out._min_stitch_length[:out._size] = self.min_stitch_length[indices]
+        out._tag_ids[:out._size] = self.tag_ids[indices]
+        out._color_ids[:out._size] = self.color_ids[indices]
+
+        # Copy the interned tables.  Ids that aren't used anymore don't hurt.
+        out._tags.set_values(self.tag_sets)
+        out._colors.set_values(self.colors)
+
+        return out
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, item: int) -> StitchView: ...
+
+    @overload
+    def __getitem__(self, item: slice) -> StitchArray: ...
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.take(item)
+
+        return StitchView(self, self._normalize_index(item))
+
+    def __setitem__(self, item: int, stitch: Stitch) -> None:
+        self._set(self._normalize_index(item), stitch)
+
+    def __delitem__(self, item: Union[int, slice]) -> None:
+        if isinstance(item, slice):
+            keep = np.ones(self._size, dtype=bool)
+            keep[item] = False
+        else:
+            keep = np.ones(self._size, dtype=bool)
+            keep[self._normalize_index(item)] = False
+
+        remaining = self.take(keep)
+        self.__dict__.update(remaining.__dict__)
+
+    def _normalize_index(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("stitch index out of range")
+        return index
+
+    def __iter__(self) -> Iterator[StitchView]:
+        for i in range(self._size):
+            yield StitchView(self, i)
+
+    def __reversed__(self) -> Iterator[StitchView]:
+        for i in range(self._size - 1, -1, -1):
+            yield StitchView(self, i)
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __repr__(self) -> str:
+        return "StitchArray(%s)" % list(self)
+
+    def __json__(self) -> List[StitchView]:
+        return list(self)
+
+
+def command_bits(stitch: Stitch) -> int:
+    bits = 0
+    if stitch.jump:
+        bits |= JUMP
+    if stitch.trim:
+        bits |= TRIM
+    if stitch.stop:
+        bits |= STOP
+    if stitch.color_change:
+        bits |= COLOR_CHANGE
+    return bits
+
+
+class StitchView(Stitch):
+    """A Stitch that reads and writes its attributes in a StitchArray.
+
+    StitchViews are created on the fly when a StitchArray is indexed or
+    iterated, so they don't take up any memory while they aren't used.
+    """
+
+    _array: StitchArray
+    _index: int
+
+    def __new__(cls, *args, **kwargs):
+        if args and isinstance(args[0], StitchArray):
+            return super().__new__(cls)
+
+        # Point arithmetic creates new objects using self.__class__(x, y).
+        # The results aren't part of any StitchArray, so make plain Stitches.
+        return Stitch(*args, **kwargs)
+
+    def __init__(self, stitch_array: StitchArray, index: int) -> None:
+        # We deliberately don't call Stitch.__init__(): all attributes live in
+        # the StitchArray.
+        object.__setattr__(self, '_array', stitch_array)
+        object.__setattr__(self, '_index', index)
+
+    @property
+    def x(self) -> float:
+        return float(self._array._x[self._index])
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._array._ensure_writable()
+        self._array._x[self._index] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._array._y[self._index])
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._array._ensure_writable()
+        self._array._y[self._index] = value
+
+    def _get_command(self, command: int) -> bool:
+        return bool(self._array._commands[self._index] & command)
+
+    def _set_command(self, command: int, value: bool) -> None:
+        self._array._ensure_writable()
+        if value:
+            self._array._commands[self._index] |= command
+        else:
+            self._array._commands[self._index] &= ~command & 0xFF
+
+    @property
+    def jump(self) -> bool:
+        return self._get_command(JUMP)
+
+    @jump.setter
+    def jump(self, value: bool) -> None:
+        self._set_command(JUMP, value)
+
+    @property
+    def trim(self) -> bool:
+        return self._get_command(TRIM)
+
+    @trim.setter
+    def trim(self, value: bool) -> None:
+        self._set_command(TRIM, value)
+
+    @property
+    def stop(self) -> bool:
+        return self._get_command(STOP)
+
+    @stop.setter
+    def stop(self, value: bool) -> None:
+        self._set_command(STOP, value)
+
+    @property
+    def color_change(self) -> bool:
+        return self._get_command(COLOR_CHANGE)
+
+    @color_change.setter
+    def color_change(self, value: bool) -> None:
+        self._set_command(COLOR_CHANGE, value)
+
+    @property
+    def min_stitch_length(self) -> Optional[float]:
+        value = self._array._min_stitch_length[self._index]
+        if np.isnan(value):
+            return None
+        return float(value)
+
+    @min_stitch_length.setter
+    def min_stitch_length(self, value: Optional[float]) -> None:
+        self._array._ensure_writable()
+        self._array._min_stitch_length[self._index] = np.nan if value is None else value
+
+    @property
+    def color(self) -> Any:
+        return self._array.color_for_id(self._array._color_ids[self._index])
+
+    @color.setter
+    def color(self, value: Any) -> None:
+        self._array._ensure_writable()
+        self._array._color_ids[self._index] = self._array.color_id(value)
+
+    @property  # type: ignore[override]
+    def tags(self) -> FrozenSet[str]:
+        return self._array.tags_for_id(self._array._tag_ids[self._index])
+
+    @tags.setter
+    def tags(self, value: Iterable[str]) -> None:
+        self._array._ensure_writable()
+        self._array._tag_ids[self._index] = self._array.tag_id(value)
+
+    def add_tag(self, tag: str) -> None:
+        if tag not in self.tags:
+            self.tags = self.tags | {tag}
+
+    def __json__(self) -> Dict[str, Any]:
+        return self.copy().__json__()
+
+    def __reduce__(self):
+        # Pickle as a plain Stitch.  Views only make sense as part of their StitchArray.
+        return (Stitch, (self.x, self.y, self.color, self.jump, self.stop, self.trim, self.color_change,
+                         self.min_stitch_length, sorted(self.tags)))
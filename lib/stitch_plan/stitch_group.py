@@ -28,10 +28,8 @@ class StitchGroup:
         force_lock_stitches=False,
         tags=None
     ):
-        # DANGER: if you add new attributes, you MUST also set their default
-        # values in __new__() below.  Otherwise, cached stitch plans can be
-        # loaded and create objects without those properties defined, because
-        # unpickling does not call __init__()!
+        # NOTE: if you add new attributes, you must also add them to the cache
+        # encoding in serialization.py and increase its FORMAT_VERSION.
 
         self.color = color
         self.trim_after = trim_after
@@ -47,16 +45,6 @@ class StitchGroup:
         if tags:
             self.add_tags(tags)
 
-    def __new__(cls, *args, **kwargs):
-        instance = super().__new__(cls)
-
-        # Set default values for any new attributes here (see note in __init__() above)
-        # instance.foo = None
-
-        instance.lock_stitches = None
-
-        return instance
-
     def __add__(self, other):
         if isinstance(other, StitchGroup):
             return StitchGroup(self.color, self.stitches + other.stitches,
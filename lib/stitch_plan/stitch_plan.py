@@ -6,22 +6,26 @@
 from sys import exit
 from typing import List
 
+import numpy as np
 from inkex import errormsg
 
 from ..i18n import _
 from ..svg import PIXELS_PER_MM
 from ..utils.geometry import Point
 from ..utils.threading import check_stop_flag
-from .color_block import ColorBlock
+from .color_block import ColorBlock, ColumnarColorBlock
 
 
-def stitch_groups_to_stitch_plan(stitch_groups, collapse_len=None, min_stitch_len=0.1, disable_ties=False):  # noqa: C901
+def stitch_groups_to_stitch_plan(stitch_groups, collapse_len=None, min_stitch_len=0.1, disable_ties=False, columnar=False):  # noqa: C901
 
     """Convert a collection of StitchGroups to a StitchPlan.
 
     * applies instructions embedded in the StitchGroup such as trim_after and stop_after
     * adds tie-ins and tie-offs
     * adds jump-stitches between stitch_group if necessary
+
+    If columnar is True, the StitchPlan stores its stitches in NumPy arrays
+    (see StitchArray).
     """
 
     if not stitch_groups:
@@ -33,17 +37,17 @@ def stitch_groups_to_stitch_plan(stitch_groups, collapse_len=None, min_stitch_le
         collapse_len = 3.0
     collapse_len = float(collapse_len) * PIXELS_PER_MM
 
-    stitch_plan = StitchPlan()
+    stitch_plan = StitchPlan(columnar=columnar)
     color_block = stitch_plan.new_color_block(color=stitch_groups[0].color)
 
     previous_stitch_group = None
     need_tie_in = True
 
-    for stitch_group in stitch_groups:
-        check_stop_flag()
+    stitch_groups = [stitch_group for stitch_group in stitch_groups if stitch_group.stitches]
+    distances_to_previous_group = _distances_to_previous_group(stitch_groups)
 
-        if not stitch_group.stitches:
-            continue
+    for stitch_group, distance_to_previous_stitch in zip(stitch_groups, distances_to_previous_group):
+        check_stop_flag()
 
         if color_block.color != stitch_group.color:
             # add a lock stitch to the last element of the previous group
@@ -61,7 +65,7 @@ def stitch_groups_to_stitch_plan(stitch_groups, collapse_len=None, min_stitch_le
         else:
             add_lock = False
             if len(color_block) and not need_tie_in:
-                distance_to_previous_stitch = (stitch_group.stitches[0] - color_block.stitches[-1]).length()
+                # If we get here, the last stitch in the color block is the last stitch of the previous group.
                 if previous_stitch_group.force_lock_stitches:
                     add_lock = True
                 elif previous_stitch_group.min_jump_stitch_length:
@@ -117,17 +121,51 @@ def stitch_groups_to_stitch_plan(stitch_groups, collapse_len=None, min_stitch_le
     return stitch_plan
 
 
+def _distances_to_previous_group(stitch_groups):
+    """Distance from the first stitch of each group to the last stitch of the group before it.
+
+    The first group has no group before it and gets a distance of 0.
+    """
+
+    if not stitch_groups:
+        return []
+
+    first_stitches = np.array([stitch_group.stitches[0].as_tuple() for stitch_group in stitch_groups])
+    last_stitches = np.array([stitch_group.stitches[-1].as_tuple() for stitch_group in stitch_groups])
+
+    delta = first_stitches[1:] - last_stitches[:-1]
+    distances = (delta[:, 0] ** 2 + delta[:, 1] ** 2) ** 0.5
+
+    return [0.0] + distances.tolist()
+
+
 class StitchPlan(object):
-    """Holds a set of color blocks, each containing stitches."""
+    """Holds a set of color blocks, each containing stitches.
+
+    If columnar is True, new color blocks store their stitches in NumPy arrays
+    instead of lists of Stitch objects.  This saves a lot of memory on large
+    designs.  Both kinds of color blocks behave the same.
+    """
 
-    def __init__(self):
+    def __init__(self, columnar=False):
+        self.columnar = columnar
         self.color_blocks = []
 
     def new_color_block(self, *args, **kwargs):
-        color_block = ColorBlock(*args, **kwargs)
+        if self.columnar:
+            color_block = ColumnarColorBlock(*args, **kwargs)
+        else:
+            color_block = ColorBlock(*args, **kwargs)
         self.color_blocks.append(color_block)
         return color_block
 
+    def to_columnar(self):
+        """Return a copy of this StitchPlan that uses columnar storage."""
+        out = StitchPlan(columnar=True)
+        for color_block in self:
+            out.new_color_block(color_block.color, color_block.stitches)
+        return out
+
     def delete_empty_color_blocks(self):
         color_blocks = []
         for color_block in self.color_blocks:
@@ -225,6 +263,6 @@ class StitchPlan(object):
             return None
 
     def make_offsets(self, offsets: List[Point]):
-        out = StitchPlan()
+        out = StitchPlan(columnar=self.columnar)
         out.color_blocks = [block.make_offsets(offsets) for block in self]
         return out
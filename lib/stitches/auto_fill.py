@@ -6,10 +6,12 @@
 # -*- coding: UTF-8 -*-
 
 import math
-from itertools import chain, groupby
-from typing import Iterator
+from itertools import chain, groupby, islice
+from typing import Any, Dict, Iterator, Optional
+from weakref import WeakKeyDictionary
 
 import networkx
+import shapely
 from shapely import geometry as shgeo
 from shapely import make_valid, segmentize, set_precision
 from shapely.ops import snap, unary_union
@@ -26,9 +28,11 @@ from ..utils.geometry import (ensure_multi_line_string, ensure_polygon,
 from ..utils.list import is_all_zeroes
 from ..utils.prng import join_args
 from ..utils.smoothing import smooth_path
+from ..utils.settings import global_settings
 from ..utils.threading import check_stop_flag
 from .fill import intersect_region_with_grating, stitch_row
 from .running_stitch import even_running_stitch
+from .utils.travel_graph import CSRTravelGraph, TravelEdgeArrays
 
 
 class NoGratingsError(Exception):
@@ -67,6 +71,47 @@ class PathEdge(object):
         return self.key.startswith(self.SEGMENT_KEY)
 
 
+class AutoFillPreparation(object):
+    """The part of auto_fill() that doesn't depend on the starting and ending point.
+
+    Most of the time auto-fill spends is in building the fill stitch graph and,
+    when underpathing, the travel edges.  None of that depends on where the
+    fill starts and ends, so prepare_auto_fill() can do it ahead of time, for
+    example in a worker process while earlier elements are still being
+    embroidered.
+
+    A preparation can only be used once: auto_fill() changes the graph.
+    """
+
+    def __init__(self, shape=None, fill_stitch_graph=None, travel_edges=None):
+        # The shape after pull compensation, or None if that didn't change it.
+        # We don't keep the original shape: pickling it would lose its
+        # precision grid, which changes the results of operations on it.
+        self.shape = shape
+
+        # the fill stitch graph without the starting and ending point, or None
+        # if the shape doesn't intersect with the grating
+        self.fill_stitch_graph = fill_stitch_graph
+
+        # a TravelEdges, or None if they have to be built in auto_fill()
+        self.travel_edges = travel_edges
+
+
+class TravelEdges(object):
+    """Travel edges for underpathing, see prepare_travel_edges()."""
+
+    def __init__(self, boundary_nodes, edges, arrays=None):
+        # (node, outline index, projection) for each end of a travel edge on the outline
+        self.boundary_nodes = boundary_nodes
+
+        # (edge, weight, crossed segments), where crossed segments are the
+        # (start, end) nodes of the fill stitch graph segments the edge crosses
+        self.edges = edges
+
+        # the edges as TravelEdgeArrays for a CSRTravelGraph, if it will be used
+        self.arrays = arrays
+
+
 @debug.time
 def auto_fill(shape,
               angle,
@@ -85,18 +130,24 @@ def auto_fill(shape,
               random_sigma=0.0,
               random_seed="",
               pull_compensation_px=(0, 0),
-              pull_compensation_percent=(0, 0)):
-    has_pull_compensation = not is_all_zeroes(pull_compensation_px) or not is_all_zeroes(pull_compensation_percent)
-    if has_pull_compensation:
-        spacing = min(row_spacing, end_row_spacing or row_spacing)
-        shape = adjust_shape_for_pull_compensation(shape, angle, spacing, pull_compensation_px, pull_compensation_percent)
-
-    rows = intersect_region_with_grating(shape, angle, row_spacing, end_row_spacing)
-    if not rows:
+              pull_compensation_percent=(0, 0),
+              preparation=None):
+    if preparation is None:
+        preparation = prepare_auto_fill(shape, angle, row_spacing, end_row_spacing, underpath,
+                                        pull_compensation_px, pull_compensation_percent)
+
+    if preparation.shape is not None:
+        shape = preparation.shape
+    fill_stitch_graph = preparation.fill_stitch_graph
+    if fill_stitch_graph is None:
         # Small shapes may not intersect with the grating at all.
         return fallback(shape, running_stitch_length, running_stitch_tolerance)
-    segments = [segment for row in rows for segment in row]
-    fill_stitch_graph = build_fill_stitch_graph(shape, segments, starting_point, ending_point)
+
+    travel_edges = preparation.travel_edges
+    for point in (starting_point, ending_point):
+        if point and insert_node(fill_stitch_graph, shape, point):
+            # The prepared travel edges don't know about the new segments.
+            travel_edges = None
 
     if networkx.is_empty(fill_stitch_graph):
         # The graph may be empty if the shape is so small that it fits between the
@@ -106,7 +157,7 @@ def auto_fill(shape,
     # ensure graph is eulerian
     graph_make_valid(fill_stitch_graph)
 
-    travel_graph = build_travel_graph(fill_stitch_graph, shape, angle, underpath)
+    travel_graph = build_travel_graph(fill_stitch_graph, shape, angle, underpath, travel_edges)
 
     if not travel_graph:
         return fallback(shape, running_stitch_length, running_stitch_tolerance)
@@ -115,11 +166,53 @@ def auto_fill(shape,
     path = fill_gaps(path, round_to_multiple_of_2(gap_fill_rows))
     result = path_to_stitches(shape, path, travel_graph, fill_stitch_graph, angle, row_spacing,
                               max_stitch_length, running_stitch_length, running_stitch_tolerance,
-                              staggers, skip_last, underpath, enable_random_stitch_length, random_sigma, random_seed)
+                              staggers, skip_last, underpath, enable_random_stitch_length, random_sigma, random_seed,
+                              travel_edges)
 
     return result
 
 
+@debug.time
+def prepare_auto_fill(shape,
+                      angle,
+                      row_spacing,
+                      end_row_spacing,
+                      underpath=True,
+                      pull_compensation_px=(0, 0),
+                      pull_compensation_percent=(0, 0)):
+    """Do the work for auto_fill() that doesn't depend on the starting and ending point.
+
+    Returns an AutoFillPreparation to pass to auto_fill() along with the same
+    arguments.
+    """
+
+    adjusted_shape = None
+    has_pull_compensation = not is_all_zeroes(pull_compensation_px) or not is_all_zeroes(pull_compensation_percent)
+    if has_pull_compensation:
+        spacing = min(row_spacing, end_row_spacing or row_spacing)
+        adjusted_shape = adjust_shape_for_pull_compensation(shape, angle, spacing, pull_compensation_px, pull_compensation_percent)
+        if adjusted_shape is shape:
+            adjusted_shape = None
+        else:
+            shape = adjusted_shape
+
+    rows = intersect_region_with_grating(shape, angle, row_spacing, end_row_spacing)
+    if not rows:
+        return AutoFillPreparation(adjusted_shape)
+    segments = [segment for row in rows for segment in row]
+    fill_stitch_graph = build_fill_stitch_graph(shape, segments)
+
+    travel_edges = None
+    if underpath:
+        try:
+            travel_edges = prepare_travel_edges(fill_stitch_graph, shape, angle)
+        except NoGratingsError:
+            # build_travel_graph() will find out again and travel around the outline instead
+            pass
+
+    return AutoFillPreparation(adjusted_shape, fill_stitch_graph, travel_edges)
+
+
 def round_to_multiple_of_2(number):
     if number % 2 == 1:
         return number + 1
@@ -259,7 +352,10 @@ def build_fill_stitch_graph(shape, segments, starting_point=None, ending_point=N
 
 
 def insert_node(graph, shape, point):
-    """Add node to graph, splitting one of the outline edges"""
+    """Add node to graph, splitting one of the outline edges
+
+    Returns True if segments had to be added to connect the node.
+    """
 
     point = tuple(point)
     outline = which_outline(shape, point)
@@ -272,8 +368,9 @@ def insert_node(graph, shape, point):
         if key == "outline" and data['outline'] == outline:
             edges.append(((start, end), data))
 
+    added_segments = False
     if len(edges) > 0:
-        edge, data = min(edges, key=lambda edge_data: shgeo.LineString(edge_data[0]).distance(projected_point))
+        edge, data = nearest_edge(edges, projected_point)
         graph.remove_edge(*edge, key="outline")
         graph.add_edge(edge[0], node, key="outline", **data)
         graph.add_edge(node, edge[1], key="outline", **data)
@@ -284,15 +381,27 @@ def insert_node(graph, shape, point):
         for start, end, key, data in graph.edges(keys=True, data=True):
             if key == "outline":
                 edges.append(((start, end), data))
-        edge, data = min(edges, key=lambda edge_data: shgeo.LineString(edge_data[0]).distance(projected_point))
+        edge, data = nearest_edge(edges, projected_point)
         line_segment = shgeo.LineString([edge[0], node])
         if line_segment.length > 10:
             line_segment = segmentize(line_segment, 10)
         graph.add_edge(edge[0], node, key='segment', underpath_edges=[], geometry=line_segment)
         graph.add_edge(node, edge[1], key='segment', underpath_edges=[], geometry=line_segment.reverse())
+        added_segments = True
 
     tag_nodes_with_outline_and_projection(graph, shape, nodes=[node])
 
+    return added_segments
+
+
+def nearest_edge(edges, point):
+    """Find the (edge, data) in edges nearest to point."""
+
+    distances = shapely.distance(shapely.linestrings([edge for edge, data in edges]), point)
+
+    # argmin() picks the first of equally near edges, like min() would
+    return edges[int(distances.argmin())]
+
 
 def tag_nodes_with_outline_and_projection(graph, shape, nodes):
     for node in nodes:
@@ -395,7 +504,7 @@ def fallback(shape, running_stitch_length, running_stitch_tolerance):
 
 
 @debug.time
-def build_travel_graph(fill_stitch_graph, shape, fill_stitch_angle, underpath):
+def build_travel_graph(fill_stitch_graph, shape, fill_stitch_angle, underpath, travel_edges=None):
     """Build a graph for travel stitches.
 
     This graph will be used to find a stitch path between two spots on the
@@ -415,6 +524,9 @@ def build_travel_graph(fill_stitch_graph, shape, fill_stitch_angle, underpath):
     boundary edges extra so that they're more "expensive" in the shortest path
     calculation.  We also weight the interior edges extra proportional to
     how close they are to the boundary.
+
+    travel_edges may be the TravelEdges that prepare_travel_edges() built for
+    this fill stitch graph before the starting and ending point were inserted.
     """
     graph = networkx.MultiGraph()
 
@@ -424,9 +536,12 @@ def build_travel_graph(fill_stitch_graph, shape, fill_stitch_angle, underpath):
     graph.add_nodes_from(fill_stitch_graph.nodes(data=True))
 
     grating = True
-    if underpath:
+    if underpath and travel_edges is not None:
+        for node, outline_index, projection in travel_edges.boundary_nodes:
+            graph.add_node(node, outline=outline_index, projection=projection)
+    elif underpath:
         try:
-            boundary_points, travel_edges = build_travel_edges(shape, fill_stitch_angle)
+            boundary_points, travel_lines = build_travel_edges(shape, fill_stitch_angle)
         except NoGratingsError:
             grating = False
 
@@ -440,14 +555,87 @@ def build_travel_graph(fill_stitch_graph, shape, fill_stitch_angle, underpath):
 
     add_edges_between_outline_nodes(graph)
 
-    if underpath and grating:
-        process_travel_edges(graph, fill_stitch_graph, shape, travel_edges)
+    if underpath and travel_edges is not None:
+        add_travel_edges(graph, fill_stitch_graph, travel_edges)
+    elif underpath and grating:
+        process_travel_edges(graph, fill_stitch_graph, shape, travel_lines)
 
     debug.log_graph(graph, "travel graph")
 
     return graph
 
 
+@debug.time
+def prepare_travel_edges(fill_stitch_graph, shape, fill_stitch_angle):
+    """Build the travel edges for underpathing ahead of time.
+
+    This does the expensive part of build_travel_graph() and
+    process_travel_edges(): it builds the travel edges, weights them and finds
+    the segments they cross.  Pass the result to build_travel_graph() for the
+    same graph after inserting the starting and ending point with
+    insert_node(), as long as that didn't add any segments.
+
+    Raises NoGratingsError like build_travel_edges().
+    """
+
+    boundary_points, travel_lines = build_travel_edges(shape, fill_stitch_angle)
+
+    boundary_nodes = []
+    for node in boundary_points:
+        outline_index = which_outline(shape, node)
+        boundary_nodes.append((node, outline_index, project(shape, node, outline_index)))
+
+        check_stop_flag()
+
+    # graph_make_valid() will add copies of some segments under keys like
+    # "segment-1".  They share the original's geometry and underpath_edges,
+    # so add_travel_edges() takes care of them.
+    segments = [data["geometry"] for start, end, key, data in fill_stitch_graph.edges(keys=True, data=True) if key == "segment"]
+    strtree = STRtree(segments)
+
+    # see process_travel_edges()
+    outline = set_precision(shape.boundary.simplify(0.5 * PIXELS_PER_MM, preserve_topology=False), 0.000001)
+
+    edges = []
+    for ls in travel_lines:
+        points = [InkstitchPoint(*coord) for coord in ls.coords]
+        p1, p2 = points[0], points[-1]
+
+        edge = (p1.as_tuple(), p2.as_tuple(), 'travel')
+        crossed_segments = [(segment_geom.coords[0], segment_geom.coords[-1])
+                            for segment_geom in strtree.geometries.take(strtree.query(ls, predicate='crosses'))]
+        weight = p1.distance(p2) / (ls.distance(outline) + 0.1)
+        edges.append((edge, weight, crossed_segments))
+
+        check_stop_flag()
+
+    del strtree
+
+    arrays = None
+    if global_settings['csr_travel_routing']:
+        arrays = TravelEdgeArrays((*edge, weight) for edge, weight, crossed_segments in edges)
+
+    return TravelEdges(boundary_nodes, edges, arrays)
+
+
+def add_travel_edges(graph, fill_stitch_graph, travel_edges):
+    """Add prepared travel edges to the travel graph, like process_travel_edges()."""
+
+    weight_edges_by_length(graph, 3)
+
+    for edge, weight, crossed_segments in travel_edges.edges:
+        for start, end in crossed_segments:
+            # process_travel_edges() adds the edge once for the segment and
+            # once for each copy graph_make_valid() made of it
+            segment_edges = fill_stitch_graph[start][end]
+            copies = sum(1 for key in segment_edges if key.startswith('segment'))
+            segment_edges['segment']['underpath_edges'].extend([edge] * copies)
+
+        graph.add_edge(*edge, weight=weight)
+
+        check_stop_flag()
+
+
 def weight_edges_by_length(graph, multiplier=1):
     for start, end, key in graph.edges:
         p1 = InkstitchPoint(*start)
@@ -587,7 +775,80 @@ def build_travel_edges(shape, fill_angle):
     return endpoints, chain(diagonal_edges.geoms, vertical_edges.geoms)
 
 
+class NodeIndex(object):
+    """A spatial index of the nodes of a graph for nearest_node().
+
+    The nodes are kept in an STRtree.  Nodes that were added to the graph
+    after the tree was built are searched separately until there are enough
+    of them to make rebuilding the tree worthwhile.  Nodes are never removed
+    from our graphs, so we can tell that nodes were added by counting them.
+    """
+
+    MAX_PENDING_NODES = 64
+
+    def __init__(self, attr=None):
+        # We don't keep a reference to the graph, so that it can be garbage
+        # collected along with its index.
+        self.attr = attr
+        self.node_count = 0
+        self.nodes = []
+        self.pending_nodes = []
+        self.tree = None
+
+    def update(self, graph):
+        node_count = graph.number_of_nodes()
+        if node_count == self.node_count:
+            return
+
+        if self.attr:
+            new_nodes = islice(graph.nodes(data=self.attr), self.node_count, None)
+            self.pending_nodes.extend(node for node, value in new_nodes if value is not None)
+        else:
+            self.pending_nodes.extend(islice(graph.nodes, self.node_count, None))
+        self.node_count = node_count
+
+        if self.tree is None or len(self.pending_nodes) > self.MAX_PENDING_NODES:
+            self.nodes.extend(self.pending_nodes)
+            self.pending_nodes = []
+            self.tree = STRtree(shapely.points(self.nodes)) if self.nodes else None
+
+    def nearest(self, graph, point):
+        self.update(graph)
+        point = shgeo.Point(*point)
+
+        nearest = None
+        if self.tree is not None:
+            # If several nodes are equally near, use the first one, like min() would.
+            indices, distances = self.tree.query_nearest(point, return_distance=True)
+            nearest = self.nodes[indices.min()]
+            nearest_distance = distances[0]
+
+        for node in self.pending_nodes:
+            distance = shgeo.Point(*node).distance(point)
+            if nearest is None or distance < nearest_distance:
+                nearest = node
+                nearest_distance = distance
+
+        return nearest
+
+
+# graph -> {attr: NodeIndex}
+_node_indices: WeakKeyDictionary[Any, Dict[Optional[str], NodeIndex]] = WeakKeyDictionary()
+
+
 def nearest_node(nodes, point, attr=None):
+    """Find the node nearest to point.
+
+    nodes may be a graph, in which case a NodeIndex is kept for it.  If attr
+    is given, only the graph's nodes with that attribute are considered.
+    """
+
+    if isinstance(nodes, networkx.Graph):
+        node_indices = _node_indices.setdefault(nodes, {})
+        if attr not in node_indices:
+            node_indices[attr] = NodeIndex(attr)
+        return node_indices[attr].nearest(nodes, point)
+
     point = shgeo.Point(*point)
     nearest = min(nodes, key=lambda node: shgeo.Point(*node).distance(point))
 
@@ -617,16 +878,19 @@ def find_stitch_path(graph, travel_graph, starting_point=None, ending_point=None
     the order of most-recently-visited first.
     """
 
+    # The copy has the same nodes, so we look them up in the original graph,
+    # which may already have a node index.
+    fill_stitch_graph = graph
     graph = graph.copy()
     composed_graph = networkx.compose(graph, travel_graph)
 
     if not starting_point:
         starting_point = list(graph.nodes.keys())[0]
 
-    starting_node = nearest_node(graph, starting_point)
+    starting_node = nearest_node(fill_stitch_graph, starting_point)
 
     if ending_point:
-        ending_node = nearest_node(graph, ending_point)
+        ending_node = nearest_node(fill_stitch_graph, ending_point)
     else:
         ending_point = starting_point
         ending_node = starting_node
@@ -691,8 +955,7 @@ def find_stitch_path(graph, travel_graph, starting_point=None, ending_point=None
     # relevant in the case that the user specifies an underlay with an inset
     # value, because the starting point (and possibly ending point) can be
     # inside the shape.
-    outline_nodes = [node for node, outline in travel_graph.nodes(data="outline") if outline is not None]
-    real_end = nearest_node(outline_nodes, ending_point)
+    real_end = nearest_node(travel_graph, ending_point, attr="outline")
     path.append(PathEdge((ending_node, real_end), key="outline"))
 
     check_stop_flag()
@@ -878,12 +1141,32 @@ def collapse_sequential_outline_edges(path, graph):
     return new_path
 
 
+def get_travel_router(travel_graph, travel_edges=None):
+    """Returns the graph that travel() should find paths in.
+
+    With the csr_travel_routing setting, that's a CSRTravelGraph copy of the
+    travel graph, otherwise the travel graph itself.  travel_edges are the
+    TravelEdges the travel graph was built with, if any.
+    """
+
+    if global_settings['csr_travel_routing']:
+        arrays = travel_edges.arrays if travel_edges is not None else None
+        return CSRTravelGraph(travel_graph, arrays)
+    return travel_graph
+
+
+def shortest_travel_path(travel_graph, start, end):
+    if isinstance(travel_graph, CSRTravelGraph):
+        return travel_graph.shortest_path(start, end)
+    return networkx.shortest_path(travel_graph, start, end, weight='weight')
+
+
 def travel(shape, travel_graph, edge, running_stitch_length, running_stitch_tolerance, skip_last, underpath):
     """Create stitches to get from one point on an outline of the shape to another."""
 
     start, end = edge
     try:
-        path = networkx.shortest_path(travel_graph, start, end, weight='weight')
+        path = shortest_travel_path(travel_graph, start, end)
     except networkx.NetworkXNoPath:
         # This may not look good, but it prevents the fill from failing (which hopefully never happens)
         path = [start, end]
@@ -923,8 +1206,10 @@ def travel(shape, travel_graph, edge, running_stitch_length, running_stitch_tole
 
 @debug.time
 def path_to_stitches(shape, path, travel_graph, fill_stitch_graph, angle, row_spacing, max_stitch_length, running_stitch_length,
-                     running_stitch_tolerance, staggers, skip_last, underpath, enable_random_stitch_length, random_sigma, random_seed):
+                     running_stitch_tolerance, staggers, skip_last, underpath, enable_random_stitch_length, random_sigma, random_seed,
+                     travel_edges=None):
     path = collapse_sequential_outline_edges(path, fill_stitch_graph)
+    travel_graph = get_travel_router(travel_graph, travel_edges)
 
     stitches = []
 
@@ -8,7 +8,8 @@ from ..stitch_plan import Stitch
 from ..utils.geometry import Point, reverse_line_string
 from .auto_fill import (build_fill_stitch_graph, build_travel_graph,
                         collapse_sequential_outline_edges, fallback,
-                        find_stitch_path, graph_make_valid, travel)
+                        find_stitch_path, get_travel_router, graph_make_valid,
+                        travel)
 from .contour_fill import _make_fermat_spiral
 from .running_stitch import bean_stitch, even_running_stitch, running_stitch
 
@@ -137,6 +138,7 @@ def _get_start_end_sequence(outline, start, end):
 
 def path_to_stitches(shape, path, travel_graph, fill_stitch_graph, running_stitch_length, running_stitch_tolerance, skip_last, underpath):
     path = collapse_sequential_outline_edges(path, fill_stitch_graph)
+    travel_graph = get_travel_router(travel_graph)
 
     stitches = []
 
@@ -5,6 +5,7 @@
 
 import math
 
+import numpy as np
 import shapely
 
 from ..stitch_plan import Stitch
@@ -14,6 +15,9 @@ from ..utils import cache
 from ..utils.threading import check_stop_flag
 from .running_stitch import split_segment_random_phase
 
+# Rows shorter than this (in pixels) are where a row just touches the shape.
+MIN_RUN_LENGTH = 1e-6
+
 
 def legacy_fill(shape, angle, row_spacing, end_row_spacing, max_stitch_length, flip, reverse, staggers, skip_last):
     rows_of_segments = intersect_region_with_grating(shape, angle, row_spacing, end_row_spacing, flip)
@@ -152,43 +156,73 @@ def intersect_region_with_grating(shape, angle, row_spacing, end_row_spacing=Non
     # fill regions at the same angle and spacing always line up nicely.
     start -= (start + normal * center) % row_spacing
 
+    row_positions = []
     current_row_y = start
-    rows = []
     while current_row_y < end:
-        check_stop_flag()
+        row_positions.append(current_row_y)
 
-        p0 = center + normal * current_row_y + direction * half_length
-        p1 = center + normal * current_row_y - direction * half_length
-        endpoints = [p0.as_tuple(), p1.as_tuple()]
-        grating_line = shapely.geometry.LineString(endpoints)
+        if end_row_spacing:
+            current_row_y += row_spacing + (end_row_spacing - row_spacing) * ((current_row_y - start) / height)
+        else:
+            current_row_y += row_spacing
 
-        res = grating_line.intersection(shape)
+    if not row_positions:
+        return []
 
-        if res.geom_type in ["MultiLineString", "GeometryCollection"]:
-            runs = [line_string.coords for line_string in res.geoms if line_string.geom_type == "LineString"]
-        elif res.geom_type in ["Point", "MultiPoint"] or res.is_empty:
-            # ignore if we intersected at a single point or no points
-            runs = []
-        else:
-            runs = [res.coords]
+    # Build all grating lines at once and intersect them with the shape in a
+    # single call.  The arithmetic is done in the same order as with Points,
+    # so the lines are exactly the same.
+    row_positions = np.array(row_positions)
+    row_centers = np.column_stack((center.x + normal.x * row_positions, center.y + normal.y * row_positions))
+    offset = np.array([direction.x * half_length, direction.y * half_length])
+    grating_lines = shapely.linestrings(np.stack((row_centers + offset, row_centers - offset), axis=1))
+
+    check_stop_flag()
+    intersections = _intersect_lines_with_shape(grating_lines, shape)
+    check_stop_flag()
 
+    rows = []
+    for res in intersections:
+        runs = _intersection_to_runs(res, minx, miny, flip)
         if runs:
-            runs.sort(key=lambda seg: (InkstitchPoint(*seg[0]) - upper_left).length())
+            rows.append(runs)
 
-            if flip:
-                runs.reverse()
-                runs = [tuple(reversed(run)) for run in runs]
+    return rows
 
-            rows.append(runs)
 
-        if end_row_spacing:
-            current_row_y += row_spacing + (end_row_spacing - row_spacing) * ((current_row_y - start) / height)
-        else:
-            current_row_y += row_spacing
+def _intersect_lines_with_shape(lines, shape):
+    was_prepared = shapely.is_prepared(shape)
+    shapely.prepare(shape)
+    try:
+        # Most rows intersect with the shape, but skipping the ones that
+        # don't is cheap with a prepared shape.
+        intersecting_lines = lines[shapely.intersects(lines, shape)]
+        return shapely.intersection(intersecting_lines, shape)
+    finally:
+        if not was_prepared:
+            shapely.destroy_prepared(shape)
+
+
+def _intersection_to_runs(res, minx, miny, flip):
+    # A row that only touches a vertex can come out as a tiny line instead of
+    # a point, depending on rounding.  Treat those as points, too.
+    if res.geom_type in ["MultiLineString", "GeometryCollection"]:
+        runs = [line_string.coords for line_string in res.geoms
+                if line_string.geom_type == "LineString" and line_string.length > MIN_RUN_LENGTH]
+    elif res.geom_type in ["Point", "MultiPoint"] or res.is_empty or res.length <= MIN_RUN_LENGTH:
+        # ignore if we intersected at a single point or no points
+        return []
+    else:
+        runs = [res.coords]
 
-        check_stop_flag()
+    if len(runs) > 1:
+        runs.sort(key=lambda seg: ((seg[0][0] - minx) ** 2 + (seg[0][1] - miny) ** 2) ** 0.5)
 
-    return rows
+    if flip:
+        runs.reverse()
+        runs = [tuple(reversed(run)) for run in runs]
+
+    return runs
 
 
 def section_to_stitches(group_of_segments, angle, row_spacing, max_stitch_length, staggers, skip_last):
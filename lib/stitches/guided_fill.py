@@ -19,7 +19,7 @@ from ..utils.threading import check_stop_flag
 from .running_stitch import random_running_stitch
 from .auto_fill import (auto_fill, build_fill_stitch_graph, build_travel_graph,
                         collapse_sequential_outline_edges, find_stitch_path,
-                        graph_make_valid, travel)
+                        get_travel_router, graph_make_valid, travel)
 
 
 def guided_fill(shape,
@@ -74,6 +74,7 @@ def path_to_stitches(shape, path, travel_graph, fill_stitch_graph,
                      stitch_length, running_stitch_length, running_stitch_tolerance, skip_last,
                      underpath):
     path = collapse_sequential_outline_edges(path, fill_stitch_graph)
+    travel_graph = get_travel_router(travel_graph)
 
     stitches = []
 
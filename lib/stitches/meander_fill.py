@@ -110,7 +110,7 @@ def generate_meander_path(graph, start, end, rng):
     graph_nodes = set(graph) - set(path)
 
     edges_to_consider = list(path_edges)
-    meander_path = path_edges
+    meander_path = MeanderPath(path_edges)
     while edges_to_consider:
         while edges_to_consider:
             check_stop_flag()
@@ -118,7 +118,8 @@ def generate_meander_path(graph, start, end, rng):
             edge = poprandom(edges_to_consider, rng)
             edges_to_consider.extend(replace_edge(meander_path, edge, graph, graph_nodes))
 
-        edge_pairs = list(zip(meander_path[:-1], meander_path[1:]))
+        path_edges = list(meander_path)
+        edge_pairs = list(zip(path_edges[:-1], path_edges[1:]))
         while edge_pairs:
             check_stop_flag()
 
@@ -129,44 +130,104 @@ def generate_meander_path(graph, start, end, rng):
                 break
 
     debug.log_graph(graph, "remaining graph", "#FF0000")
-    points = path_to_points(meander_path)
+    points = path_to_points(list(meander_path))
     debug.log_line_string(LineString(points), "meander path", "#00FF00")
 
     return points
 
 
+class MeanderPath:
+    """The meander path as a linked list of edges.
+
+    Edges are (start, end) node tuples.  An edge is removed from the graph
+    as soon as it becomes part of the path, so no edge is in the path twice
+    and we can use the edges themselves to look up their neighbors.
+    """
+
+    def __init__(self, edges):
+        self.first = edges[0]
+        self.next_edge = dict(zip(edges[:-1], edges[1:]))
+        self.previous_edge = dict(zip(edges[1:], edges[:-1]))
+
+    def __iter__(self):
+        edge = self.first
+        while edge is not None:
+            yield edge
+            edge = self.next_edge.get(edge)
+
+    def replace(self, first_edge, last_edge, new_edges):
+        """Replace the edges from first_edge to last_edge with new_edges."""
+
+        previous_edge = self.previous_edge.pop(first_edge, None)
+        next_edge = self.next_edge.pop(last_edge, None)
+        edge = first_edge
+        while edge != last_edge:
+            edge = self.next_edge.pop(edge)
+            del self.previous_edge[edge]
+
+        self.next_edge.update(zip(new_edges[:-1], new_edges[1:]))
+        self.previous_edge.update(zip(new_edges[1:], new_edges[:-1]))
+        if previous_edge is None:
+            self.first = new_edges[0]
+        else:
+            self.next_edge[previous_edge] = new_edges[0]
+            self.previous_edge[new_edges[0]] = previous_edge
+        if next_edge is not None:
+            self.next_edge[new_edges[-1]] = next_edge
+            self.previous_edge[next_edge] = new_edges[-1]
+
+
+def find_detour(graph, graph_nodes, start, end, min_length, max_length):
+    """Find a path from start to end that only passes through graph_nodes.
+
+    This returns the first path of min_length to max_length edges in the
+    order nx.all_simple_edge_paths() would find it on the subgraph of
+    graph_nodes, start and end, but without building that subgraph.  The
+    depth-first search only ever looks at the neighborhood of start.
+    """
+
+    adjacency = graph.adj
+    path = [start]
+    visited = {start}
+    stack = [iter(adjacency[start])]
+    while stack:
+        for node in stack[-1]:
+            if node == end:
+                if len(path) >= min_length:
+                    path.append(end)
+                    return list(zip(path[:-1], path[1:]))
+            elif node in graph_nodes and node not in visited and len(path) < max_length:
+                path.append(node)
+                visited.add(node)
+                stack.append(iter(adjacency[node]))
+                break
+        else:
+            stack.pop()
+            visited.discard(path.pop())
+
+    return None
+
+
 def replace_edge(path, edge, graph, graph_nodes):
-    subgraph = graph.subgraph(graph_nodes | set(edge))
-    new_path = None
-    for new_path in nx.all_simple_edge_paths(subgraph, edge[0], edge[1], 7):
-        if len(new_path) > 1:
-            break
-    if new_path is None or len(new_path) == 1:
+    new_path = find_detour(graph, graph_nodes, edge[0], edge[1], 2, 7)
+    if new_path is None:
         return []
-    i = path.index(edge)
-    path[i:i + 1] = new_path
+    path.replace(edge, edge, new_path)
     graph.remove_edges_from(new_path)
     # do I need to remove the last one too?
     graph_nodes.difference_update(start for start, end in new_path)
-    # debug.log(f"found new path of length {len(new_path)} at position {i}")
 
     return new_path
 
 
 def replace_edge_pair(path, edge1, edge2, graph, graph_nodes):
-    subgraph = graph.subgraph(graph_nodes | {edge1[0], edge2[1]})
-    new_path = None
-    for new_path in nx.all_simple_edge_paths(subgraph, edge1[0], edge2[1], 10):
-        if len(new_path) > 2:
-            break
-    if new_path is None or len(new_path) <= 2:
+    new_path = find_detour(graph, graph_nodes, edge1[0], edge2[1], 3, 10)
+    if new_path is None:
         return []
-    i = path.index(edge1)
-    path[i:i + 2] = new_path
+    path.replace(edge1, edge2, new_path)
     graph.remove_edges_from(new_path)
     # do I need to remove the last one too?
     graph_nodes.difference_update(start for start, end in new_path)
-    # debug.log(f"found new pair path of length {len(new_path)} at position {i}")
 
     return new_path
 
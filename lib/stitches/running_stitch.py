@@ -77,158 +77,206 @@ def split_segment_stagger_phase(a, b, segment_length: float, num_staggers: int,
     return [line.interpolate(x, normalized=False) for x in splits]
 
 
-class AngleInterval():
-    # Modular interval containing either the entire circle or less than half of it
-    # partially based on https://fgiesen.wordpress.com/2015/09/24/intervals-in-modular-arithmetic/
-
-    def __init__(self, a: float, b: float, all: bool = False):
-        self.isAll = all
-        self.a = a
-        self.b = b
-
-    @staticmethod
-    def all():
-        return AngleInterval(0, math.tau, True)
-
-    @staticmethod
-    def fromBall(p: Point, epsilon: float):
-        d = p.length()
-        if d <= epsilon:
-            return AngleInterval.all()
-        center = p.angle()
-        delta = math.asin(epsilon / d)
-        return AngleInterval(center - delta, center + delta)
-
-    @staticmethod
-    def fromSegment(a: Point, b: Point):
-        angleA = a.angle()
-        angleB = b.angle()
-        diff = (angleB - angleA) % tau
-        if diff == 0 or diff == math.pi:
-            return None
-        elif diff < math.pi:
-            return AngleInterval(angleA - 1e-6, angleB + 1e-6)
-            # slightly larger than normal to avoid rounding error when this method is used in cutSegment
-        else:
-            return AngleInterval(angleB - 1e-6, angleA + 1e-6)
+# The running stitch engine works on (N, 2) arrays of coordinates.  The
+# sleeve fitting below is inherently sequential, so it loops over plain
+# floats, which is much faster than creating a Point for every step.
+#
+# A sleeve is a modular interval of angles (is_all, a, b) containing either
+# the entire circle or less than half of it, partially based on
+# https://fgiesen.wordpress.com/2015/09/24/intervals-in-modular-arithmetic/
+
+_ALL_ANGLES = (True, 0.0, tau)
+
+
+def _contains_angle(interval, angle: float) -> bool:
+    is_all, a, b = interval
+    if is_all:
+        return True
+    return (angle - a) % tau <= (b - a) % tau
+
+
+def _angles_from_ball(x: float, y: float, epsilon: float):
+    d = (x ** 2 + y ** 2) ** 0.5
+    if d <= epsilon:
+        return _ALL_ANGLES
+    center = math.atan2(y, x)
+    delta = math.asin(epsilon / d)
+    return (False, center - delta, center + delta)
+
+
+def _angles_from_segment(ax: float, ay: float, bx: float, by: float):
+    angle_a = math.atan2(ay, ax)
+    angle_b = math.atan2(by, bx)
+    diff = (angle_b - angle_a) % tau
+    if diff == 0 or diff == math.pi:
+        return None
+    # slightly larger than normal to avoid rounding error when this is used in _cut_sleeve()
+    elif diff < math.pi:
+        return (False, angle_a - 1e-6, angle_b + 1e-6)
+    else:
+        return (False, angle_b - 1e-6, angle_a + 1e-6)
 
-    def containsAngle(self, angle: float):
-        if self.isAll:
-            return True
-        return (angle - self.a) % tau <= (self.b - self.a) % tau
 
-    def containsPoint(self, p: Point):
-        return self.containsAngle(math.atan2(p.y, p.x))
+def _intersect_angles(interval, other):
+    # assume that each interval contains less than half the circle (or all of it)
+    if interval[0]:
+        return other
+    elif other[0]:
+        return interval
 
-    def intersect(self, other):
-        # assume that each interval contains less than half the circle (or all of it)
-        if other is None:
-            return None
-        elif self.isAll:
-            return other
-        elif other.isAll:
-            return self
-        elif self.containsAngle(other.a):
-            if other.containsAngle(self.b):
-                return AngleInterval(other.a, self.b)
-            else:
-                return AngleInterval(other.a, other.b)
-        elif other.containsAngle(self.a):
-            if self.containsAngle(other.b):
-                return AngleInterval(self.a, other.b)
-            else:
-                return AngleInterval(self.a, self.b)
+    a, b = interval[1], interval[2]
+    other_a, other_b = other[1], other[2]
+    if _contains_angle(interval, other_a):
+        if _contains_angle(other, b):
+            return (False, other_a, b)
         else:
-            return None
-
-    def cutSegment(self, origin: Point, a: Point, b: Point):
-        if self.isAll:
-            return None
-        segArc = AngleInterval.fromSegment(a - origin, b - origin)
-        if segArc is None:
-            return a  # b is exactly behind origin from a
-        if segArc.containsAngle(self.a):
-            return cut_segment_with_angle(origin, self.a, a, b)
-        elif segArc.containsAngle(self.b):
-            return cut_segment_with_angle(origin, self.b, a, b)
+            return other
+    elif _contains_angle(other, a):
+        if _contains_angle(interval, other_b):
+            return (False, a, other_b)
         else:
-            return None
+            return interval
+    else:
+        # We only intersect the sleeve with a ball around a point inside of
+        # it, so the two always overlap.
+        return interval
+
+
+def _cut_sleeve(sleeve, ox: float, oy: float, ax: float, ay: float, bx: float, by: float):
+    # Find where the segment from a to b leaves the sleeve around origin.
+    segment_angles = _angles_from_segment(ax - ox, ay - oy, bx - ox, by - oy)
+    if segment_angles is None:
+        return ax, ay  # b is exactly behind origin from a
+    if _contains_angle(segment_angles, sleeve[1]):
+        return cut_segment_with_angle(ox, oy, sleeve[1], ax, ay, bx, by)
+    elif _contains_angle(segment_angles, sleeve[2]):
+        return cut_segment_with_angle(ox, oy, sleeve[2], ax, ay, bx, by)
+    else:
+        # a is inside the sleeve and b is outside, so this doesn't happen
+        # short of rounding errors.  Stopping at a keeps us in the sleeve.
+        return ax, ay
 
 
-def cut_segment_with_angle(origin: Point, angle: float, a: Point, b: Point) -> Point:
+def cut_segment_with_angle(ox: float, oy: float, angle: float, ax: float, ay: float, bx: float, by: float) -> typing.Tuple[float, float]:
     # Assumes the crossing is inside the segment
-    p = a - origin
-    d = b - a
-    c = Point(math.cos(angle), math.sin(angle))
-    t = (p.y*c.x - p.x*c.y) / (d.x*c.y - d.y*c.x)
+    px = ax - ox
+    py = ay - oy
+    dx = bx - ax
+    dy = by - ay
+    cx = math.cos(angle)
+    cy = math.sin(angle)
+    t = (py*cx - px*cy) / (dx*cy - dy*cx)
     if t < -0.000001 or t > 1.000001:
-        raise Exception("cut_segment_with_angle returned a parameter of {0} with points {1} {2} and cut line {3} ".format(t, p, b-origin, c))
-    return a + d*t
+        raise Exception("cut_segment_with_angle returned a parameter of {0} with points {1} {2} and cut line {3} ".format(
+            t, (px, py), (bx - ox, by - oy), (cx, cy)))
+    return ax + dx*t, ay + dy*t
 
 
-def cut_segment_with_circle(origin: Point, r: float, a: Point, b: Point) -> Point:
+def cut_segment_with_circle(ox: float, oy: float, r: float, ax: float, ay: float, bx: float, by: float) -> typing.Tuple[float, float]:
     # assumes that a is inside the circle and b is outside
-    p = a - origin
-    d = b - a
+    px = ax - ox
+    py = ay - oy
+    dx = bx - ax
+    dy = by - ay
     # inner products
-    p2 = p * p
-    d2 = d * d
+    p2 = px*px + py*py
+    d2 = dx*dx + dy*dy
     r2 = r * r
-    pd = p * d
+    pd = px*dx + py*dy
     # r2 = p2 + 2*pd*t + d2*t*t, quadratic formula
     t = (math.sqrt(pd*pd + r2*d2 - p2*d2) - pd) / d2
     if t < -0.000001 or t > 1.000001:
         raise Exception("cut_segment_with_circle returned a parameter of {0}".format(t))
-    return a + d*t
+    return ax + dx*t, ay + dy*t
 
 
-def take_stitch(start: Point, points: typing.Sequence[Point], idx: int, stitch_length: float, tolerance: float) -> \
-        typing.Tuple[typing.Optional[Point], typing.Optional[int]]:
+def take_stitch(start: typing.Tuple[float, float], xs: typing.Sequence[float], ys: typing.Sequence[float], idx: int,
+                stitch_length: float, tolerance: float) -> typing.Tuple[typing.Optional[typing.Tuple[float, float]], typing.Optional[int]]:
     # Based on a single step of the Zhao-Saalfeld curve simplification algorithm.
     # https://cartogis.org/docs/proceedings/archive/auto-carto-13/pdf/linear-time-sleeve-fitting-polyline-simplification-algorithms.pdf
     # Adds early termination condition based on stitch length.
-    if idx >= len(points):
+    if idx >= len(xs):
         return None, None
 
-    sleeve = AngleInterval.all()
-    last = start
-    for i in range(idx, len(points)):
-        p = points[i]
-        if sleeve.containsPoint(p - start):
-            if start.distance(p) < stitch_length:
-                sleeve = sleeve.intersect(AngleInterval.fromBall(p - start, tolerance))
-                last = p
+    sx, sy = start
+    sleeve = _ALL_ANGLES
+    last_x, last_y = sx, sy
+    for i in range(idx, len(xs)):
+        x = xs[i]
+        y = ys[i]
+        dx = x - sx
+        dy = y - sy
+        if sleeve[0] or _contains_angle(sleeve, math.atan2(dy, dx)):
+            if (dx ** 2 + dy ** 2) ** 0.5 < stitch_length:
+                sleeve = _intersect_angles(sleeve, _angles_from_ball(dx, dy, tolerance))
+                last_x, last_y = x, y
                 continue
             else:
-                cut = cut_segment_with_circle(start, stitch_length, last, p)
-                return cut, i
+                return cut_segment_with_circle(sx, sy, stitch_length, last_x, last_y, x, y), i
         else:
-            cut = sleeve.cutSegment(start, last, p)
-            if start.distance(cut) > stitch_length:
-                cut = cut_segment_with_circle(start, stitch_length, last, p)
-            return cut, i
-    return points[-1], None
+            cut_x, cut_y = _cut_sleeve(sleeve, sx, sy, last_x, last_y, x, y)
+            if ((cut_x - sx) ** 2 + (cut_y - sy) ** 2) ** 0.5 > stitch_length:
+                return cut_segment_with_circle(sx, sy, stitch_length, last_x, last_y, x, y), i
+            return (cut_x, cut_y), i
+    return (xs[-1], ys[-1]), None
+
+
+# Most of the time goes into fitting the sleeves, which loops over floats
+# either way.  Below this many points, converting to and from arrays costs
+# more than NumPy saves, so shorter lists of points (like most travel and
+# underpath runs) are handled with plain lists of floats instead.  Both
+# ways give exactly the same stitches.
+MIN_POINTS_FOR_ARRAYS = 1000
+
+
+def _as_coordinates(points) -> np.ndarray:
+    if isinstance(points, np.ndarray):
+        return points.astype(float, copy=False).reshape(-1, 2)
+    return np.array([(point[0], point[1]) for point in points], dtype=float).reshape(-1, 2)
+
 
+def _segment_lengths(coordinates: np.ndarray) -> np.ndarray:
+    deltas = np.diff(coordinates, axis=0)
+    return np.sqrt(deltas[:, 0] * deltas[:, 0] + deltas[:, 1] * deltas[:, 1])
 
-def stitch_curve_evenly(points: typing.Sequence[Point], stitch_length: float, tolerance: float) -> typing.List[Point]:
+
+def _lengths_left(xs: typing.List[float], ys: typing.List[float]) -> typing.List[float]:
+    # the length of the curve from each point to the end, like stitch_curve_evenly() does with NumPy
+    lengths_left = [0.0] * len(xs)
+    for i in range(len(xs) - 2, -1, -1):
+        dx = xs[i + 1] - xs[i]
+        dy = ys[i + 1] - ys[i]
+        lengths_left[i] = lengths_left[i + 1] + math.sqrt(dx * dx + dy * dy)
+    return lengths_left
+
+
+def stitch_curve_evenly(points, stitch_length: float, tolerance: float) -> np.ndarray:
     # Will split a straight line into even-length stitches while still handling curves correctly.
+    # Takes an (N, 2) array (or a sequence of points) and returns an (M, 2) array.
     # Includes end point but not start point.
-    if len(points) < 2:
-        return []
-    distLeft = [0] * len(points)
-    for j in reversed(range(0, len(points) - 1)):
-        distLeft[j] = distLeft[j + 1] + points[j].distance(points[j+1])
+    coordinates = _as_coordinates(points)
+    if len(coordinates) < 2:
+        return np.empty((0, 2))
 
+    # the length of the curve from each point to the end
+    distances = np.zeros(len(coordinates))
+    distances[:-1] = np.cumsum(_segment_lengths(coordinates)[::-1])[::-1]
+    stitches = _stitch_curve_evenly(coordinates[:, 0].tolist(), coordinates[:, 1].tolist(), distances.tolist(), stitch_length, tolerance)
+    return np.array(stitches, dtype=float).reshape(-1, 2)
+
+
+def _stitch_curve_evenly(xs: typing.List[float], ys: typing.List[float], dist_left: typing.List[float],
+                         stitch_length: float, tolerance: float) -> typing.List[typing.Tuple[float, float]]:
     i: typing.Optional[int] = 1
-    last = points[0]
-    stitches: typing.List[Point] = []
-    while i is not None and i < len(points):
-        d = last.distance(points[i]) + distLeft[i]
+    last = (xs[0], ys[0])
+    stitches: typing.List[typing.Tuple[float, float]] = []
+    while i is not None and i < len(xs):
+        d = ((xs[i] - last[0]) ** 2 + (ys[i] - last[1]) ** 2) ** 0.5 + dist_left[i]
         if d == 0:
-            return stitches
+            break
         stitch_len = d / math.ceil(d / stitch_length) + 0.000001  # correction for rounding error
 
-        stitch, newidx = take_stitch(last, points, i, stitch_len, tolerance)
+        stitch, newidx = take_stitch(last, xs, ys, i, stitch_len, tolerance)
         i = newidx
         if stitch is not None:
             stitches.append(stitch)
@@ -236,98 +284,221 @@ def stitch_curve_evenly(points: typing.Sequence[Point], stitch_length: float, to
     return stitches
 
 
-def stitch_curve_randomly(points: typing.Sequence[Point], stitch_length: float, tolerance: float, stitch_length_sigma: float, random_seed: str) ->\
-      typing.List[Point]:
-    min_stitch_length = max(0, stitch_length * (1 - stitch_length_sigma))
-    max_stitch_length = stitch_length * (1 + stitch_length_sigma)
+def stitch_curve_randomly(points, stitch_length: float, tolerance: float, stitch_length_sigma: float, random_seed: str) -> np.ndarray:
     # Will split a straight line into stitches of random length within the range.
     # Attempts to randomize phase so that the distribution of outputs does not depend on direction.
+    # Takes an (N, 2) array (or a sequence of points) and returns an (M, 2) array.
     # Includes end point but not start point.
-    if len(points) < 2:
-        return []
+    coordinates = _as_coordinates(points)
+    if len(coordinates) < 2:
+        return np.empty((0, 2))
+    stitches = _stitch_curve_randomly(coordinates[:, 0].tolist(), coordinates[:, 1].tolist(),
+                                      stitch_length, tolerance, stitch_length_sigma, random_seed)
+    return np.array(stitches, dtype=float).reshape(-1, 2)
+
+
+def _stitch_curve_randomly(xs: typing.List[float], ys: typing.List[float], stitch_length: float, tolerance: float,
+                           stitch_length_sigma: float, random_seed: str) -> typing.List[typing.Tuple[float, float]]:
+    min_stitch_length = max(0, stitch_length * (1 - stitch_length_sigma))
+    max_stitch_length = stitch_length * (1 + stitch_length_sigma)
 
     i: typing.Optional[int] = 1
-    last = points[0]
+    last = (xs[0], ys[0])
     last_shortened = 0.0
-    stitches = []
+    stitches: typing.List[typing.Tuple[float, float]] = []
     rand_iter = iter(prng.iter_uniform_floats(random_seed))
-    while i is not None and i < len(points):
+    while i is not None and i < len(xs):
         r = next(rand_iter)
         # If the last stitch was shortened due to tolerance (or this is the first stitch),
         # reduce the lower length limit to randomize the phase. This prevents moiré and asymmetry.
         stitch_len = lerp(last_shortened, 1.0, r) * lerp(min_stitch_length, max_stitch_length, r)
 
-        stitch, newidx = take_stitch(last, points, i, stitch_len, tolerance)
+        stitch, newidx = take_stitch(last, xs, ys, i, stitch_len, tolerance)
         i = newidx
         if stitch is not None:
             stitches.append(stitch)
-            last_shortened = min(last.distance(stitch) / stitch_len, 1.0)
+            last_shortened = min(((stitch[0] - last[0]) ** 2 + (stitch[1] - last[1]) ** 2) ** 0.5 / stitch_len, 1.0)
             last = stitch
     return stitches
 
 
-def path_to_curves(points: typing.List[Point], min_len: float):
-    # split a path at obvious corner points so that they get stitched exactly
+def split_path_at_corners(coordinates: np.ndarray, min_len: float) -> typing.List[typing.Tuple[int, int]]:
+    # Find the obvious corner points of an (N, 2) array of coordinates so that they get stitched exactly.
+    # Returns (start, end) index pairs of the curves between them, both inclusive.
     # min_len controls the minimum length after splitting for which it won't split again,
     # which is used to avoid creating large numbers of corner points when encouintering micro-messes.
-    if len(points) < 3:
-        return [points]
+    if len(coordinates) < 3:
+        return [(0, len(coordinates) - 1)]
+
+    segments = np.diff(coordinates, axis=0)
+    squared_lengths = segments[:, 0] * segments[:, 0] + segments[:, 1] * segments[:, 1]
+
+    # The segment before each point is the last one that has a length, or
+    # the first one if there is none.
+    indices = np.arange(len(segments))
+    previous = np.maximum.accumulate(np.where(squared_lengths > 0, indices, 0))[:-1]
+    a = segments[previous]
+    b = segments[1:]
+    aabb = squared_lengths[previous] * squared_lengths[1:]
+    ab = a[:, 0] * b[:, 0] + a[:, 1] * b[:, 1]
+    abab = ab * np.abs(ab)
+
+    # Test if the turn angle from vectors a to b is more than 45 degrees.
+    # Optimized version of checking if cos(angle(a,b)) <= sqrt(0.5) and is defined
+    corners = ((aabb > 0) & (abab <= 0.5 * aabb)).tolist()
+    lengths = np.sqrt(squared_lengths).tolist()
+
+    return _curves_between_corners(corners, lengths, min_len)
+
+
+def _split_lists_at_corners(xs: typing.List[float], ys: typing.List[float], min_len: float) -> typing.List[typing.Tuple[int, int]]:
+    # split_path_at_corners() for lists of floats
+    if len(xs) < 3:
+        return [(0, len(xs) - 1)]
+
+    corners = []
+    lengths = []
+    last_x = xs[1] - xs[0]
+    last_y = ys[1] - ys[0]
+    last_squared_length = last_x * last_x + last_y * last_y
+    lengths.append(math.sqrt(last_squared_length))
+    for i in range(1, len(xs) - 1):
+        x = xs[i + 1] - xs[i]
+        y = ys[i + 1] - ys[i]
+        squared_length = x * x + y * y
+        aabb = last_squared_length * squared_length
+        ab = last_x * x + last_y * y
+        corners.append(aabb > 0 and ab * abs(ab) <= 0.5 * aabb)
+        lengths.append(math.sqrt(squared_length))
+        if squared_length > 0:
+            last_x, last_y, last_squared_length = x, y, squared_length
+
+    return _curves_between_corners(corners, lengths, min_len)
+
+
+def _curves_between_corners(corners: typing.List[bool], lengths: typing.List[float], min_len: float) -> typing.List[typing.Tuple[int, int]]:
+    # corners[i - 1] tells whether point i is a corner, lengths[i] is the length of the segment after point i
     curves = []
-
     last = 0
-    last_seg = points[1] - points[0]
-    seg_len = last_seg.length()
-    for i in range(1, len(points) - 1):
-        # vectors of the last and next segments
-        a = last_seg
-        b = points[i + 1] - points[i]
-        aabb = (a * a) * (b * b)
-        abab = (a * b) * abs(a * b)
-
-        # Test if the turn angle from vectors a to b is more than 45 degrees.
-        # Optimized version of checking if cos(angle(a,b)) <= sqrt(0.5) and is defined
-        if aabb > 0 and abab <= 0.5 * aabb:
+    seg_len = lengths[0]
+    for i in range(1, len(lengths)):
+        if corners[i - 1]:
             if seg_len >= min_len:
-                curves.append(points[last: i + 1])
+                curves.append((last, i))
                 last = i
             seg_len = 0
+        seg_len += lengths[i]
 
-        if b * b > 0:
-            last_seg = b
-        seg_len += b.length()
-
-    curves.append(points[last:])
+    curves.append((last, len(lengths)))
     return curves
 
 
+def path_to_curves(points: typing.Sequence[Point], min_len: float):
+    # split a path at obvious corner points so that they get stitched exactly
+    return [points[start:end + 1] for start, end in split_path_at_corners(_as_coordinates(points), min_len)]
+
+
+def _as_lists(points) -> typing.Tuple[typing.List[float], typing.List[float]]:
+    return [float(point[0]) for point in points], [float(point[1]) for point in points]
+
+
+def _stitches_to_points(points, curves, curve_stitches):
+    # Turn the stitches back into the same kind of points we were given.
+    # Where a stitch is one of the points of the path (like the end of each
+    # curve), it's that very point, so it keeps its attributes (e.g. Stitch
+    # tags).
+    point_class = type(points[0])
+    stitches = [points[0]]
+    for (start, end), coordinates in zip(curves, curve_stitches):
+        vertices: typing.Dict[typing.Tuple[float, float], typing.Any] = {}
+        for point in points[start + 1:end + 1]:
+            vertices.setdefault((point[0], point[1]), point)
+        for x, y in coordinates:
+            point = vertices.get((x, y))
+            stitches.append(point_class(x, y) if point is None else point)
+    return stitches
+
+
 def even_running_stitch(points, stitch_length, tolerance):
     # Turn a continuous path into a running stitch with as close to even stitch length as possible
     # (including the first and last segments), keeping it within the tolerance of the path.
     # This should not be used for stitching tightly-spaced parallel curves
     # as it tends to produce ugly moiré effects in those situations.
     # In these situations, random_running_stitch sould be used even if the maximum stitch length range is a single value.
+    #
+    # Takes an (N, 2) array and returns an (M, 2) array, or a list of points and returns a list of points.
+    if isinstance(points, np.ndarray):
+        return _even_running_stitch(points, stitch_length, tolerance)[0]
     if not points:
         return
-    stitches = [points[0]]
-    for curve in path_to_curves(points, 2 * tolerance):
-        # segments longer than twice the tolerance will usually be forced by it, so set that as the minimum for corner detection
+
+    if len(points) < MIN_POINTS_FOR_ARRAYS:
+        xs, ys = _as_lists(points)
+        curves = _split_lists_at_corners(xs, ys, 2 * tolerance)
+        curve_stitches = []
+        for start, end in curves:
+            check_stop_flag()
+            curve_xs = xs[start:end + 1]
+            curve_ys = ys[start:end + 1]
+            curve_stitches.append(_stitch_curve_evenly(curve_xs, curve_ys, _lengths_left(curve_xs, curve_ys), stitch_length, tolerance))
+    else:
+        _, curves, curve_stitches = _even_running_stitch(_as_coordinates(points), stitch_length, tolerance)
+        curve_stitches = [stitches.tolist() for stitches in curve_stitches]
+    return _stitches_to_points(points, curves, curve_stitches)
+
+
+def _even_running_stitch(coordinates, stitch_length, tolerance):
+    coordinates = _as_coordinates(coordinates)
+    if len(coordinates) == 0:
+        return np.empty((0, 2)), [], []
+
+    # segments longer than twice the tolerance will usually be forced by it, so set that as the minimum for corner detection
+    curves = split_path_at_corners(coordinates, 2 * tolerance)
+    curve_stitches = []
+    for start, end in curves:
         check_stop_flag()
-        stitches.extend(stitch_curve_evenly(curve, stitch_length, tolerance))
-    return stitches
+        curve_stitches.append(stitch_curve_evenly(coordinates[start:end + 1], stitch_length, tolerance))
+    return np.concatenate([coordinates[:1]] + curve_stitches), curves, curve_stitches
 
 
 def random_running_stitch(points, stitch_length, tolerance, stitch_length_sigma, random_seed):
     # Turn a continuous path into a running stitch with randomized phase and stitch length,
     # keeping it within the tolerance of the path.
     # This is suitable for tightly-spaced parallel curves.
+    #
+    # Takes an (N, 2) array and returns an (M, 2) array, or a list of points and returns a list of points.
+    if isinstance(points, np.ndarray):
+        return _random_running_stitch(points, stitch_length, tolerance, stitch_length_sigma, random_seed)[0]
     if not points:
         return
-    stitches = [points[0]]
-    for i, curve in enumerate(path_to_curves(points, 2 * tolerance)):
-        # segments longer than twice the tolerance will usually be forced by it, so set that as the minimum for corner detection
+
+    if len(points) < MIN_POINTS_FOR_ARRAYS:
+        xs, ys = _as_lists(points)
+        curves = _split_lists_at_corners(xs, ys, 2 * tolerance)
+        curve_stitches = []
+        for i, (start, end) in enumerate(curves):
+            check_stop_flag()
+            curve_stitches.append(_stitch_curve_randomly(xs[start:end + 1], ys[start:end + 1], stitch_length, tolerance, stitch_length_sigma,
+                                                         prng.join_args(random_seed, i)))
+    else:
+        _, curves, curve_stitches = _random_running_stitch(_as_coordinates(points), stitch_length, tolerance, stitch_length_sigma, random_seed)
+        curve_stitches = [stitches.tolist() for stitches in curve_stitches]
+    return _stitches_to_points(points, curves, curve_stitches)
+
+
+def _random_running_stitch(coordinates, stitch_length, tolerance, stitch_length_sigma, random_seed):
+    coordinates = _as_coordinates(coordinates)
+    if len(coordinates) == 0:
+        return np.empty((0, 2)), [], []
+
+    # segments longer than twice the tolerance will usually be forced by it, so set that as the minimum for corner detection
+    curves = split_path_at_corners(coordinates, 2 * tolerance)
+    curve_stitches = []
+    for i, (start, end) in enumerate(curves):
         check_stop_flag()
-        stitches.extend(stitch_curve_randomly(curve, stitch_length, tolerance, stitch_length_sigma, prng.join_args(random_seed, i)))
-    return stitches
+        curve_stitches.append(stitch_curve_randomly(coordinates[start:end + 1], stitch_length, tolerance, stitch_length_sigma,
+                                                    prng.join_args(random_seed, i)))
+    return np.concatenate([coordinates[:1]] + curve_stitches), curves, curve_stitches
 
 
 def running_stitch(points, stitch_length, tolerance, is_random, stitch_length_sigma, random_seed):
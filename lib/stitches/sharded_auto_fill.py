@@ -0,0 +1,162 @@
+# Authors: see git history
+#
+# Copyright (c) 2026 Authors
+# Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
+
+import math
+import multiprocessing
+from typing import Any, Dict, List
+
+import numpy as np
+import shapely
+from shapely import geometry as shgeo
+from shapely.ops import nearest_points
+
+from ..debug.debug import debug
+from ..stitch_plan import Stitch
+from ..utils.clamp_path import clamp_path_to_polygon
+from ..utils.geometry import Point as InkstitchPoint
+from ..utils.prng import join_args
+from ..utils.threading import can_fork, check_stop_flag
+from .auto_fill import auto_fill
+from .running_stitch import even_running_stitch
+
+# The auto_fill() arguments for each strip.  Worker processes are forked, so
+# they inherit this and we only need to send them indices.  That also keeps
+# the precision grid of the shapes, which pickling would lose.
+_jobs: List[Dict[str, Any]] = []
+
+
+@debug.time
+def sharded_auto_fill(shape, angle, row_spacing, max_strip_area, processes, running_stitch_length, running_stitch_tolerance,
+                      starting_point=None, ending_point=None, random_seed="", **auto_fill_args):
+    """Auto-fill a large shape in strips, using several processes.
+
+    Routing the fill takes more than linear time in the size of the shape, so
+    we split the shape into strips of about max_strip_area along the rows
+    and fill each strip separately.  The strips are cut halfway between
+    rows.  Since the rows are aligned to multiples of the row spacing, they
+    line up across strips as if the shape was filled in one piece.
+
+    Each strip ends where the next one starts, and the strips are filled in
+    worker processes if processes allows it.  The other arguments are passed
+    on to auto_fill().
+    """
+
+    strips = split_shape_into_strips(shape, angle, row_spacing, max_strip_area)
+    if len(strips) < 2:
+        return auto_fill(shape, angle, row_spacing, running_stitch_length=running_stitch_length,
+                         running_stitch_tolerance=running_stitch_tolerance, starting_point=starting_point,
+                         ending_point=ending_point, random_seed=random_seed, **auto_fill_args)
+
+    if starting_point is not None:
+        first, last = strips[0], strips[-1]
+        if last.distance(shgeo.Point(starting_point)) < first.distance(shgeo.Point(starting_point)):
+            strips.reverse()
+
+    jobs = []
+    strip_start = starting_point
+    for i, strip in enumerate(strips):
+        if i < len(strips) - 1:
+            strip_end = nearest_points(strip, strips[i + 1])[0].coords[0]
+        else:
+            strip_end = ending_point
+
+        jobs.append(dict(auto_fill_args, shape=strip, angle=angle, row_spacing=row_spacing,
+                         running_stitch_length=running_stitch_length, running_stitch_tolerance=running_stitch_tolerance,
+                         starting_point=strip_start, ending_point=strip_end, random_seed=join_args(random_seed, i)))
+        strip_start = strip_end
+
+    results = _fill_strips(jobs, processes)
+
+    stitches = []
+    for strip_stitches in results:
+        if stitches and strip_stitches:
+            stitches.extend(_travel_between_strips(shape, stitches[-1], strip_stitches[0],
+                                                   running_stitch_length, running_stitch_tolerance))
+        stitches.extend(strip_stitches)
+
+    return stitches
+
+
+def split_shape_into_strips(shape, angle, row_spacing, max_strip_area):
+    """Cut shape into strips of about max_strip_area, halfway between rows.
+
+    Returns polygons in order across the rows.  Parts of a strip that aren't
+    connected become separate polygons, in order along the rows.
+    """
+
+    strip_count = math.ceil(shape.area / max_strip_area)
+    if strip_count < 2:
+        return [shape]
+
+    # These match the grating in intersect_region_with_grating(): rows are
+    # where the projection onto the normal is a multiple of row_spacing.
+    direction = InkstitchPoint(-1, 0).rotate(-angle)
+    normal = direction.rotate(-math.pi / 2)
+    direction = np.array(direction.as_tuple())
+    normal = np.array(normal.as_tuple())
+
+    coords = shapely.get_coordinates(shape)
+    across = coords @ normal
+    along = coords @ direction
+    start, end = across.min(), across.max()
+
+    cuts = []
+    for i in range(1, strip_count):
+        cut = (math.floor((start + (end - start) * i / strip_count) / row_spacing) + 0.5) * row_spacing
+        if start < cut < end and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+    boundaries = [start - row_spacing] + cuts + [end + row_spacing]
+
+    along_start, along_end = along.min() - row_spacing, along.max() + row_spacing
+
+    strips = []
+    for strip_start, strip_end in zip(boundaries, boundaries[1:]):
+        band = shgeo.Polygon([normal * strip_start + direction * along_start,
+                              normal * strip_start + direction * along_end,
+                              normal * strip_end + direction * along_end,
+                              normal * strip_end + direction * along_start])
+        parts = [part for part in shapely.get_parts(shape.intersection(band))
+                 if part.geom_type == "Polygon" and not part.is_empty]
+        parts.sort(key=lambda part: np.array(part.centroid.coords[0]) @ direction)
+        strips.extend(parts)
+
+        check_stop_flag()
+
+    return strips
+
+
+def _fill_strips(jobs, processes):
+    global _jobs
+
+    if processes < 2 or not can_fork():
+        return [auto_fill(**job) for job in jobs]
+
+    _jobs = jobs
+    try:
+        with multiprocessing.get_context('fork').Pool(min(processes, len(jobs))) as pool:
+            results = pool.map(_fill_strip_in_worker, range(len(jobs)))
+    finally:
+        _jobs = []
+
+    # Do it here if an error occurred so that it's reported as usual.
+    return [auto_fill(**job) if result is None else result for job, result in zip(jobs, results)]
+
+
+def _fill_strip_in_worker(index):
+    try:
+        return auto_fill(**_jobs[index])
+    except BaseException:
+        # Exceptions like SystemExit would take down the worker and leave us
+        # waiting forever.
+        debug.log_exception()
+        return None
+
+
+def _travel_between_strips(shape, start, end, running_stitch_length, running_stitch_tolerance):
+    path = clamp_path_to_polygon([InkstitchPoint(start.x, start.y), InkstitchPoint(end.x, end.y)], shape)
+    stitches = [Stitch(point, tags=('auto_fill_travel',)) for point in even_running_stitch(path, running_stitch_length, running_stitch_tolerance)]
+
+    # The first and last stitch are already there.
+    return stitches[1:-1]
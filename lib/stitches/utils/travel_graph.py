@@ -0,0 +1,213 @@
+# Authors: see git history
+#
+# Copyright (c) 2010 Authors
+# Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
+
+from heapq import heappop, heappush
+
+import networkx
+import numpy as np
+
+from ...utils.threading import check_stop_flag
+
+
+class TravelEdgeArrays(object):
+    """Edges of a travel graph as integer node ids and NumPy arrays.
+
+    Most of the edges of a travel graph are the travel edges that
+    prepare_travel_edges() builds for a fill.  Converting them is most of the
+    work of building a CSRTravelGraph, so it can be done once along with
+    them, and the CSRTravelGraph only has to add the outline edges.
+    """
+
+    def __init__(self, edges):
+        # edges are (start, end, key, weight)
+        self.nodes = []
+        self.node_ids = {}
+        self.edge_ids = {}
+        sources = []
+        targets = []
+        weights = []
+
+        nodes = self.nodes
+        node_ids = self.node_ids
+        edge_ids = self.edge_ids
+        for start, end, key, weight in edges:
+            edge_id = edge_ids.get((start, end, key))
+            if edge_id is not None:
+                # like networkx, adding an edge again only updates its weight
+                weights[edge_id] = weight
+                continue
+
+            edge_id = len(weights)
+            edge_ids[(start, end, key)] = edge_id
+            edge_ids[(end, start, key)] = edge_id
+            weights.append(weight)
+
+            for node, node_list in ((start, sources), (end, targets)):
+                node_id = node_ids.get(node)
+                if node_id is None:
+                    node_id = node_ids[node] = len(nodes)
+                    nodes.append(node)
+                node_list.append(node_id)
+
+        self.sources = np.array(sources, dtype=np.intp)
+        self.targets = np.array(targets, dtype=np.intp)
+        self.weights = np.array(weights, dtype=float)
+
+
+class CSRTravelGraph(object):
+    """A copy of a travel graph in arrays, for shortest path queries.
+
+    This is a copy of the networkx travel graph built by
+    build_travel_graph().  Nodes are integer ids, and the edges are stored
+    as a CSR (compressed sparse row) adjacency: the neighbours of node i are
+    neighbours[indptr[i]:indptr[i + 1]].
+
+    Paths are found with a bidirectional Dijkstra search like networkx does,
+    so they're just as short.  The interior of a shape weighs much less per
+    length than its outline, so a heuristic based on the distance to the
+    target wouldn't tell A* much.
+
+    If travel_edges is given, it is the TravelEdgeArrays of the graph's
+    travel edges, and only the other edges are taken from the graph.
+
+    Like the networkx graph, edges can be removed with remove_edges_from().
+    """
+
+    def __init__(self, graph, travel_edges=None):
+        if travel_edges is None:
+            travel_edges = TravelEdgeArrays(graph.edges(keys=True, data='weight', default=1))
+            other_edges = TravelEdgeArrays([])
+        else:
+            # All edges other than travel edges run along the outlines.
+            outline_nodes = [node for node, outline in graph.nodes(data='outline') if outline is not None]
+            other_edges = TravelEdgeArrays((start, end, key, weight)
+                                           for start, end, key, weight in graph.edges(outline_nodes, keys=True, data='weight', default=1)
+                                           if key != 'travel')
+
+        self.nodes = list(travel_edges.nodes)
+        self.node_ids = dict(travel_edges.node_ids)
+        for node in graph.nodes:
+            if node not in self.node_ids:
+                self.node_ids[node] = len(self.nodes)
+                self.nodes.append(node)
+
+        # Parallel edges are kept separately, because they can be removed
+        # separately.
+        self.edge_ids = dict(travel_edges.edge_ids)
+        first_other_edge = len(travel_edges.weights)
+        for edge, edge_id in other_edges.edge_ids.items():
+            self.edge_ids[edge] = first_other_edge + edge_id
+
+        other_node_ids = np.array([self.node_ids[node] for node in other_edges.nodes], dtype=np.intp)
+        sources = np.concatenate((travel_edges.sources, other_node_ids[other_edges.sources]))
+        targets = np.concatenate((travel_edges.targets, other_node_ids[other_edges.targets]))
+        weights = np.concatenate((travel_edges.weights, other_edges.weights))
+
+        # each edge goes both ways
+        all_sources = np.concatenate((sources, targets))
+        order = np.argsort(all_sources, kind='stable')
+        indptr = np.searchsorted(all_sources[order], np.arange(len(self.nodes) + 1))
+
+        # Plain lists are much faster to index one item at a time.
+        self.indptr = indptr.tolist()
+        self.neighbours = np.concatenate((targets, sources))[order].tolist()
+        self.neighbour_edges = (order % len(weights) if len(weights) else order).tolist()
+        self.weights = weights.tolist()
+        self.removed = [False] * len(weights)
+
+    def remove_edges_from(self, edges):
+        """Remove edges given as (start, end, key), ignoring missing ones."""
+
+        for edge in edges:
+            edge_id = self.edge_ids.get(tuple(edge))
+            if edge_id is not None:
+                self.removed[edge_id] = True
+
+    def shortest_path(self, start, end):
+        """Find the lowest weight path from start to end.
+
+        Returns a list of nodes.  Raises networkx.NetworkXNoPath like
+        networkx.shortest_path() if there is no path.
+        """
+
+        source = self.node_ids[start]
+        target = self.node_ids[end]
+        if source == target:
+            return [start]
+
+        # One search goes forward from the source and one backward from the
+        # target.  Once the shortest distances they haven't settled yet add
+        # up to no less than the best path through a node both reached, that
+        # path is the shortest.
+        distances = ({source: 0.0}, {target: 0.0})
+        previous = ({source: None}, {target: None})
+        done = (set(), set())
+        queues = ([(0.0, source)], [(0.0, target)])
+        best_distance = float('inf')
+        meeting_node = None
+
+        while queues[0] and queues[1]:
+            if queues[0][0][0] + queues[1][0][0] >= best_distance:
+                break
+
+            # continue the search that is less far along
+            side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            distance, node = heappop(queues[side])
+            if node in done[side]:
+                continue
+            done[side].add(node)
+
+            meeting = self._relax_edges(node, distance, distances[side], previous[side], queues[side], distances[1 - side], best_distance)
+            if meeting is not None:
+                best_distance, meeting_node = meeting
+
+        if meeting_node is None:
+            raise networkx.NetworkXNoPath(f"No path between {start} and {end}.")
+
+        check_stop_flag()
+
+        path = []
+        node = meeting_node
+        while node is not None:
+            path.append(self.nodes[node])
+            node = previous[0][node]
+        path.reverse()
+
+        node = previous[1][meeting_node]
+        while node is not None:
+            path.append(self.nodes[node])
+            node = previous[1][node]
+
+        return path
+
+    def _relax_edges(self, node, distance, distances, previous, queue, other_distances, best_distance):
+        """Update the distances of node's neighbours in one of the searches.
+
+        Returns the new best distance and the node where the searches meet,
+        if there's a shorter path through one of the neighbours.
+        """
+
+        neighbours = self.neighbours
+        neighbour_edges = self.neighbour_edges
+        weights = self.weights
+        removed = self.removed
+        meeting = None
+
+        for i in range(self.indptr[node], self.indptr[node + 1]):
+            if removed[neighbour_edges[i]]:
+                continue
+
+            neighbour = neighbours[i]
+            new_distance = distance + weights[neighbour_edges[i]]
+            if new_distance < distances.get(neighbour, float('inf')):
+                distances[neighbour] = new_distance
+                previous[neighbour] = node
+                heappush(queue, (new_distance, neighbour))
+
+                if neighbour in other_distances and new_distance + other_distances[neighbour] < best_distance:
+                    best_distance = new_distance + other_distances[neighbour]
+                    meeting = (best_distance, neighbour)
+
+        return meeting
@@ -4,8 +4,9 @@
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
 from .guides import get_guides
-from .path import (apply_transforms, get_correction_transform,
-                   get_node_transform, line_strings_to_coordinate_lists,
+from .path import (apply_transforms, flatten_superpath,
+                   get_correction_transform, get_node_transform,
+                   line_strings_to_coordinate_lists,
                    line_strings_to_csp, line_strings_to_path,
                    point_lists_to_csp)
 from .rendering import color_block_to_point_lists, render_stitch_plan
@@ -3,11 +3,18 @@
 # Copyright (c) 2023 Authors
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
+from contextlib import contextmanager
+from weakref import WeakKeyDictionary
+
+import inkex
+from lxml import etree
 from shapely.geometry import MultiPolygon, Polygon
 from shapely.validation import make_valid
 
 from ..utils import ensure_multi_polygon
+from ..utils.cache import fingerprint
 from .tags import SVG_GROUP_TAG, SVG_PATH_TAG
+from .units import get_viewbox_transform
 
 
 def get_clips(node):
@@ -18,50 +25,124 @@ def get_clips(node):
     return clips
 
 
+# root -> (clip shapes by clip key, clipped shapes by tuple of clip keys)
+# see get_clip_path()
+_clip_caches: WeakKeyDictionary = WeakKeyDictionary()
+
+
 def get_clip_path(node):
-    # get clip and apply node transform
-    clip = _clip_paths(node)
-    for group in node.iterancestors(SVG_GROUP_TAG):
-        group_clip = _clip_paths(group)
+    """The intersection of the clips of node and its parent groups.
+
+    Many elements usually share the clips of their parent groups, so the
+    shape of each clip and the intersections are remembered per document.
+    They are keyed by the content of the clip, the transform it is used with
+    and its path effect (see _get_clips()), so a changed clip is picked up.
+    """
+
+    clips = _get_clips(node)
+    if not clips:
+        return
+
+    shapes, clipped_shapes = _clip_caches.setdefault(node.getroottree().getroot(), ({}, {}))
+    clip = None
+    for i, (key, clip_node) in enumerate(clips):
+        keys = tuple(key for key, clip_node in clips[:i + 1])
+        if keys in clipped_shapes:
+            clip = clipped_shapes[keys]
+            continue
+
+        if key not in shapes:
+            shapes[key] = _clip_paths(clip_node, *key[1:])
+        group_clip = shapes[key]
         if clip and group_clip:
             clip = clip.intersection(group_clip)
         elif group_clip:
             clip = group_clip
+        clipped_shapes[keys] = clip
+
     if clip:
         return ensure_multi_polygon(clip)
 
 
-def _clip_paths(node_or_group):
+def get_clip_fingerprint(node):
+    """A fingerprint of everything that goes into get_clip_path(node).
+
+    This is much cheaper than fingerprinting the clip shape, which doesn't
+    even need to be computed.
+    """
+
+    root = node.getroottree().getroot()
+    return fingerprint([get_viewbox_transform(root).matrix] + [key for key, clip_node in _get_clips(node)])
+
+
+def _get_clips(node):
+    # The clips of node and its parent groups, innermost first, as
+    # (key, clip) tuples.  Clips that are switched off by a
+    # path effect are left out.
+    chain = [node] + list(node.iterancestors())
+
+    # compose the transforms top-down like node.composed_transform() does,
+    # but only once for all parent groups
+    transforms = []
+    transform = None
+    for element in reversed(chain):
+        transform = element.transform if transform is None else transform @ element.transform
+        transforms.append(transform)
+    transforms.reverse()
+
+    clips = []
+    for element, transform in zip(chain, transforms):
+        if element is not node and element.tag != SVG_GROUP_TAG:
+            continue
+        clip = element.clip
+        if clip is None:
+            continue
+        path_effect = _get_path_effects(element)
+        if path_effect == 'ignore':
+            continue
+        key = (fingerprint(etree.tostring(clip, with_tail=False)), transform.matrix, path_effect)
+        clips.append((key, clip))
+    return clips
+
+
+def _clip_paths(clip, transform, path_effect):
     # avoid circular import for EmbroideryElement
     from ..elements import EmbroideryElement
 
-    clip = node_or_group.clip
-    if clip is None:
-        return
-    transform = node_or_group.composed_transform()
-    clip.transform = transform
-    clip_element = EmbroideryElement(clip)
-    path_effect = _get_path_effects(node_or_group)
+    transform = inkex.Transform(transform)
     clip_paths = None
-    if path_effect == 'ignore':
-        return
-    elif path_effect == 'inverse':
+    if path_effect == 'inverse':
         for path in clip.iterdescendants(SVG_PATH_TAG):
             if path.get('class', None) == 'powerclip':
-                original_transform = path.transform
-                path.transform @= transform
-                clip_element = EmbroideryElement(path)
-                clip_paths = [path for path in clip_element.paths if len(path) > 3]
-                path.transform = original_transform
+                with _transformed(path, path.transform @ transform):
+                    clip_element = EmbroideryElement(path)
+                    clip_paths = [path for path in clip_element.paths if len(path) > 3]
                 break
     else:
-        clip_paths = [path for path in clip_element.paths if len(path) > 3]
+        with _transformed(clip, transform):
+            clip_element = EmbroideryElement(clip)
+            clip_paths = [path for path in clip_element.paths if len(path) > 3]
 
     if clip_paths:
         clip_paths.sort(key=lambda point_list: Polygon(point_list).area, reverse=True)
         return make_valid(MultiPolygon([(clip_paths[0], clip_paths[1:])]))
 
 
+@contextmanager
+def _transformed(node, transform):
+    # Give node a transform for a moment.  A clip can be used by several
+    # elements, so it mustn't keep the transform of any of them.
+    original_transform = node.get('transform', None)
+    node.transform = transform
+    try:
+        yield
+    finally:
+        if original_transform is None:
+            node.attrib.pop('transform', None)
+        else:
+            node.set('transform', original_transform)
+
+
 def _get_path_effects(node):
     path_effects = node.get('inkscape:path-effect', None)
     if path_effects is not None:
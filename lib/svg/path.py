@@ -3,7 +3,10 @@
 # Copyright (c) 2010 Authors
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
+from weakref import WeakKeyDictionary
+
 import inkex
+import numpy as np
 
 from .tags import SVG_GROUP_TAG, SVG_LINK_TAG
 from .units import get_viewbox_transform
@@ -32,6 +35,44 @@ def compose_parent_transforms(node: inkex.BaseElement, mat: inkex.Transform) ->
     return mat
 
 
+# node -> (transform attribute, parent, parent's composed transform, composed transform)
+# see _get_composed_transform()
+_composed_transforms: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def _get_composed_transform(node: inkex.BaseElement) -> inkex.Transform:
+    """Compose the transforms of node and its parent groups, top-down.
+
+    This gives the same as compose_parent_transforms(node, identity), but
+    each node's composed transform is remembered and reused for its
+    children.  A remembered transform is only used while the node's
+    transform attribute and parent are the same, and its parent's composed
+    transform is still valid, so changing or moving a node anyhow is
+    picked up.
+    """
+
+    parent = node.getparent()
+    if parent is not None and parent.tag in [SVG_GROUP_TAG, SVG_LINK_TAG]:
+        parent_transform = _get_composed_transform(parent)
+    else:
+        parent_transform = None
+    attribute = node.attrib.get('transform')
+
+    cached = _composed_transforms.get(node)
+    if cached is not None and cached[0] == attribute and cached[1] is parent and cached[2] is parent_transform:
+        return cached[3]
+
+    transform = inkex.transforms.Transform()
+    trans = node.get('transform')
+    if trans:
+        transform = inkex.transforms.Transform(trans)
+    if parent_transform is not None:
+        transform = parent_transform @ transform
+
+    _composed_transforms[node] = (attribute, parent, parent_transform, transform)
+    return transform
+
+
 def get_node_transform(node: inkex.BaseElement) -> inkex.Transform:
     """
     if getattr(node, "composed_transform", None):
@@ -44,7 +85,7 @@ def get_node_transform(node: inkex.BaseElement) -> inkex.Transform:
     # this if is because sometimes inkscape likes to create paths outside of a layer?!
     if node.getparent() is not None:
         # combine this node's transform with all parent groups' transforms
-        transform = compose_parent_transforms(node, transform)
+        transform = _get_composed_transform(node) @ transform
 
     # add in the transform implied by the viewBox
     viewbox_transform = get_viewbox_transform(node.getroottree().getroot())
@@ -132,3 +173,103 @@ def line_strings_to_path(line_strings):
     return inkex.PathElement(attrib={
         "d": str(inkex.paths.CubicSuperPath(csp))
     })
+
+
+def flatten_superpath(csp, flatness=0.1):
+    """Approximate the beziers of a cubic superpath with line segments.
+
+    This gives the same points as inkex.bezier.cspsubdiv(): each bezier is
+    split in half until both of its control points are within flatness of
+    the line between its end points.  Rather than splitting one bezier at a
+    time, we test and split all beziers of all subpaths at once, one level
+    of splits after the other.
+
+    Returns a list with an (N, 2) array of points for each subpath.
+    """
+
+    subpaths = [np.array(subpath, dtype=float).reshape(-1, 3, 2) for subpath in csp]
+    if not subpaths:
+        return []
+    if all(len(subpath) < 2 for subpath in subpaths):
+        return [subpath[:, 1] for subpath in subpaths]
+
+    # the beziers as (start, control, control, end), numbered in path order
+    beziers = [np.stack((subpath[:-1, 1], subpath[:-1, 2], subpath[1:, 0], subpath[1:, 1]), axis=1) for subpath in subpaths]
+    bezier_counts = [len(subpath_beziers) for subpath_beziers in beziers]
+    beziers = np.concatenate(beziers)
+    numbers = np.arange(len(beziers))
+    starts = np.zeros(len(beziers))
+
+    done_numbers = []
+    done_starts = []
+    done_points = []
+    size = 1.0
+    # Each split brings the control points about 4 times closer to the
+    # line, so this only stops us on NaNs.
+    for level in range(64):
+        if not len(beziers):
+            break
+
+        flat = _bezier_flatness(beziers) <= flatness
+        if level == 63:
+            flat[:] = True
+        done_numbers.append(numbers[flat])
+        done_starts.append(starts[flat])
+        done_points.append(beziers[flat, 0])
+
+        beziers, numbers, starts = beziers[~flat], numbers[~flat], starts[~flat]
+        size /= 2
+        first, second = _split_beziers(beziers)
+        beziers = np.concatenate((first, second))
+        numbers = np.concatenate((numbers, numbers))
+        starts = np.concatenate((starts, starts + size))
+
+    # Each flat bezier adds its start point, in path order.
+    numbers = np.concatenate(done_numbers)
+    order = np.lexsort((np.concatenate(done_starts), numbers))
+    points = np.concatenate(done_points)[order]
+    ends = np.searchsorted(numbers[order], np.cumsum(bezier_counts))
+
+    flattened = []
+    start = 0
+    for subpath, end in zip(subpaths, ends):
+        flattened.append(np.concatenate((points[start:end], subpath[-1:, 1])))
+        start = end
+    return flattened
+
+
+def _bezier_flatness(beziers):
+    # The distance of the farther control point from the segment between the
+    # end points, calculated like inkex.bezier.maxdist().
+    start = beziers[:, 0]
+    end = beziers[:, 3]
+    vector = end - start
+    length_squared = vector[:, 0] * vector[:, 0] + vector[:, 1] * vector[:, 1]
+    length = np.hypot(vector[:, 0], vector[:, 1])
+
+    distances = []
+    for control in (beziers[:, 1], beziers[:, 2]):
+        to_control = control - start
+        dot = to_control[:, 0] * vector[:, 0] + to_control[:, 1] * vector[:, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            perpendicular = np.abs((vector[:, 0] * (start[:, 1] - control[:, 1])) - ((start[:, 0] - control[:, 0]) * vector[:, 1])) / length
+        distance = np.where(dot <= 0, np.hypot(start[:, 0] - control[:, 0], start[:, 1] - control[:, 1]),
+                            np.where(length_squared <= dot, np.hypot(end[:, 0] - control[:, 0], end[:, 1] - control[:, 1]),
+                                     perpendicular))
+        distances.append(distance)
+    return np.maximum(*distances)
+
+
+def _split_beziers(beziers):
+    # de Casteljau at t=0.5, calculated like inkex.bezier.beziersplitatt()
+    def midpoint(a, b):
+        return a + 0.5 * (b - a)
+
+    p0, p1, p2, p3 = beziers[:, 0], beziers[:, 1], beziers[:, 2], beziers[:, 3]
+    m1 = midpoint(p0, p1)
+    m2 = midpoint(p1, p2)
+    m3 = midpoint(p2, p3)
+    m4 = midpoint(m1, m2)
+    m5 = midpoint(m2, m3)
+    m = midpoint(m4, m5)
+    return np.stack((p0, m1, m4, m), axis=1), np.stack((m, m5, m3, p3), axis=1)
@@ -109,6 +109,7 @@ inkstitch_attribs = [
     'enable_random_stitch_length',
     'random_stitch_length_jitter_percent',
     'gap_fill_rows',
+    'strip_area_mm2',
     # stroke
     'stroke_method',
     'bean_stitch_repeats',
@@ -179,6 +180,7 @@ inkstitch_attribs = [
     'trim_after',
     'stop_after',
     'random_seed',
+    'random_stream',
     'manual_stitch',
     # legacy
     'grid_size',
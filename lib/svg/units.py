@@ -128,8 +128,13 @@ def get_doc_size(svg):
     return doc_width, doc_height
 
 
-@cache
 def get_viewbox_transform(node):
+    # transforms can be changed in place, so hand out a copy
+    return inkex.transforms.Transform(_get_viewbox_transform(node))
+
+
+@cache
+def _get_viewbox_transform(node):
     # somewhat cribbed from inkscape-silhouette
     doc_width, doc_height = get_doc_size(node)
 
@@ -5,7 +5,7 @@
 
 from inkex import errormsg
 
-from .commands import add_commands, ensure_symbol
+from .commands import add_commands, ensure_symbol, invalidate_command_index
 from .elements import EmbroideryElement, Stroke
 from .gui.request_update_svg_version import RequestUpdate
 from .i18n import _
@@ -265,6 +265,7 @@ def _rename_command(document, symbol, old_name, new_name):
         symbol.delete()
         ensure_symbol(document, new_name)
         _update_command(document, symbol_id, new_name)
+        invalidate_command_index(document)
 
 
 def _update_command(document, old_id, new_name):
@@ -4,11 +4,19 @@
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 import atexit
 import hashlib
+import io
 import os
 import pickle
 import sqlite3
+from collections import OrderedDict
+from functools import wraps
+from typing import (Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar,
+                    overload)
+from weakref import WeakKeyDictionary
 
 import diskcache  # type: ignore[import-untyped]
+import numpy as np
+from shapely.geometry.base import BaseGeometry
 
 from lib.utils.settings import global_settings
 
@@ -21,6 +29,110 @@ def cache(*args, **kwargs):
     return lru_cache(maxsize=None)(*args, **kwargs)
 
 
+# instance -> {(function, args, kwargs): value}, see instance_cache()
+_instance_caches: WeakKeyDictionary[Any, Dict[Tuple[Any, ...], Any]] = WeakKeyDictionary()
+
+_Method = TypeVar('_Method', bound=Callable[..., Any])
+
+
+@overload
+def instance_cache(func: _Method) -> _Method: ...
+
+
+@overload
+def instance_cache(func: None = None, depends_on: Optional[Iterable[str]] = None,
+                   param_getter: bool = False) -> Callable[[_Method], _Method]: ...
+
+
+def instance_cache(func=None, depends_on=None, param_getter=False):
+    """Memoize a method per instance.
+
+    Unlike @cache, this doesn't keep the instance alive, and the results can
+    be dropped with invalidate_instance_cache().
+
+    depends_on lists the names of what the result depends on: other cached
+    methods and properties, params, or things like 'path' and 'clip' that
+    the caller invalidates by name.  Results of methods without depends_on
+    are dropped whenever anything is invalidated.
+
+    If param_getter is True, the method's first argument is the name of the
+    param it reads, and the result only depends on that param.
+    """
+
+    if func is None:
+        return lambda func: instance_cache(func, depends_on, param_getter)
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            results = _instance_caches[self]
+        except KeyError:
+            results = _instance_caches[self] = {}
+
+        key = (wrapper, args, tuple(sorted(kwargs.items())))
+        try:
+            return results[key]
+        except KeyError:
+            value = func(self, *args, **kwargs)
+            results[key] = value
+            return value
+
+    wrapper.cache_dependencies = None if depends_on is None else frozenset(depends_on)
+    wrapper.cache_param_getter = param_getter
+    return wrapper
+
+
+def invalidate_instance_cache(instance, name=None):
+    """Drop the results that instance_cache() stored for instance.
+
+    If name is given, only drop the results that depend on it, directly or
+    through other cached methods and properties.
+    """
+
+    instance_cache = _instance_caches.get(instance)
+    if not instance_cache:
+        return
+
+    if name is None:
+        instance_cache.clear()
+        return
+
+    invalidated = _get_invalidated_functions(type(instance), name)
+    for key in list(instance_cache):
+        func, args, kwargs = key
+        if func in invalidated or (func.cache_param_getter and args and args[0] == name):
+            del instance_cache[key]
+
+
+@lru_cache(maxsize=None)
+def _get_invalidated_functions(cls, name):
+    functions = {}
+    for klass in cls.__mro__:
+        for attr_name, attr in vars(klass).items():
+            if isinstance(attr, property):
+                attr = attr.fget
+            if hasattr(attr, 'cache_dependencies'):
+                functions.setdefault(attr.__name__, []).append(attr)
+
+    invalidated = set()
+    names = {name}
+    changed = True
+    while changed:
+        changed = False
+        for func_name, funcs in functions.items():
+            for func in funcs:
+                if func in invalidated or func.cache_param_getter:
+                    continue
+
+                dependencies = func.cache_dependencies
+                if dependencies is None or dependencies & names:
+                    invalidated.add(func)
+                    names.add(func_name)
+                    changed = True
+
+    return invalidated
+
+
 __stitch_plan_cache = None
 
 
@@ -32,20 +144,21 @@ def get_stitch_plan_cache():
         stitch_plan_dir = os.path.join(cache_dir, 'stitch_plan')
         size_limit = global_settings['cache_size'] * 1024 * 1024
         try:
-            __stitch_plan_cache = diskcache.Cache(stitch_plan_dir, size=size_limit)
+            disk_cache = diskcache.Cache(stitch_plan_dir, size=size_limit)
         except (sqlite3.DatabaseError, sqlite3.OperationalError):
             # reset cache database file if it couldn't parse correctly
             cache_file = os.path.join(stitch_plan_dir, 'cache.db')
             if os.path.exists(cache_file):
                 os.remove(cache_file)
-                __stitch_plan_cache = diskcache.Cache(stitch_plan_dir, size=size_limit)
-        __stitch_plan_cache.size_limit = size_limit
+                disk_cache = diskcache.Cache(stitch_plan_dir, size=size_limit)
+        disk_cache.size_limit = size_limit
 
         # reset cache if warnings appear within the files
-        warnings = __stitch_plan_cache.check()
+        warnings = disk_cache.check()
         if warnings:
-            __stitch_plan_cache.clear()
+            disk_cache.clear()
 
+        __stitch_plan_cache = StitchPlanCache(disk_cache, global_settings['memory_cache_size'] * 1024 * 1024)
         atexit.register(__stitch_plan_cache.close)
     return __stitch_plan_cache
 
@@ -54,6 +167,151 @@ def is_cache_disabled():
     return not global_settings['cache_size']
 
 
+class CacheStats(object):
+    """Hit, miss and eviction counters of one cache tier."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return f"CacheStats(hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+
+class MemoryCache(object):
+    """A least-recently-used cache of bytes values in memory.
+
+    Entries are evicted once the values together are larger than size_limit
+    bytes.  Values are encoded stitch groups, so their size is proportional
+    to their number of stitches.
+    """
+
+    def __init__(self, size_limit):
+        self.size_limit = size_limit
+        self.size = 0
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        value = self._entries.get(key)
+        if value is None:
+            self.stats.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        if len(value) > self.size_limit:
+            # wouldn't fit anyway, and would evict everything else
+            return
+
+        old_value = self._entries.pop(key, None)
+        if old_value is not None:
+            self.size -= len(old_value)
+
+        self._entries[key] = value
+        self.size += len(value)
+        self.cull()
+
+    def cull(self):
+        while self.size > self.size_limit:
+            key, value = self._entries.popitem(last=False)
+            self.size -= len(value)
+            self.stats.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+class StitchPlanCache(object):
+    """The stitch plan cache: a MemoryCache in front of a diskcache.Cache.
+
+    Hits from the disk cache are copied into the memory cache, so that
+    long-running GUI sessions that render the same elements again and again
+    don't need to go to the database.
+
+    Hit, miss and eviction counters of both tiers are available through
+    stats().
+    """
+
+    def __init__(self, disk_cache, memory_size_limit):
+        self.disk_cache = disk_cache
+        self.memory_cache = MemoryCache(memory_size_limit)
+        self.disk_stats = CacheStats()
+
+    @property
+    def size_limit(self):
+        return self.disk_cache.size_limit
+
+    @size_limit.setter
+    def size_limit(self, size_limit):
+        self.disk_cache.size_limit = size_limit
+
+    @property
+    def memory_size_limit(self):
+        return self.memory_cache.size_limit
+
+    @memory_size_limit.setter
+    def memory_size_limit(self, size_limit):
+        self.memory_cache.size_limit = size_limit
+
+    def __contains__(self, key):
+        return key in self.memory_cache or key in self.disk_cache
+
+    def get(self, key, default=None):
+        value = self.memory_cache.get(key)
+        if value is not None:
+            return value
+
+        value = self.disk_cache.get(key)
+        if value is None:
+            self.disk_stats.misses += 1
+            return default
+
+        self.disk_stats.hits += 1
+        self.memory_cache[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self.memory_cache[key] = value
+
+        if key in self.disk_cache:
+            self.disk_cache[key] = value
+        else:
+            # diskcache evicts entries on its own when adding new ones, so
+            # that's the only way to find out about them
+            count = len(self.disk_cache)
+            self.disk_cache[key] = value
+            self.disk_stats.evictions += max(0, count + 1 - len(self.disk_cache))
+
+    def cull(self):
+        self.memory_cache.cull()
+        self.disk_stats.evictions += self.disk_cache.cull()
+
+    def clear(self, retry=False):
+        self.memory_cache.clear()
+        self.disk_cache.clear(retry=retry)
+
+    def close(self):
+        self.disk_cache.close()
+
+    def stats(self):
+        return {
+            'memory': self.memory_cache.stats,
+            'disk': self.disk_stats,
+        }
+
+
 class CacheKeyGenerator(object):
     """Generate cache keys given arbitrary data.
 
@@ -77,13 +335,93 @@ class CacheKeyGenerator(object):
         """Provide data to be hashed into a cache key.
 
         Arguments:
-            data -- a bytes object or any object that can be pickled
+            data -- a bytes object or any object supported by canonical_bytes()
         """
 
         if not isinstance(data, bytes):
-            data = pickle.dumps(data)
+            data = canonical_bytes(data)
 
         self._hasher.update(data)
 
     def get_cache_key(self):
         return self._hasher.hexdigest()
+
+
+def fingerprint(data):
+    """Shorthand for the cache key of a single piece of data."""
+
+    cache_key_generator = CacheKeyGenerator()
+    cache_key_generator.update(data)
+    return cache_key_generator.get_cache_key()
+
+
+def canonical_bytes(data):
+    """Encode data as bytes that only depend on its value.
+
+    Plain pickling is fast, but the result depends on more than the value:
+    the order of sets depends on string hashes (which change with every
+    Python process) and the order of dicts on insertion order.  So we sort
+    those, encode shapely geometries as WKB and NumPy arrays as raw bytes,
+    and pickle the result without the memo, which would otherwise depend on
+    object identity.
+    """
+
+    return _pickle(_canonicalize(data))
+
+
+def _pickle(data):
+    out = io.BytesIO()
+    pickler = pickle.Pickler(out, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.fast = True
+    pickler.dump(data)
+    return out.getvalue()
+
+
+_PRIMITIVE_TYPES = (type(None), bool, int, float, str, bytes)
+
+
+def _canonicalize(data):  # noqa: C901
+    data_type = type(data)
+
+    if data_type in _PRIMITIVE_TYPES:
+        return data
+    elif data_type in (list, tuple):
+        if _is_numeric(data):
+            # Lists of coordinates are the bulk of our data.  Pickle handles
+            # those just fine, so don't look at every number.
+            return data
+        return data_type(_canonicalize(item) for item in data)
+    elif isinstance(data, dict):
+        items = [(_canonicalize(key), _canonicalize(value)) for key, value in data.items()]
+        # keys are unique, so there's no need to compare values
+        items.sort(key=lambda item: _sort_key(item[0]))
+        return ("\0dict", items)
+    elif isinstance(data, (set, frozenset)):
+        return ("\0set", sorted((_canonicalize(item) for item in data), key=_sort_key))
+    elif isinstance(data, BaseGeometry):
+        return ("\0geometry", data.wkb)
+    elif isinstance(data, np.ndarray):
+        return ("\0array", data.dtype.str, data.shape, np.ascontiguousarray(data).tobytes())
+    else:
+        return data
+
+
+def _sort_key(item):
+    if type(item) is str:
+        return (0, item, b"")
+    return (1, "", _pickle(item))
+
+
+def _is_numeric(data):
+    # Check whether a nested list (like a path or a list of points) consists
+    # of numbers only.  Checking the types is a lot cheaper than rebuilding
+    # the list, but a single dict or set anywhere means we have to.
+    for item in data:
+        item_type = type(item)
+        if item_type in (list, tuple):
+            if not _is_numeric(item):
+                return False
+        elif item_type not in (int, float):
+            return False
+
+    return True
@@ -0,0 +1,142 @@
+# Authors: see git history
+#
+# Copyright (c) 2026 Authors
+# Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
+
+"""Per-element statistics about the stitch plan cache.
+
+Used by the Stitch Plan Cache Inspector extension and by
+bin/inspect-stitch-plan-cache.
+"""
+
+import json
+from time import perf_counter
+
+from ..i18n import _
+from .cache import get_stitch_plan_cache, is_cache_disabled
+from .paths import get_user_dir
+
+
+class ElementReport:
+    def __init__(self, element):
+        self.element_id = element.node.get_id()
+        self.label = element.node.label or ""
+        self.element_type = getattr(element, 'element_name', element.__class__.__name__)
+        self.cache_hit = False
+        self.entry_size = 0
+        self.key_time = 0.0
+        self.embroider_time = 0.0
+        self.num_stitches = 0
+        self.changed_components = None
+
+    def __repr__(self):
+        return f"ElementReport({self.element_id}, hit={self.cache_hit}, changed={self.changed_components})"
+
+
+def inspect_elements(elements):
+    """Embroider elements and report how the stitch plan cache was used.
+
+    The cache key components of every element are stored, so that the next
+    run can report which of them changed.
+    """
+
+    stitch_plan_cache = None if is_cache_disabled() else get_stitch_plan_cache()
+    last_components = _load_last_components()
+
+    reports = []
+    next_elements = elements[1:] + [None]
+    last_stitch_group = None
+    for element, next_element in zip(elements, next_elements):
+        report = ElementReport(element)
+        previous_stitch = last_stitch_group.stitches[-1].copy() if last_stitch_group else None
+
+        start = perf_counter()
+        cache_key = element.get_embroider_cache_key(previous_stitch, next_element)
+        report.key_time = perf_counter() - start
+
+        if stitch_plan_cache is not None:
+            report.cache_hit = cache_key in stitch_plan_cache
+
+        start = perf_counter()
+        stitch_groups = element.embroider(last_stitch_group, next_element)
+        report.embroider_time = perf_counter() - start
+
+        report.num_stitches = sum(len(stitch_group.stitches) for stitch_group in stitch_groups)
+        if stitch_plan_cache is not None:
+            # look at the disk cache directly to keep the hit and miss counters meaningful
+            report.entry_size = len(stitch_plan_cache.disk_cache.get(cache_key) or b"")
+
+        if not element.uses_previous_stitch():
+            previous_stitch = None
+        components = element.get_cache_key_components(previous_stitch, next_element if element.uses_next_element() else None)
+        if report.element_id in last_components:
+            previous_components = last_components[report.element_id]
+            report.changed_components = [name for name, value in components.items() if previous_components.get(name) != value]
+        last_components[report.element_id] = components
+
+        reports.append(report)
+        if stitch_groups:
+            last_stitch_group = stitch_groups[-1]
+
+    _save_last_components(last_components)
+
+    return reports
+
+
+def format_report(reports):
+    lines = [
+        "\t".join([_("Element"), _("Type"), _("Cache"), _("Entry size (KB)"), _("Key time (ms)"),
+                   _("Embroider time (ms)"), _("Stitches"), _("Changed since last run")])
+    ]
+
+    for report in reports:
+        if report.changed_components is None:
+            changed = _("new")
+        else:
+            changed = ", ".join(report.changed_components) or "-"
+
+        name = f"{report.label} ({report.element_id})" if report.label else report.element_id
+        lines.append("\t".join([
+            name,
+            report.element_type,
+            _("hit") if report.cache_hit else _("miss"),
+            f"{report.entry_size / 1024:.1f}",
+            f"{report.key_time * 1000:.2f}",
+            f"{report.embroider_time * 1000:.1f}",
+            str(report.num_stitches),
+            changed
+        ]))
+
+    hits = sum(report.cache_hit for report in reports)
+    lines.append("")
+    lines.append(_("Cache hits: %(hits)d of %(elements)d elements") % dict(hits=hits, elements=len(reports)))
+    lines.append(_("Total key time: %.1f ms") % (sum(report.key_time for report in reports) * 1000))
+    lines.append(_("Total embroider time: %.1f ms") % (sum(report.embroider_time for report in reports) * 1000))
+    lines.append(_("Total entry size: %.1f KB") % (sum(report.entry_size for report in reports) / 1024))
+    if is_cache_disabled():
+        lines.append(_("The stitch plan cache is disabled in the preferences."))
+    else:
+        for tier, stats in get_stitch_plan_cache().stats().items():
+            lines.append(f"{tier}: {stats}")
+
+    return "\n".join(lines)
+
+
+def _components_file():
+    return get_user_dir('cache_inspector.json')
+
+
+def _load_last_components():
+    try:
+        with open(_components_file(), 'r') as components_file:
+            return json.load(components_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_last_components(components):
+    try:
+        with open(_components_file(), 'w') as components_file:
+            json.dump(components, components_file)
+    except OSError:
+        pass
@@ -5,7 +5,8 @@
 
 import math
 import typing
-from itertools import groupby
+from bisect import bisect_right
+from itertools import accumulate, groupby
 
 import numpy
 from shapely.geometry import (GeometryCollection, LinearRing, LineString,
@@ -243,6 +244,109 @@ def offset_points(pos1, pos2, offset_px, offset_proportional):
     return out1, out2
 
 
+def offset_point_arrays(points1, points2, offset_px, offset_proportional):
+    """Like offset_points(), but for (N, 2) arrays of points.
+
+    offset_proportional can be an (N, 2) array with different offsets for
+    each pair of points.  Returns two new arrays.
+    """
+
+    deltas = points1 - points2
+    distances = numpy.sqrt(deltas[:, 0] * deltas[:, 0] + deltas[:, 1] * deltas[:, 1])
+    offset_proportional = numpy.broadcast_to(numpy.asarray(offset_proportional, dtype=float), (len(distances), 2))
+
+    # calculate the offset for each side
+    offset_a = offset_px[0] + (distances * offset_proportional[:, 0])
+    offset_b = offset_px[1] + (distances * offset_proportional[:, 1])
+    offset_total = offset_a + offset_b
+
+    # don't contract beyond the midpoint, or we'll start expanding
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        scale = numpy.where(offset_total < -distances, -distances / offset_total, 1.0)
+        units = deltas / distances[:, None]
+    offset_a = offset_a * scale
+    offset_b = offset_b * scale
+
+    # if they're the same point, we don't know which direction
+    # to offset in, so we have to just leave the points
+    units[distances < 0.0001] = 0
+    out1 = points1 + units * offset_a[:, None]
+    out2 = points2 + -units * offset_b[:, None]
+
+    return out1, out2
+
+
+class ArcLengthPath:
+    """A path that can be interpolated quickly by the distance along it.
+
+    This gives the same points as LineString.interpolate(), but the lengths
+    along the path are computed once.  Finding a point is then a binary
+    search rather than a walk from the start of the path.
+    """
+
+    def __init__(self, points):
+        # Satin sections are often just a few points, so we stick to plain
+        # lists here and only make arrays for interpolate_many().
+        self._coordinates = [(float(point[0]), float(point[1])) for point in points]
+        self._segment_lengths = [math.sqrt((x1 - x0) * (x1 - x0) + (y1 - y0) * (y1 - y0))
+                                 for (x0, y0), (x1, y1) in zip(self._coordinates, self._coordinates[1:])]
+
+        # _distances[i] is the length of the path up to point i
+        self._distances = list(accumulate(self._segment_lengths, initial=0.0))
+        self.length = self._distances[-1]
+        self._arrays = None
+
+    def _get_arrays(self):
+        if self._arrays is None:
+            self._arrays = (numpy.array(self._coordinates, dtype=float).reshape(-1, 2),
+                            numpy.array(self._distances),
+                            numpy.array(self._segment_lengths))
+        return self._arrays
+
+    def interpolate(self, distance, normalized=False):
+        """Return the Point at a distance along the path."""
+
+        if normalized:
+            distance *= self.length
+
+        # the first segment that ends beyond the distance, like GEOS does it
+        i = bisect_right(self._distances, distance, 1) - 1
+        if i >= len(self._coordinates) - 1:
+            return Point(*self._coordinates[-1])
+
+        x0, y0 = self._coordinates[i]
+        x1, y1 = self._coordinates[i + 1]
+        fraction = (distance - self._distances[i]) / self._segment_lengths[i]
+        if fraction <= 0:
+            return Point(x0, y0)
+        return Point((x1 - x0) * fraction + x0, (y1 - y0) * fraction + y0)
+
+    def interpolate_many(self, distances, normalized=False):
+        """Return an (N, 2) array of the points at several distances along the path."""
+
+        distances = numpy.asarray(distances, dtype=float)
+        if normalized:
+            distances = distances * self.length
+
+        coordinates, path_distances, segment_lengths = self._get_arrays()
+        if len(coordinates) < 2:
+            return numpy.repeat(coordinates[-1:], len(distances), axis=0)
+
+        indices = numpy.searchsorted(path_distances[1:], distances, side='right')
+        at_end = indices >= len(coordinates) - 1
+        indices = numpy.minimum(indices, len(coordinates) - 2)
+
+        start = coordinates[indices]
+        end = coordinates[indices + 1]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            fractions = (distances - path_distances[indices]) / segment_lengths[indices]
+        fractions = numpy.where(at_end, 1.0, numpy.maximum(fractions, 0.0))
+
+        points = (end - start) * fractions[:, None] + start
+        points[at_end] = coordinates[-1]
+        return points
+
+
 def remove_duplicate_points(path):
     path = [[round(coord, 4) for coord in point] for point in path]
     return [point for point, repeats in groupby(path)]
@@ -1,4 +1,4 @@
-from hashlib import blake2s
+from hashlib import blake2b, blake2s
 from math import ceil
 from itertools import count, chain
 import numpy as np
@@ -12,6 +12,30 @@ import numpy as np
 # making random generation resistant to small edits in the control paths or refactoring.
 # Using multiple counters for n-dimentional random streams is also possible and is useful for grid-like structures.
 
+# There are two versions of the random streams.  The legacy stream hashes the
+# joined parameters for every 8 random numbers, which is slow when we need a
+# lot of them.  The block stream takes its first numbers from a few hashes of
+# the joined parameters, 8 numbers per hash.  Most streams need no more than
+# that, and hashing is much faster than setting up a generator.  Only if more
+# numbers are needed, it seeds a Philox counter-mode generator and draws the
+# rest from it in blocks that double in size up to BLOCK_SIZE.
+#
+# Changing the stream changes the look of randomized elements, so existing
+# documents keep the legacy stream.  Elements opt into the block stream with
+# versioned_seed(), and everything derived from that seed with join_args()
+# uses the block stream, too.
+
+LEGACY_STREAM = 1
+BLOCK_STREAM = 2
+
+# NUL can't be part of an SVG attribute, so no user specified seed starts with this.
+_BLOCK_STREAM_MARKER = "\x00block-stream\x00"
+
+BLOCK_SIZE = 1024
+
+# how many blocks of 8 numbers the block stream hashes before it uses Philox
+HASHED_BLOCKS = 8
+
 
 def join_args(*args):
     # Stringifies parameters into a slash-separated string for use in hash keys.
@@ -19,6 +43,20 @@ def join_args(*args):
     return "/".join([str(x) for x in args])
 
 
+def versioned_seed(seed, version=BLOCK_STREAM):
+    # Marks seed to use the given stream version.
+    if version == BLOCK_STREAM:
+        return _BLOCK_STREAM_MARKER + str(seed)
+    return seed
+
+
+def stream_version(*args):
+    # The stream version used for the joined parameters.
+    if join_args(*args).startswith(_BLOCK_STREAM_MARKER):
+        return BLOCK_STREAM
+    return LEGACY_STREAM
+
+
 MAX_UNIFORM_INT = 2 ** 32 - 1
 
 
@@ -29,23 +67,29 @@ def uniform_ints(*args):
 
     s = join_args(*args)
     # blake2s is python's fastest hash algorithm for small inputs and is designed to be usable as a PRNG.
-    h = blake2s(s.encode()).hexdigest()
-    nums = []
-    for i in range(0, 64, 8):
-        nums.append(int(h[i:i + 8], 16))
-    return np.array(nums)
+    # The digest holds the same 8 big-endian uint32 as its hex representation.
+    h = blake2s(s.encode()).digest()
+    return np.frombuffer(h, dtype='>u4').astype(np.int64)
 
 
 def uniform_floats(*args):
     # Single pseudo-random drawing determined by the joined parameters.
     # To get a longer sequence of random numbers, call this loop with a counter as one of the parameters.
     # Returns an array of 8 floats in the range [0,1]
-    return uniform_ints(*args) / MAX_UNIFORM_INT
+    seed = join_args(*args)
+    if stream_version(seed) == BLOCK_STREAM:
+        return _hashed_block_floats(seed, 0)
+    return uniform_ints(seed) / MAX_UNIFORM_INT
 
 
 def n_uniform_floats(n: int, *args):
     # returns a fixed number (which may exceed 8) of floats in the range [0,1]
     seed = join_args(*args)
+    if stream_version(seed) == BLOCK_STREAM:
+        blocks = [_hashed_block_floats(seed, x) for x in range(min(ceil(n / 8), HASHED_BLOCKS))]
+        if n > 8 * HASHED_BLOCKS:
+            blocks.append(_block_floats(_block_generator(seed), n - 8 * HASHED_BLOCKS))
+        return np.concatenate(blocks)[0:n]
     nBlocks = ceil(n / 8)
     blocks = [uniform_floats(seed, x) for x in range(nBlocks)]
     return np.concatenate(blocks)[0:n]
@@ -54,5 +98,61 @@ def n_uniform_floats(n: int, *args):
 def iter_uniform_floats(*args):
     # returns an infinite sequence of floats in the range [0,1]
     seed = join_args(*args)
+    if stream_version(seed) == BLOCK_STREAM:
+        return chain.from_iterable(block.tolist() for block in iter_uniform_float_blocks(seed))
     blocks = map(lambda x: list(uniform_floats(seed, x)), count(0))
     return chain.from_iterable(blocks)
+
+
+def iter_uniform_float_blocks(*args, block_size: int = BLOCK_SIZE):
+    # returns an infinite sequence of arrays of floats in the range [0,1]
+    # The blocks hold a multiple of 8 floats.  For the block stream, they start
+    # with 8 floats and grow up to block_size, so that short streams stay cheap.
+    seed = join_args(*args)
+    if stream_version(seed) == BLOCK_STREAM:
+        for x in range(HASHED_BLOCKS):
+            yield _hashed_block_floats(seed, x)
+        generator = _block_generator(seed)
+        size = 8 * HASHED_BLOCKS
+        while True:
+            size = min(size * 2, max(block_size, 8))
+            yield _block_floats(generator, size)
+    else:
+        for start in count(0, ceil(block_size / 8)):
+            yield np.concatenate([uniform_floats(seed, x) for x in range(start, start + ceil(block_size / 8))])
+
+
+def iter_rolls(*args):
+    # returns an infinite sequence of drawings of 8 floats in the range [0,1]
+    # The same as calling uniform_floats() with a counter as the last parameter,
+    # but for the block stream the drawings come from large blocks.
+    seed = join_args(*args)
+    if stream_version(seed) == BLOCK_STREAM:
+        for block in iter_uniform_float_blocks(seed):
+            yield from block.reshape(-1, 8)
+    else:
+        for x in count(0):
+            yield uniform_floats(seed, x)
+
+
+def _hashed_block_floats(seed: str, x: int):
+    # The counter goes into the salt rather than the hashed string, so that
+    # the blocks of seed don't turn up in the streams of derived seeds.
+    digest = blake2b(seed.encode(), salt=x.to_bytes(blake2b.SALT_SIZE, 'little')).digest()
+    return _to_floats(np.frombuffer(digest, dtype='<u8'))
+
+
+def _block_generator(seed: str):
+    key = int.from_bytes(blake2s(seed.encode()).digest()[:16], 'little')
+    return np.random.Philox(key=key)
+
+
+def _block_floats(generator, n: int):
+    # Raw bit generator output is stable across NumPy versions, unlike
+    # Generator.random(), so we convert it to floats ourselves.
+    return _to_floats(generator.random_raw(n))
+
+
+def _to_floats(uint64s):
+    # 53 random bits make a float in the range [0,1)
+    return (uint64s >> np.uint64(11)) * (1.0 / 2 ** 53)
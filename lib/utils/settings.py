@@ -14,6 +14,9 @@ DEFAULT_METADATA = {
 DEFAULT_SETTINGS = {
     # Ink/Stitch preferences
     "cache_size": 100,
+    "memory_cache_size": 50,
+    "embroidery_processes": 1,
+    "csr_travel_routing": False,
     "pop_out_simulator": False,
     # simulator
     "simulator_adaptive_speed": True,
@@ -1,3 +1,5 @@
+import multiprocessing
+import sys
 import threading
 
 from ..exceptions import InkstitchException
@@ -21,3 +23,14 @@ def check_stop_flag():
     if getattr(threading.current_thread(), 'stop', _default_stop_flag).is_set():
         debug.log("exiting thread")
         raise ExitThread()
+
+
+def can_fork():
+    """Returns True if we can start worker processes by forking.
+
+    Other start methods run the main module again in each worker process,
+    which would run the whole extension again.  Worker processes of a pool
+    can't start processes of their own.
+    """
+    return (sys.platform.startswith('linux') and 'fork' in multiprocessing.get_all_start_methods() and
+            not multiprocessing.current_process().daemon)
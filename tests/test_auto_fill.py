@@ -0,0 +1,44 @@
+import random
+
+import networkx
+from shapely.geometry import LineString, Point
+
+from lib.stitches.auto_fill import nearest_edge, nearest_node
+
+
+def _random_points(rand, count):
+    return [(rand.uniform(0, 100), rand.uniform(0, 100)) for i in range(count)]
+
+
+def test_nearest_edge_matches_brute_force():
+    rand = random.Random(42)
+    graph: networkx.MultiGraph = networkx.MultiGraph()
+    nodes = _random_points(rand, 20)
+    for i in range(40):
+        start, end = rand.sample(nodes, 2)
+        graph.add_edge(start, end, key='segment')
+    edges = list(graph.edges(data=True, keys=False))
+    edges = [((start, end), data) for start, end, data in edges]
+
+    for point in _random_points(rand, 50):
+        expected = min(edges, key=lambda edge: LineString(edge[0]).distance(Point(point)))
+        assert nearest_edge(edges, Point(point)) == expected
+
+
+def test_nearest_node_matches_brute_force():
+    rand = random.Random(42)
+    graph: networkx.Graph = networkx.Graph()
+
+    # Add nodes in small batches so that both the tree and the pending nodes
+    # of the index get searched.
+    for batch in range(5):
+        for node in _random_points(rand, 30):
+            graph.add_node(node, outline=0 if rand.random() < 0.5 else None)
+
+        outline_nodes = [node for node, outline in graph.nodes(data='outline') if outline is not None]
+        for point in _random_points(rand, 20):
+            def distance(node):
+                return Point(node).distance(Point(point))
+
+            assert nearest_node(graph, point) == min(graph.nodes, key=distance)
+            assert nearest_node(graph, point, attr='outline') == min(outline_nodes, key=distance)
@@ -0,0 +1,127 @@
+import diskcache  # type: ignore[import-untyped]
+from inkex import ClipPath, PathElement, Rectangle
+from inkex.tester.svg import svg
+from shapely.geometry import Polygon
+
+from lib.elements import FillStitch, Stroke, node_to_elements
+from lib.stitch_plan import Stitch
+from lib.utils.cache import (CacheKeyGenerator, MemoryCache, StitchPlanCache,
+                             canonical_bytes)
+
+
+def _cache_key(*data):
+    generator = CacheKeyGenerator()
+    for item in data:
+        generator.update(item)
+    return generator.get_cache_key()
+
+
+def test_canonical_bytes_ignore_order_of_dicts_and_sets():
+    assert canonical_bytes({"b": 1, "a": {"x", "y", 3}}) == canonical_bytes({"a": {3, "y", "x"}, "b": 1})
+    assert canonical_bytes({"a": 1, "b": 2}) != canonical_bytes({"a": 2, "b": 1})
+
+
+def test_canonical_bytes_look_inside_mixed_lists():
+    # a list that starts with numbers can still contain dicts and sets
+    assert canonical_bytes([1, {"b": 1, "a": 2}]) == canonical_bytes([1, {"a": 2, "b": 1}])
+    assert canonical_bytes([[1, 2], [3, {"x"}]]) == canonical_bytes([[1, 2], [3, frozenset({"x"})]])
+    assert canonical_bytes([1.5, 2.5]) != canonical_bytes([1.5, 2.5, 3])
+
+
+def test_canonical_bytes_ignore_object_identity():
+    # pickle would refer back to the first "abc" instead of repeating it
+    shared = "abc"
+    assert canonical_bytes([shared, shared]) == canonical_bytes([shared, "".join(["a", "bc"])])
+
+
+def test_cache_key_depends_on_values():
+    path = [[[[0, 0], [0, 0], [0, 0]], [[1, 1], [1, 1], [1, 1]]]]
+    shape = Polygon([(0, 0), (1, 0), (1, 1)])
+
+    assert _cache_key(path, shape) == _cache_key(path, Polygon([(0, 0), (1, 0), (1, 1)]))
+    assert _cache_key(path, shape) != _cache_key(path, Polygon([(0, 0), (2, 0), (1, 1)]))
+    assert _cache_key(path, None) != _cache_key(None, path)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    memory_cache = MemoryCache(size_limit=10)
+    memory_cache["a"] = b"1234"
+    memory_cache["b"] = b"1234"
+    memory_cache.get("a")
+    memory_cache["c"] = b"1234"
+
+    assert "a" in memory_cache and "c" in memory_cache
+    assert "b" not in memory_cache
+    assert memory_cache.size == 8
+    assert (memory_cache.stats.hits, memory_cache.stats.evictions) == (1, 1)
+
+
+def test_stitch_plan_cache_serves_disk_hits_from_memory(tmp_path):
+    disk_cache = diskcache.Cache(str(tmp_path))
+    disk_cache["key"] = b"stitches"
+    stitch_plan_cache = StitchPlanCache(disk_cache, 1024)
+
+    assert stitch_plan_cache.get("key") == b"stitches"
+    disk_cache.clear()
+    assert stitch_plan_cache.get("key") == b"stitches"
+    assert stitch_plan_cache.get("other") is None
+
+    stats = stitch_plan_cache.stats()
+    assert (stats['memory'].hits, stats['memory'].misses) == (1, 2)
+    assert (stats['disk'].hits, stats['disk'].misses) == (1, 1)
+
+    stitch_plan_cache["new"] = b"more stitches"
+    assert disk_cache["new"] == b"more stitches"
+    stitch_plan_cache.clear()
+    assert "new" not in stitch_plan_cache
+    stitch_plan_cache.close()
+
+
+def test_cache_key_components_show_what_changed():
+    root = svg()
+    rect = root.add(Rectangle(attrib={"width": "10", "height": "10"}))
+    [element] = node_to_elements(rect)
+    components = element.get_cache_key_components(None, None)
+
+    rect.set("inkstitch:angle", "45")
+    [element] = node_to_elements(rect)
+    changed = element.get_cache_key_components(Stitch(1, 2), None)
+
+    assert [name for name in components if components[name] != changed[name]] == ['params', 'previous_stitch']
+
+
+def test_invalidate_only_drops_dependent_values():
+    root = svg()
+    rect = root.add(Rectangle(attrib={"width": "10", "height": "10"}))
+    element = FillStitch(rect)
+    shape = element.shape
+    angle = element.angle
+    row_spacing = element.row_spacing
+
+    element.set_param("angle", 45)
+    assert element.angle != angle
+    assert element.row_spacing == row_spacing
+    assert element.shape is shape
+
+    rect.set("width", "20")
+    element.invalidate("path")
+    assert element.shape is not shape
+    assert element.shape.area == 200
+
+
+def test_invalidate_drops_stroke_shape():
+    root = svg()
+    clip = root.defs.add(ClipPath(id="clip1"))
+    clip.add(Rectangle(attrib={"width": "5", "height": "20"}))
+    path = root.add(PathElement(attrib={"d": "M 0,0 C 0,10 10,10 10,0", "style": "fill:none;stroke:#000000"}))
+    path.set("inkstitch:stroke_method", "manual_stitch")
+    element = Stroke(path)
+    assert len(element.as_multi_line_string().geoms[0].coords) == 2
+
+    element.set_param("stroke_method", "running_stitch")
+    assert len(element.as_multi_line_string().geoms[0].coords) > 2
+    assert element.shape.bounds[2] == 10
+
+    path.set("clip-path", "url(#clip1)")
+    element.invalidate("clip")
+    assert element.shape.bounds[2] == 5
@@ -1,13 +1,14 @@
 from math import sqrt
 from typing import Optional
 
-from inkex import (Circle, Group, Rectangle, SvgDocumentElement, TextElement,
-                   Transform, Use)
+from inkex import (Circle, Group, PathElement, Rectangle, SvgDocumentElement,
+                   TextElement, Transform, Use)
 from inkex.tester import TestCase
 from inkex.tester.svg import svg
 
 from lib.commands import add_commands
 from lib.elements import Clone, EmbroideryElement, FillStitch
+from lib.marker import set_marker
 from lib.svg.tags import INKSCAPE_LABEL, INKSTITCH_ATTRIBS, SVG_RECT_TAG
 
 from .utils import element_count
@@ -102,6 +103,29 @@ class CloneElementTest(TestCase):
             self.assertEqual(len(elements), element_count())
             self.assertEqual(elements[0].node.get(INKSCAPE_LABEL), "NotHidden")
 
+    def test_cloned_guide_line(self) -> None:
+        root: SvgDocumentElement = svg()
+        g = root.add(Group())
+        rect = g.add(Rectangle(attrib={
+            "width": "10",
+            "height": "10",
+            INKSTITCH_ATTRIBS["fill_method"]: "guided_fill"
+        }))
+        guide_line = g.add(PathElement(attrib={
+            "d": "M 0,0 L 10,10",
+            "style": "fill:none;stroke:#000000"
+        }))
+        set_marker(guide_line, 'start', 'guide-line')
+        use = root.add(Use())
+        use.href = g
+
+        self.assertIsNotNone(FillStitch(rect)._get_guide_lines())
+        clone = Clone(use)
+        with clone.clone_elements() as elements:
+            self.assertEqual(len(elements), element_count())
+            assert isinstance(elements[0], FillStitch)
+            self.assertIsNotNone(elements[0]._get_guide_lines())
+
     def test_angle_rotated(self) -> None:
         root: SvgDocumentElement = svg()
         rect = root.add(Rectangle(attrib={
@@ -522,6 +546,7 @@ class CloneElementTest(TestCase):
             cmd_orig = original.get_command("ending_point")
             cmd_clone = elements[0].get_command("ending_point")
             self.assertIsNotNone(cmd_clone)
+            assert cmd_orig is not None and cmd_clone is not None
             self.assertAlmostEqual(cmd_orig.target_point[0]+10, cmd_clone.target_point[0], 4)
             self.assertAlmostEqual(cmd_orig.target_point[1]+10, cmd_clone.target_point[1], 4)
 
@@ -549,6 +574,7 @@ class CloneElementTest(TestCase):
             cmd_orig = original.get_command("ending_point")
             cmd_clone = elements[0].get_command("ending_point")
             self.assertIsNotNone(cmd_clone)
+            assert cmd_orig is not None and cmd_clone is not None
             self.assertAlmostEqual(cmd_orig.target_point[0]+10, cmd_clone.target_point[0], 4)
             self.assertAlmostEqual(cmd_orig.target_point[1]+10, cmd_clone.target_point[1], 4)
 
@@ -0,0 +1,30 @@
+from inkex import Group, Rectangle, SvgDocumentElement
+from inkex.tester.svg import svg
+
+from lib.commands import (add_commands, add_layer_commands, find_commands,
+                          get_command_index, layer_commands)
+from lib.elements import FillStitch
+
+
+def test_command_index_follows_document_changes() -> None:
+    root: SvgDocumentElement = svg()
+    layer = root.add(Group())
+    rect = layer.add(Rectangle(attrib={"id": "rect", "width": "10", "height": "10"}))
+    other = layer.add(Rectangle(attrib={"id": "other", "width": "10", "height": "10"}))
+
+    index = get_command_index(rect)
+    assert find_commands(rect) == []
+    assert get_command_index(other) is index
+
+    add_commands(FillStitch(rect), ["trim", "stop"])
+    assert get_command_index(rect) is not index
+    assert sorted(command.command for command in find_commands(rect)) == ["stop", "trim"]
+    assert find_commands(other) == []
+
+    group = find_commands(rect)[0].connector.getparent()
+    assert group is not None
+    group.delete()
+    assert len(find_commands(rect)) == 1
+
+    add_layer_commands(layer, ["ignore_layer"])
+    assert [command.command for command in layer_commands(layer, "ignore_layer")] == ["ignore_layer"]
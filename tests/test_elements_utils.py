@@ -1,4 +1,4 @@
-from inkex import Group, Rectangle, Style
+from inkex import Color, Group, Rectangle, Style
 from inkex.tester import TestCase
 from inkex.tester.svg import svg
 
@@ -53,3 +53,32 @@ class ElementsUtilsTest(TestCase):
 
         elements = nodes_to_elements(iterate_nodes(rect))
         self.assertEqual(len(elements), 0)
+
+    def test_elements_of_a_node_share_its_context(self) -> None:
+        root = svg()
+        g = root.add(Group())
+        rect = g.add(Rectangle(attrib={
+            "width": "10",
+            "height": "10",
+            "style": "fill:red;stroke:blue"
+        }))
+        other = g.add(Rectangle(attrib={
+            "width": "10",
+            "height": "10",
+            "style": "fill:red"
+        }))
+
+        nodes = iterate_nodes(root, selection=[other])
+        self.assertEqual(nodes, [other])
+
+        elements = nodes_to_elements(iterate_nodes(g))
+        rect_elements = [element for element in elements if element.node is rect]
+        self.assertEqual(len(rect_elements), 2)
+        self.assertIs(rect_elements[0].context, rect_elements[1].context)
+        self.assertEqual(rect_elements[0].get_style('fill'), 'red')
+        self.assertEqual(rect_elements[0].fill_color, Color('red'))
+
+        rect.style['fill'] = 'green'
+        rect_elements[1].invalidate('style')
+        self.assertEqual(rect_elements[0].get_style('fill'), 'green')
+        self.assertEqual(rect_elements[0].fill_color, Color('green'))
@@ -0,0 +1,61 @@
+from inkex import PathElement
+from inkex.tester.svg import svg
+
+from lib.elements import embroider_elements, nodes_to_elements
+from lib.elements.utils.embroider import embroidery_runs
+from lib.stitch_plan.serialization import stitch_groups_to_bytes
+from lib.utils.settings import global_settings
+
+
+def _elements():
+    root = svg()
+    for i in range(3):
+        root.add(PathElement(attrib={
+            "d": f"M {i * 30},0 L {i * 30 + 20},5 L {i * 30},10",
+            "style": "fill:none;stroke:#0000ff;stroke-width:1",
+        }))
+        root.add(PathElement(attrib={
+            "d": f"M {i * 30},20 h 10 v 10 h -10 Z",
+            "style": "fill:#ff0000;stroke:none",
+        }))
+    return nodes_to_elements(root.iterchildren())
+
+
+def test_embroidery_runs():
+    # strokes don't use the previous stitch, fills do
+    assert embroidery_runs(_elements()) == [(0, 2), (2, 4), (4, 6)]
+
+
+def test_parallel_embroidery_matches_serial(monkeypatch):
+    monkeypatch.setitem(global_settings._settings, 'embroidery_processes', 1)
+    serial = embroider_elements(_elements())
+
+    monkeypatch.setitem(global_settings._settings, 'embroidery_processes', 3)
+    parallel = embroider_elements(_elements())
+
+    assert serial
+    assert stitch_groups_to_bytes(parallel) == stitch_groups_to_bytes(serial)
+
+
+def _fill_elements():
+    root = svg()
+    for i in range(4):
+        root.add(PathElement(attrib={
+            "d": f"M {i * 40},0 h 30 v 30 h -10 v -20 h -10 v 20 h -10 Z",
+            "style": "fill:#ff0000;stroke:none",
+        }))
+    return nodes_to_elements(root.iterchildren())
+
+
+def test_prepared_fills_match_serial(monkeypatch):
+    # all fills form a single run, so the fill graphs are prepared in worker processes
+    assert len(embroidery_runs(_fill_elements())) == 1
+
+    monkeypatch.setitem(global_settings._settings, 'embroidery_processes', 1)
+    serial = embroider_elements(_fill_elements())
+
+    monkeypatch.setitem(global_settings._settings, 'embroidery_processes', 3)
+    parallel = embroider_elements(_fill_elements())
+
+    assert serial
+    assert stitch_groups_to_bytes(parallel) == stitch_groups_to_bytes(serial)
@@ -0,0 +1,69 @@
+import math
+
+import shapely
+from shapely.geometry import LineString, Polygon
+
+from lib.stitches.fill import MIN_RUN_LENGTH, intersect_region_with_grating
+from lib.utils.geometry import Point
+
+
+def _grating_rows_one_by_one(shape, angle, row_spacing, end_row_spacing=None, flip=False):
+    # intersect_region_with_grating() as it used to be: one row at a time
+    (minx, miny, maxx, maxy) = shape.bounds
+    upper_left = Point(minx, miny)
+    half_length = (upper_left - Point(maxx, maxy)).length() / 2.0
+    direction = Point(-1, 0).rotate(-angle)
+    normal = direction.rotate(-math.pi / 2)
+    center = Point((minx + maxx) / 2.0, (miny + maxy) / 2.0)
+    _, start, _, end = shapely.affinity.rotate(shape, angle, origin='center', use_radians=True).bounds
+    start -= center.y
+    end -= center.y
+    height = abs(end - start)
+    start -= (start + normal * center) % row_spacing
+
+    rows = []
+    current_row_y = start
+    while current_row_y < end:
+        p0 = center + normal * current_row_y + direction * half_length
+        p1 = center + normal * current_row_y - direction * half_length
+        res = LineString([p0.as_tuple(), p1.as_tuple()]).intersection(shape)
+
+        if res.geom_type in ["MultiLineString", "GeometryCollection"]:
+            runs = [line_string.coords for line_string in res.geoms
+                    if line_string.geom_type == "LineString" and line_string.length > MIN_RUN_LENGTH]
+        elif res.geom_type in ["Point", "MultiPoint"] or res.is_empty or res.length <= MIN_RUN_LENGTH:
+            runs = []
+        else:
+            runs = [res.coords]
+
+        if runs:
+            runs.sort(key=lambda seg: (Point(*seg[0]) - upper_left).length())
+            if flip:
+                runs.reverse()
+                runs = [tuple(reversed(run)) for run in runs]
+            rows.append(runs)
+
+        if end_row_spacing:
+            current_row_y += row_spacing + (end_row_spacing - row_spacing) * ((current_row_y - start) / height)
+        else:
+            current_row_y += row_spacing
+
+    return rows
+
+
+def _as_lists(rows):
+    return [[[tuple(point) for point in run] for run in runs] for runs in rows]
+
+
+def test_grating_rows_are_unchanged():
+    # a U shape, so that rows have one or two runs
+    shape = Polygon([(0, 0), (30, 0), (30, 25), (20, 25), (20, 10), (10, 10), (10, 25), (0, 25)],
+                    [[(2, 2), (5, 2), (5, 5), (2, 5)]])
+
+    for angle in (0, math.pi / 6, math.pi / 2, 2.5):
+        for end_row_spacing in (None, 3.5):
+            for flip in (False, True):
+                expected = _grating_rows_one_by_one(shape, angle, 0.8, end_row_spacing, flip)
+                rows = intersect_region_with_grating(shape, angle, 0.8, end_row_spacing, flip)
+                assert len(rows) > 5
+                assert _as_lists(rows) == _as_lists(expected)
@@ -0,0 +1,30 @@
+import numpy as np
+from shapely.geometry import LineString
+
+from lib.utils.geometry import (ArcLengthPath, Point, offset_point_arrays,
+                                offset_points)
+
+
+def test_arc_length_path_interpolates_like_shapely():
+    points = [(0, 0), (10, 3), (10, 3), (4, 17), (-5, 2.5)]
+    line = LineString(points)
+    path = ArcLengthPath(points)
+    assert path.length == line.length
+
+    fractions = [0, 0.1, 0.33, 0.5, 0.9, 1, 1.5]
+    many = path.interpolate_many(fractions, normalized=True)
+    for fraction, point in zip(fractions, many):
+        expected = line.interpolate(fraction, normalized=True)
+        assert path.interpolate(fraction, normalized=True).as_tuple() == (expected.x, expected.y)
+        assert tuple(point) == (expected.x, expected.y)
+
+
+def test_offset_point_arrays_match_offset_points():
+    points1 = np.array([(0, 0), (5, 5), (1, 1), (2, 0)], dtype=float)
+    points2 = np.array([(10, 0), (5, 9), (1, 1), (4, 0)], dtype=float)
+    offset_proportional = np.array([(0.1, 0.2), (-0.3, 0), (0.5, 0.5), (-2, -1)])
+
+    out1, out2 = offset_point_arrays(points1, points2, (1, -0.5), offset_proportional)
+    for i in range(len(points1)):
+        expected1, expected2 = offset_points(Point(*points1[i]), Point(*points2[i]), (1, -0.5), offset_proportional[i])
+        assert np.allclose(out1[i], expected1.as_tuple()) and np.allclose(out2[i], expected2.as_tuple())
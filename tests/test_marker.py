@@ -0,0 +1,29 @@
+from inkex import Group, PathElement
+from inkex.tester.svg import svg
+
+from lib.marker import get_marker_elements, get_marker_elements_cache_key_data, set_marker
+
+
+def test_marker_elements_are_shared_by_group():
+    root = svg()
+    group = root.add(Group())
+    paths = [group.add(PathElement(attrib={"d": f"M {i},0 L 10,0 L 10,10 Z", "style": "fill:#ff0000"})) for i in range(2)]
+    guide_line = group.add(PathElement(attrib={"d": "M 0,0 L 10,10", "style": "fill:none;stroke:#000000"}))
+    other_group = root.add(Group())
+    other_path = other_group.add(PathElement(attrib={"d": "M 0,0 L 10,0 L 10,10 Z", "style": "fill:#ff0000"}))
+
+    assert get_marker_elements(paths[0], "guide-line")['stroke'] == []
+    set_marker(guide_line, 'start', 'guide-line')
+
+    guide_lines = [get_marker_elements(path, "guide-line")['stroke'] for path in paths]
+    assert len(guide_lines[0]) == 1 and guide_lines[0][0].length == 200 ** 0.5
+    assert guide_lines[1][0] is guide_lines[0][0]
+    assert get_marker_elements(paths[0], "pattern")['stroke'] == []
+    assert get_marker_elements(other_path, "guide-line")['stroke'] == []
+
+    cache_key_data = get_marker_elements_cache_key_data(paths[0], "guide-line")
+    assert len(cache_key_data) == 1
+    assert get_marker_elements_cache_key_data(paths[1], "guide-line") == cache_key_data
+
+    other_group.append(guide_line)
+    assert get_marker_elements(paths[0], "guide-line")['stroke'] == []
@@ -0,0 +1,23 @@
+import networkx as nx
+
+from lib.stitches.meander_fill import MeanderPath, find_detour
+
+
+def test_find_detour_matches_all_simple_edge_paths():
+    graph = nx.grid_2d_graph(6, 6)
+    graph.remove_edge((2, 2), (2, 3))
+    graph_nodes = set(graph) - {(2, 2), (2, 3), (1, 1)}
+
+    subgraph = graph.subgraph(graph_nodes | {(2, 2), (2, 3)})
+    expected = next(path for path in nx.all_simple_edge_paths(subgraph, (2, 2), (2, 3), 7) if len(path) > 3)
+    assert find_detour(graph, graph_nodes, (2, 2), (2, 3), 4, 7) == expected
+    assert find_detour(graph, graph_nodes, (2, 2), (2, 3), 4, 2) is None
+
+
+def test_meander_path_replaces_edges_in_place():
+    path = MeanderPath([(0, 1), (1, 2), (2, 3)])
+    path.replace((1, 2), (1, 2), [(1, 4), (4, 2)])
+    path.replace((0, 1), (1, 4), [(0, 5), (5, 4)])
+    path.replace((2, 3), (2, 3), [(2, 6), (6, 3)])
+
+    assert list(path) == [(0, 5), (5, 4), (4, 2), (2, 6), (6, 3)]
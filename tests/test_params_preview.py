@@ -0,0 +1,39 @@
+from inkex import Rectangle
+from inkex.tester.svg import svg
+
+from lib.elements import FillStitch, Stroke
+from lib.extensions.params import Params, PreviewCache
+
+
+def test_preview_cache_keeps_fill_and_stroke_apart():
+    root = svg()
+    rect = root.add(Rectangle(attrib={"id": "rect1", "width": "10", "height": "10", "style": "fill:#ff0000;stroke:#000000"}))
+    fill = FillStitch(rect)
+    stroke = Stroke(rect)
+    preview_cache = PreviewCache()
+
+    fill_stitch_groups = preview_cache.embroider(fill, None, stroke)
+    stroke_stitch_groups = preview_cache.embroider(stroke, fill_stitch_groups[-1], None)
+    assert stroke_stitch_groups is not fill_stitch_groups
+    assert preview_cache.embroider(fill, None, stroke) is fill_stitch_groups
+    assert preview_cache.embroider(stroke, fill_stitch_groups[-1], None) is stroke_stitch_groups
+
+    fill.set_param("angle", 45)
+    assert preview_cache.embroider(fill, None, stroke) is not fill_stitch_groups
+
+
+def test_tabs_of_a_node_see_each_others_params():
+    root = svg()
+    root.add(Rectangle(attrib={"id": "rect1", "width": "10", "height": "10", "style": "fill:#ff0000;stroke:#000000"}))
+    params = Params()
+    params.svg = root
+    params.document = root.getroottree()
+
+    elements_by_class = dict(params.get_nodes_by_class())
+    fill = elements_by_class[FillStitch][0]
+    stroke = elements_by_class[Stroke][0]
+    assert stroke.min_stitch_length is None
+
+    fill.set_param("min_stitch_length_mm", 2)
+    assert stroke.min_stitch_length == Stroke(stroke.node).min_stitch_length
+    assert stroke.min_stitch_length is not None
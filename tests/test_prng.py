@@ -0,0 +1,27 @@
+from itertools import islice
+
+import numpy as np
+
+from lib.utils import prng
+
+
+def test_legacy_stream_is_unchanged():
+    assert prng.uniform_ints('seed', 0).tolist() == [2420172511, 76576424, 3493383585, 781762539,
+                                                     1371317864, 3733571597, 2736948156, 3707307008]
+    assert prng.stream_version('seed', 'satin-points') == prng.LEGACY_STREAM
+    assert all(np.array_equal(roll, prng.uniform_floats('seed', i)) for i, roll in enumerate(islice(prng.iter_rolls('seed'), 20)))
+
+
+def test_block_stream_is_used_for_derived_seeds():
+    seed = prng.versioned_seed('seed')
+    assert prng.versioned_seed('seed', prng.LEGACY_STREAM) == 'seed'
+    assert prng.stream_version(seed, 'satin-points', 3) == prng.BLOCK_STREAM
+
+    floats = prng.n_uniform_floats(3000, seed, 'x')
+    assert ((floats >= 0) & (floats < 1)).all()
+    assert np.array_equal(floats[:8], prng.uniform_floats(seed, 'x'))
+    assert list(islice(prng.iter_uniform_floats(seed, 'x'), 3000)) == floats.tolist()
+    assert np.array_equal(np.concatenate(list(islice(prng.iter_rolls(seed, 'x'), 10))), floats[:80])
+    assert not np.array_equal(floats[:8], prng.uniform_floats('seed', 'x'))
+    # the blocks of a stream don't repeat in the streams of derived seeds
+    assert not np.array_equal(floats[8:16], prng.uniform_floats(seed, 'x', 1))
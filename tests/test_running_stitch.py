@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+
+from lib.stitch_plan import Stitch
+from lib.stitches.running_stitch import (even_running_stitch,
+                                         random_running_stitch)
+from lib.utils.geometry import Point
+
+
+def test_point_lists_and_arrays_give_the_same_stitches():
+    points = [Stitch(x, 10 * math.sin(x / 5), tags=['corner'] if x == 30 else None) for x in range(0, 60, 3)]
+    points.extend(Stitch(60 - x, 20 + x) for x in range(0, 30, 2))
+    coordinates = np.array([point.as_tuple() for point in points])
+
+    stitches = even_running_stitch(points, 4, 0.2)
+    array_stitches = even_running_stitch(coordinates, 4, 0.2)
+    assert isinstance(array_stitches, np.ndarray) and array_stitches.shape == (len(stitches), 2)
+    assert np.array_equal(array_stitches, [stitch.as_tuple() for stitch in stitches])
+    assert all(isinstance(stitch, Stitch) for stitch in stitches)
+    assert stitches[0] is points[0] and stitches[-1] is points[-1]
+
+    stitches = random_running_stitch(points, 4, 0.2, 0.25, "seed")
+    array_stitches = random_running_stitch(coordinates, 4, 0.2, 0.25, "seed")
+    assert np.array_equal(array_stitches, [stitch.as_tuple() for stitch in stitches])
+
+
+def test_even_running_stitch_keeps_stitches_even():
+    stitches = even_running_stitch([Point(0, 0), Point(10, 0), Point(10, 10)], 3, 0.1)
+    expected = [(0, 0), (2.5, 0), (5, 0), (7.5, 0), (10, 0), (10, 2.5), (10, 5), (10, 7.5), (10, 10)]
+    assert np.allclose([stitch.as_tuple() for stitch in stitches], expected, atol=1e-5)
+    assert even_running_stitch([], 3, 0.1) is None
+    assert even_running_stitch(np.empty((0, 2)), 3, 0.1).shape == (0, 2)
+
+
+def test_stitches_on_path_points_are_those_points():
+    # The path turns back on itself, and the first stitch ends exactly at the turn.
+    points = [Stitch(0, 0), Stitch(5, 0, tags=['turn']), Stitch(-3, 0)]
+    stitches = even_running_stitch(points, 100, 3)
+    assert stitches == [points[0], points[1], points[2]]
+    assert stitches[1] is points[1] and stitches[1].has_tag('turn')
+
+
+def test_long_point_lists_use_arrays():
+    points = [Point(math.cos(i / 200) * 100, math.sin(i / 200) * 100) for i in range(1200)]
+    coordinates = np.array([point.as_tuple() for point in points])
+
+    stitches = even_running_stitch(points, 4, 0.2)
+    assert all(isinstance(stitch, Point) for stitch in stitches)
+    assert stitches[0] is points[0] and stitches[-1] is points[-1]
+    assert np.array_equal(even_running_stitch(coordinates, 4, 0.2), [stitch.as_tuple() for stitch in stitches])
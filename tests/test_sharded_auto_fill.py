@@ -0,0 +1,48 @@
+import math
+
+from shapely.geometry import Polygon
+
+from lib.stitches.fill import intersect_region_with_grating
+from lib.stitches.sharded_auto_fill import split_shape_into_strips
+from lib.utils.geometry import Point
+
+
+def _row_positions(shape, angle, row_spacing):
+    # where each row is across the rows, like in intersect_region_with_grating()
+    normal = Point(-1, 0).rotate(-angle).rotate(-math.pi / 2)
+    return [round(Point(*row[0][0]) * normal, 6) for row in intersect_region_with_grating(shape, angle, row_spacing)]
+
+
+def _assert_rows_aligned(shape, strips, angle, row_spacing):
+    rows = _row_positions(shape, angle, row_spacing)
+    strip_rows = [_row_positions(strip, angle, row_spacing) for strip in strips]
+
+    assert all(strip_rows)
+    assert sorted(sum(strip_rows, [])) == sorted(rows)
+
+
+def test_strips_keep_rows_aligned():
+    shape = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+
+    for angle in (0, math.pi / 4, math.pi / 2):
+        strips = split_shape_into_strips(shape, angle, 3, 2500)
+
+        assert len(strips) == 4
+        assert abs(sum(strip.area for strip in strips) - shape.area) < 1e-6
+        _assert_rows_aligned(shape, strips, angle, 3)
+
+
+def test_vertex_on_a_row_adds_no_row():
+    # (10, 3) is on a row, and the strip it ends up in has a different center
+    shape = Polygon([(10, 3), (90, 30), (50, 99)])
+
+    for angle in (0, math.pi / 4, math.pi / 2):
+        strips = split_shape_into_strips(shape, angle, 3, 2500)
+
+        assert len(strips) == 2
+        _assert_rows_aligned(shape, strips, angle, 3)
+
+
+def test_small_shapes_are_not_split():
+    shape = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    assert split_shape_into_strips(shape, 0, 3, 2500) == [shape]
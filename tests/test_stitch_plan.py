@@ -0,0 +1,132 @@
+import pickle
+
+import numpy as np
+
+from lib.stitch_plan import Stitch, StitchArray, StitchGroup
+from lib.stitch_plan.stitch_plan import stitch_groups_to_stitch_plan
+
+
+def _stitch_groups():
+    group1 = StitchGroup(color="red", stitches=[Stitch(0, 0), Stitch(10, 0), Stitch(10, 0.1), Stitch(20, 5)],
+                         trim_after=True, tags=["fill_row"])
+    group2 = StitchGroup(color="red", stitches=[Stitch(100, 100), Stitch(100, 120, min_stitch_length=2.0)], stop_after=True)
+    group3 = StitchGroup(color="blue", stitches=[Stitch(5, 5), Stitch(5, 30), Stitch(-3, 30)])
+    return [group1, group2, group3]
+
+
+def _as_tuples(stitch_plan):
+    return [
+        (color_block.color, [(stitch.x, stitch.y, stitch.jump, stitch.trim, stitch.stop, stitch.color_change,
+                              stitch.min_stitch_length, sorted(stitch.tags)) for stitch in color_block])
+        for color_block in stitch_plan
+    ]
+
+
+def test_columnar_stitch_plan_matches_list_stitch_plan():
+    stitch_plan = stitch_groups_to_stitch_plan(_stitch_groups())
+    columnar_plan = stitch_groups_to_stitch_plan(_stitch_groups(), columnar=True)
+
+    assert _as_tuples(stitch_plan) == _as_tuples(columnar_plan)
+    assert stitch_plan.num_stitches == columnar_plan.num_stitches
+    assert stitch_plan.num_trims == columnar_plan.num_trims
+    assert stitch_plan.num_stops == columnar_plan.num_stops
+    assert stitch_plan.num_jumps == columnar_plan.num_jumps
+    assert stitch_plan.bounding_box == columnar_plan.bounding_box
+    assert stitch_plan.estimated_thread == columnar_plan.estimated_thread
+    assert [block.trim_after for block in stitch_plan] == [block.trim_after for block in columnar_plan]
+    assert [block.stop_after for block in stitch_plan] == [block.stop_after for block in columnar_plan]
+
+
+def test_to_columnar():
+    stitch_plan = stitch_groups_to_stitch_plan(_stitch_groups())
+    assert _as_tuples(stitch_plan) == _as_tuples(stitch_plan.to_columnar())
+
+
+def test_stitch_view_writes_through():
+    stitch_array = StitchArray.from_stitches([Stitch(1, 2, tags=["a"]), Stitch(3, 4, jump=True)])
+
+    stitch = stitch_array[1]
+    assert stitch.jump
+    stitch.jump = False
+    stitch.trim = True
+    stitch.x += 1
+    stitch.min_stitch_length = 0.5
+    stitch.add_tag("b")
+
+    assert stitch_array[-1] == Stitch(4, 4)
+    assert stitch_array[1].trim and not stitch_array[1].jump
+    assert stitch_array[1].min_stitch_length == 0.5
+    assert stitch_array[1].tags == {"b"}
+    assert stitch_array[0].tags == {"a"}
+    assert stitch_array[0].min_stitch_length is None
+
+
+def test_stitch_view_pickles_as_stitch():
+    stitch = Stitch(1, 2, jump=True, tags=["b", "a"])
+    stitch_array = StitchArray.from_stitches([stitch])
+
+    unpickled = pickle.loads(pickle.dumps(stitch_array[0]))
+    assert type(unpickled) is Stitch
+    assert unpickled.__getstate__() == stitch.__getstate__()
+
+
+def test_stitch_array_delete_and_slice():
+    stitch_array = StitchArray.from_stitches([Stitch(i, i) for i in range(40)])
+
+    del stitch_array[-1]
+    del stitch_array[0:10]
+
+    assert len(stitch_array) == 29
+    assert stitch_array[0] == Stitch(10, 10)
+    assert [stitch.x for stitch in stitch_array[-2:]] == [37, 38]
+
+
+def _filter_duplicate_stitches_reference(stitches, min_stitch_len):
+    # the original stitch-by-stitch implementation
+    filtered = [stitches[0]]
+    for stitch in stitches[1:]:
+        if filtered[-1].jump or stitch.stop or stitch.trim or stitch.color_change:
+            pass
+        elif 'lock_stitch' in stitch.tags:
+            pass
+        else:
+            length = (stitch - filtered[-1]).length()
+            min_length = stitch.min_stitch_length or min_stitch_len
+            if length <= min_length:
+                continue
+
+        filtered.append(stitch)
+    return filtered
+
+
+def test_duplicate_stitch_mask_matches_reference():
+    random = np.random.default_rng(42)
+
+    for _ in range(20):
+        stitches = []
+        for x, y in random.uniform(0, 3, size=(500, 2)).cumsum(axis=0) * random.choice([0.05, 1], size=(500, 1)):
+            stitches.append(Stitch(x, y,
+                                   jump=random.random() < 0.05,
+                                   trim=random.random() < 0.02,
+                                   min_stitch_length=[None, 0, 0.5, 3.0][random.integers(4)],
+                                   tags=["lock_stitch"] if random.random() < 0.05 else []))
+
+        expected = _filter_duplicate_stitches_reference(stitches, 1.0)
+        keep = StitchArray.from_stitches(stitches).duplicate_stitch_mask(1.0)
+
+        assert [stitch for stitch, keep_stitch in zip(stitches, keep) if keep_stitch] == expected
+
+
+def test_columnar_stitch_plan_filters_like_list_stitch_plan():
+    random = np.random.default_rng(3)
+    stitch_groups = []
+    for i in range(30):
+        points = random.uniform(-1, 1, size=(50, 2)).cumsum(axis=0) + random.uniform(0, 200, size=2)
+        stitch_groups.append(StitchGroup(color=["red", "green"][i // 15],
+                                         stitches=[Stitch(x, y) for x, y in points],
+                                         trim_after=random.random() < 0.2))
+
+    stitch_plan = stitch_groups_to_stitch_plan(stitch_groups, min_stitch_len=0.3)
+    columnar_plan = stitch_groups_to_stitch_plan(stitch_groups, min_stitch_len=0.3, columnar=True)
+
+    assert _as_tuples(stitch_plan) == _as_tuples(columnar_plan)
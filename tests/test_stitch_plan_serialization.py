@@ -0,0 +1,68 @@
+import pickle
+
+from inkex import Color
+
+from lib.stitch_plan import Stitch, StitchGroup
+from lib.stitch_plan.lock_stitch import LockStitch
+from lib.stitch_plan.serialization import (FORMAT_VERSION,
+                                           stitch_groups_from_bytes,
+                                           stitch_groups_to_bytes)
+
+
+def _stitch_groups():
+    custom_lock = LockStitch('end', 'custom', 80, 0.7)
+    custom_lock.set_path("0 0.3 -0.3 0")
+
+    return [
+        StitchGroup(color=Color("#ff0000"),
+                    stitches=[Stitch(0, 0, tags=["lock_stitch"]), Stitch(1.5, 2.25, jump=True), Stitch(3, -4, min_stitch_length=0.5)],
+                    trim_after=True,
+                    min_jump_stitch_length=2.5,
+                    lock_stitches=(LockStitch('start', 'arrow', 120, 0.7), custom_lock),
+                    tags=["fill_row"]),
+        StitchGroup(color="black", stitches=[], stop_after=True, force_lock_stitches=True),
+        StitchGroup(color=Color("blue"), stitches=[Stitch(5, 5, trim=True, color="green")], min_jump_stitch_length=None),
+    ]
+
+
+def _describe(stitch_groups):
+    return [
+        (group.color, group.trim_after, group.stop_after, group.force_lock_stitches, group.min_jump_stitch_length,
+         [(lock.lock_stitch_definition.id, lock.lock_stitch_definition._path, lock.scale.percent, lock.scale.absolute)
+          if lock else None for lock in group.lock_stitches],
+         [stitch.__getstate__() for stitch in group.stitches])
+        for group in stitch_groups
+    ]
+
+
+def test_round_trip():
+    stitch_groups = _stitch_groups()
+    decoded = stitch_groups_from_bytes(stitch_groups_to_bytes(stitch_groups))
+
+    assert _describe(decoded) == _describe(stitch_groups)
+
+
+def test_decoded_stitches_can_be_changed():
+    decoded = stitch_groups_from_bytes(stitch_groups_to_bytes(_stitch_groups()))
+    assert decoded is not None
+
+    decoded[0].set_minimum_stitch_length(1.0)
+    decoded[0].stitches[0].x = 10
+
+    assert decoded[0].stitches[0] == Stitch(10, 0)
+    assert [stitch.min_stitch_length for stitch in decoded[0].stitches] == [1.0, 1.0, 1.0]
+
+
+def test_other_data_is_ignored():
+    data = bytearray(stitch_groups_to_bytes(_stitch_groups()))
+    data[4] = FORMAT_VERSION + 1
+
+    assert stitch_groups_from_bytes(bytes(data)) is None
+    assert stitch_groups_from_bytes(None) is None
+    assert stitch_groups_from_bytes(_stitch_groups()) is None
+
+
+def test_smaller_than_pickle():
+    stitch_groups = [StitchGroup(color=Color("red"), stitches=[Stitch(i, i, tags=["fill_row"]) for i in range(1000)])]
+
+    assert len(stitch_groups_to_bytes(stitch_groups)) < len(pickle.dumps(stitch_groups)) / 2
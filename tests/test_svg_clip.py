@@ -0,0 +1,28 @@
+from inkex import ClipPath, Group, PathElement, Rectangle
+from inkex.tester.svg import svg
+
+from lib.svg.clip import get_clip_fingerprint, get_clip_path
+
+
+def test_clip_path_is_shared_and_follows_changes():
+    root = svg()
+    clip = root.defs.add(ClipPath(id="clip1"))
+    clip_rect = clip.add(Rectangle(x="0", y="0", width="10", height="10"))
+    group = root.add(Group(attrib={"clip-path": "url(#clip1)", "transform": "translate(5, 0)"}))
+    paths = [group.add(PathElement(attrib={"d": f"M {i},0 L 20,20"})) for i in range(3)]
+
+    shapes = [get_clip_path(path) for path in paths]
+    assert shapes[0].bounds == (5, 0, 15, 10)
+    assert shapes[1] is shapes[0] and shapes[2] is shapes[0]
+    # the clip doesn't keep the transform of the group
+    assert clip.get('transform') is None
+
+    fingerprint = get_clip_fingerprint(paths[0])
+    assert get_clip_fingerprint(paths[1]) == fingerprint
+    clip_rect.set('width', '20')
+    assert get_clip_fingerprint(paths[0]) != fingerprint
+    assert get_clip_path(paths[0]).bounds == (5, 0, 25, 10)
+
+    paths[2].set('clip-path', 'url(#clip1)')
+    assert get_clip_path(paths[2]).bounds == (5, 0, 25, 10)
+    assert get_clip_path(root.add(PathElement(attrib={"d": "M 0,0 L 1,1"}))) is None
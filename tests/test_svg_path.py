@@ -0,0 +1,32 @@
+from copy import deepcopy
+
+import numpy as np
+from inkex import Group, Path, PathElement, bezier
+from inkex.tester.svg import svg
+
+from lib.svg.path import flatten_superpath, get_node_transform
+
+
+def test_flatten_superpath_matches_cspsubdiv():
+    csp = Path("M 0,0 C 10,20 30,-20 40,0 L 50,10 Q 60,30 70,0 Z M 5,5 M 100,100 C 120,80 90,60 100,50").to_superpath()
+    expected = deepcopy(csp)
+    bezier.cspsubdiv(expected, 0.1)
+
+    flattened = flatten_superpath(csp)
+    assert [subpath.tolist() for subpath in flattened] == [[list(point) for _, point, _ in subpath] for subpath in expected]
+    assert all(isinstance(subpath, np.ndarray) and subpath.shape[1] == 2 for subpath in flattened)
+    assert flatten_superpath([]) == []
+
+
+def test_node_transform_follows_changes():
+    root = svg()
+    layer = root.add(Group(attrib={"transform": "translate(10, 0)"}))
+    group = layer.add(Group(attrib={"transform": "scale(2)"}))
+    path = group.add(PathElement(attrib={"d": "M 0,0 L 1,1", "transform": "translate(1, 1)"}))
+    other = root.add(Group(attrib={"transform": "translate(0, 5)"}))
+
+    assert get_node_transform(path).apply_to_point((0, 0)) == (12, 2)
+    group.set('transform', 'scale(3)')
+    assert get_node_transform(path).apply_to_point((0, 0)) == (13, 3)
+    other.append(group)
+    assert get_node_transform(path).apply_to_point((0, 0)) == (3, 8)
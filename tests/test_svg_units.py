@@ -0,0 +1,13 @@
+from inkex.tester.svg import svg
+
+from lib.svg.units import get_viewbox_transform
+
+
+def test_viewbox_transform_is_a_copy():
+    root = svg('width="100mm" height="50mm" viewBox="0 0 200 100"')
+    transform = get_viewbox_transform(root)
+    expected = transform.matrix
+
+    transform.add_scale(3)
+    assert get_viewbox_transform(root).matrix == expected
+    assert get_viewbox_transform(root) is not get_viewbox_transform(root)
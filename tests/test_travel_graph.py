@@ -0,0 +1,42 @@
+import networkx
+
+from lib.stitches.utils.travel_graph import CSRTravelGraph, TravelEdgeArrays
+
+
+def _grid_graph():
+    graph: networkx.MultiGraph = networkx.MultiGraph()
+    for x in range(5):
+        for y in range(5):
+            if x < 4:
+                graph.add_edge((x, y), (x + 1, y), key='outline', weight=3 * (1 + y % 2))
+            if y < 4:
+                graph.add_edge((x, y), (x, y + 1), key='travel', weight=0.5)
+    for node in graph:
+        graph.nodes[node]['outline'] = 0
+    return graph
+
+
+def _assert_shortest_paths(graph, csr_graph):
+    def length(path):
+        return sum(min(data['weight'] for data in graph[a][b].values()) for a, b in zip(path, path[1:]))
+
+    for start, end in [((0, 0), (4, 4)), ((4, 0), (0, 3)), ((2, 2), (2, 2)), ((0, 4), (4, 0))]:
+        path = csr_graph.shortest_path(start, end)
+        assert path[0] == start and path[-1] == end
+        assert length(path) == networkx.shortest_path_length(graph, start, end, weight='weight')
+
+    csr_graph.remove_edges_from([((0, y), (0, y + 1), 'travel') for y in range(4)])
+    graph.remove_edges_from([((0, y), (0, y + 1), 'travel') for y in range(4)])
+    assert length(csr_graph.shortest_path((0, 0), (0, 4))) == networkx.shortest_path_length(graph, (0, 0), (0, 4), weight='weight')
+
+
+def test_csr_graph_finds_shortest_paths():
+    graph = _grid_graph()
+    _assert_shortest_paths(graph, CSRTravelGraph(graph))
+
+
+def test_csr_graph_with_prepared_travel_edges():
+    graph = _grid_graph()
+    travel_edges = TravelEdgeArrays((start, end, key, weight) for start, end, key, weight in graph.edges(keys=True, data='weight')
+                                    if key == 'travel')
+    _assert_shortest_paths(graph, CSRTravelGraph(graph, travel_edges))